@@ -0,0 +1,106 @@
+import io
+import os
+
+from PIL import Image, ImageFont
+
+FONTS = {
+    "inter": os.path.join("ui", "fonts", "Inter-Regular.ttf"),
+    "roboto_mono": os.path.join("ui", "fonts", "RobotoMono-Regular.ttf"),
+    "anton": os.path.join("ui", "fonts", "Anton-Regular.ttf"),
+    "lato_bold": os.path.join("ui", "fonts", "Lato-Bold.ttf"),
+}
+
+THEMED_TEMPLATES = {
+    "userlevel": os.path.join("ui", "images", "userlevel", "{theme}", "userlevel.png"),
+    "lb": os.path.join("ui", "images", "leaderboard", "{theme}", "lb.png"),
+    "va_card": os.path.join(
+        "ui", "images", "va_card", "{theme}", "va_flightcard_blank.png"
+    ),
+}
+
+TEMPLATES = {
+    "quote": os.path.join("ui", "images", "quote", "quote.png"),
+    "quote_mask": os.path.join("ui", "images", "quote", "AVMask.png"),
+}
+
+
+def image_size(img: Image.Image) -> int:
+    return img.width * img.height * len(img.getbands())
+
+
+class AssetRegistry:
+    def __init__(self) -> None:
+        self.theme: int | None = None
+        self._fonts: dict[tuple, ImageFont.FreeTypeFont] = {}
+        self._font_files: dict[str, bytes] = {}
+        self._templates: dict[str, Image.Image] = {}
+        self._themed: dict[str, Image.Image] = {}
+
+    def font(self, name: str, size: int, basic: bool = False) -> ImageFont.FreeTypeFont:
+        key = (name, size, basic)
+        if key not in self._fonts:
+            if name not in self._font_files:
+                with open(FONTS[name], "rb") as f:
+                    self._font_files[name] = f.read()
+            self._fonts[key] = ImageFont.truetype(
+                io.BytesIO(self._font_files[name]),
+                size=size,
+                layout_engine=ImageFont.Layout.BASIC if basic else None,
+            )
+        return self._fonts[key]
+
+    def set_theme(self, theme: int) -> None:
+        if theme != self.theme:
+            self._themed.clear()
+            self.theme = theme
+
+    def template(self, name: str, theme: int | None = None) -> Image.Image:
+        if name in TEMPLATES:
+            if name not in self._templates:
+                self._templates[name] = self._load(TEMPLATES[name])
+            return self._templates[name].copy()
+
+        if theme is not None:
+            self.set_theme(theme)
+        if name not in self._themed:
+            self._themed[name] = self._load(
+                THEMED_TEMPLATES[name].format(theme=self.theme)
+            )
+        return self._themed[name].copy()
+
+    def _load(self, path: str) -> Image.Image:
+        with Image.open(path) as img:
+            img.load()
+            return img.copy()
+
+    def preload(self, theme: int) -> None:
+        self.set_theme(theme)
+        for name in THEMED_TEMPLATES:
+            self.template(name)
+        for name in TEMPLATES:
+            self.template(name)
+        for name, path in FONTS.items():
+            with open(path, "rb") as f:
+                self._font_files[name] = f.read()
+
+    def clear(self) -> None:
+        self._fonts.clear()
+        self._font_files.clear()
+        self._templates.clear()
+        self._themed.clear()
+        self.theme = None
+
+    def stats(self) -> dict[str, int]:
+        templates = list(self._templates.values()) + list(self._themed.values())
+        font_bytes = sum(len(data) for data in self._font_files.values())
+        template_bytes = sum(image_size(img) for img in templates)
+        return {
+            "fonts": len(self._fonts),
+            "templates": len(templates),
+            "font_bytes": font_bytes,
+            "template_bytes": template_bytes,
+            "bytes": font_bytes + template_bytes,
+        }
+
+
+registry = AssetRegistry()
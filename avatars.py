@@ -0,0 +1,55 @@
+import io
+
+import discord
+from PIL import Image, ImageDraw
+
+from assets import image_size
+from cache import LRUCache
+
+# Largest size any renderer draws an avatar at, so the CDN never sends more.
+FETCH_SIZE = 1024
+
+
+def round_masked(img: Image.Image) -> Image.Image:
+    avatar = img.resize((1024, 1024))
+    h, w = avatar.size
+    avmask = Image.new("L", (h, w), 0)
+    clear = Image.new("RGBA", (h, w), 1)
+    draw = ImageDraw.Draw(avmask)
+    draw.ellipse((0, 0, h, w), fill=255)
+    masked = Image.composite(avatar, clear, mask=avmask)
+    return masked.resize((612, 612))
+
+
+def square(img: Image.Image) -> Image.Image:
+    return img.resize((1024, 1024))
+
+
+VARIANTS = {
+    "round_612": round_masked,
+    "square_1024": square,
+}
+
+# Decoded variants live in each render worker, raw bytes in the bot process.
+variants = LRUCache(max_bytes=64 * 1024 * 1024, sizeof=image_size)
+
+
+def variant(key: str, data: bytes, name: str) -> Image.Image:
+    img = variants.get((key, name))
+    if img is None:
+        with Image.open(io.BytesIO(data)) as avatar:
+            img = VARIANTS[name](avatar)
+        variants.set((key, name), img)
+    return img
+
+
+class AvatarCache:
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024) -> None:
+        self.cache = LRUCache(max_bytes=max_bytes)
+
+    async def read(self, asset: discord.Asset) -> tuple[str, bytes]:
+        data = self.cache.get(asset.key)
+        if data is None:
+            data = await asset.with_size(FETCH_SIZE).read()
+            self.cache.set(asset.key, data)
+        return asset.key, data
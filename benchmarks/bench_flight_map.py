@@ -0,0 +1,55 @@
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import ImageColor
+
+import maps
+from maps import MAP_COLORS, Basemap, render_flight_map
+from rendering import LEVEL_COLORS
+
+ROUTES = [((40.64, -73.78), (51.47, -0.45)), ((51.47, -0.45), (50.9, 4.48))]
+
+
+def make_topo(path: str) -> None:
+    # One square continent with a lake, enough to hit every fill and line layer.
+    square = [[-60, -30], [120, 0], [0, 60], [-120, 0], [0, -60]]
+    lake = [[-10, -5], [20, 0], [0, 10], [-20, 0], [0, -10]]
+    topo = {
+        "type": "Topology",
+        "arcs": [square, lake],
+        "objects": {
+            "land": {"type": "Polygon", "arcs": [[0]]},
+            "lakes": {"type": "Polygon", "arcs": [[1]]},
+            "countries": {"type": "LineString", "arcs": [0]},
+            "coastlines": {"type": "LineString", "arcs": [0]},
+        },
+    }
+    with open(path, "w") as f:
+        json.dump(topo, f)
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "topo.json")
+        make_topo(path)
+        maps._basemap = Basemap(path)
+
+        # Every theme the bot can switch to needs its own map palette.
+        assert set(LEVEL_COLORS) <= set(MAP_COLORS), set(LEVEL_COLORS) - set(MAP_COLORS)
+        for theme, colors in sorted(MAP_COLORS.items()):
+            start = time.perf_counter()
+            img = render_flight_map(ROUTES, theme=theme, size=512)
+            elapsed = time.perf_counter() - start
+            found = {color for _, color in img.getcolors(img.width * img.height)}  # type: ignore
+            for name in ("ocean", "land", "route"):
+                assert ImageColor.getrgb(colors[name]) in found, (theme, name)
+            print(f"theme {theme}: {img.width}x{img.height} in {elapsed * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fakes import (
+    TMP,
+    FakeAutocompleteContext,
+    FakeBot,
+    FakeChannel,
+    FakeContext,
+    FakeMember,
+    FakeMessage,
+    create_main_db,
+    create_va_db,
+)
+
+from bot import VA, get_airports
+from bench_map_crop import make_map
+from maps import crop_map
+from cogs.level import LevelingCommands
+from cogs.listeners import Listeners
+from cogs.va import VACommands
+
+
+class Bench:
+    def __init__(self, name: str, func, ops: int) -> None:
+        self.name = name
+        self.func = func
+        self.ops = ops
+
+    async def run(self, ops: int, offset: int = 0) -> float:
+        start = time.perf_counter()
+        for i in range(offset, offset + ops):
+            result = self.func(i)
+            if asyncio.iscoroutine(result):
+                await result
+        return time.perf_counter() - start
+
+    async def measure(self, scale: float) -> tuple[float, float, float]:
+        ops = max(1, int(self.ops * scale))
+        elapsed = await self.run(ops)
+
+        # Allocations are measured on a separate, shorter pass so tracing
+        # doesn't skew the timing. It carries on from the timed pass so
+        # per-user benchmarks see users they haven't touched yet.
+        traced = max(1, ops // 10)
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        await self.run(traced, ops)
+        after = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        allocated = sum(
+            stat.size_diff
+            for stat in after.compare_to(before, "filename")
+            if stat.size_diff > 0
+        )
+        return ops / elapsed, allocated / traced, peak
+
+
+def benches(bot: FakeBot, members: list[FakeMember], pilots: list[FakeMember]):
+    listeners = Listeners(bot)  # type: ignore
+    level = LevelingCommands(bot)  # type: ignore
+    va = VACommands(bot)  # type: ignore
+    channel = FakeChannel()
+    queries = ["kj", "egll", "international", "north", "zz", "new y"]
+    image = make_map(1024)
+
+    async def autocomplete(i: int):
+        await get_airports(FakeAutocompleteContext(bot, queries[i % len(queries)]))  # type: ignore
+
+    async def levellisten(i: int):
+        member = members[i % len(members)]
+        await listeners.levellisten(
+            FakeMessage(member, "hello there, this is a benchmark message", channel)
+        )
+
+    async def generate_image(i: int):
+        # A different user every time, so the level card cache can't help.
+        await level.generate_image(members[i % len(members)])  # type: ignore
+
+    async def generate_image_cached(i: int):
+        await level.generate_image(members[0])  # type: ignore
+
+    async def va_stats(i: int):
+        await VACommands.va_stats.callback(va, FakeContext(bot, pilots[0]))  # type: ignore
+
+    async def va_flights(i: int):
+        pilot = pilots[i % len(pilots)]
+        await VACommands.va_flights.callback(va, FakeContext(bot, pilot), pilot)  # type: ignore
+
+    async def flight_number(i: int):
+        await VA.generate_flight_number("B738", "KJFK", "EGLL")
+
+    return [
+        Bench("get_airports autocomplete", autocomplete, 200),
+        Bench("levellisten", levellisten, len(members) // 2),
+        Bench("generate_image (cold)", generate_image, 40),
+        Bench("generate_image (cached)", generate_image_cached, 500),
+        Bench("va_stats", va_stats, 20),
+        Bench("va_flights pagination", va_flights, 100),
+        Bench("map crop (1024px)", lambda i: crop_map(image), 50),
+        Bench("generate_flight_number", flight_number, 500),
+    ], (listeners, level, va)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the bot's hot paths.")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply op counts")
+    parser.add_argument("--only", help="only run benchmarks containing this text")
+    args = parser.parse_args()
+
+    bot = FakeBot()
+    members = [FakeMember() for _ in range(1000)]
+    pilots = members[:50]
+    create_main_db(members)
+    create_va_db(pilots, bot.airports)
+
+    suite, cogs = benches(bot, members, pilots)
+    print(f"{'benchmark':<28} {'ops/sec':>10} {'alloc/op':>11} {'peak':>9}")
+    try:
+        for bench in suite:
+            if args.only and args.only not in bench.name:
+                continue
+            rate, allocated, peak = await bench.measure(args.scale)
+            print(
+                f"{bench.name:<28} {rate:>10.1f} {allocated / 1024:>9.1f}KB {peak / 1024 / 1024:>7.1f}MB"
+            )
+    finally:
+        for cog in cogs:
+            cog.cog_unload()
+        bot.close()
+        shutil.rmtree(TMP, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,93 @@
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fakes import TMP, FakeBot, FakeChannel, FakeMember, FakeMessage
+
+from cogs.listeners import Listeners
+from logqueue import MAX_COMPONENTS, MAX_EMBEDS, LogQueue
+
+
+async def flood(events: int) -> None:
+    bot = FakeBot()
+    logs = FakeChannel()
+    queue = LogQueue(bot, max_size=events * 2)
+    queue.channel = lambda: logs  # type: ignore
+    bot.send_log = queue.put  # type: ignore
+    listeners = Listeners(bot)  # type: ignore
+    members = [FakeMember() for _ in range(20)]
+    channel = FakeChannel()
+
+    try:
+        start = time.perf_counter()
+        for i in range(events):
+            message = FakeMessage(members[i % len(members)], f"message {i}", channel)
+            await listeners.on_message_delete(message)  # type: ignore
+        await queue.close()
+        elapsed = time.perf_counter() - start
+
+        embeds = [len(kwargs["embeds"]) for _, kwargs in logs.sent]
+        buttons = [len(kwargs["view"].children) for _, kwargs in logs.sent]
+        print(
+            f"{events} deletes -> {len(logs.sent)} messages in {elapsed:.2f}s "
+            f"({queue.stats()})"
+        )
+        assert sum(embeds) == events and sum(buttons) == events
+        assert max(embeds) <= MAX_EMBEDS and max(buttons) <= MAX_COMPONENTS
+        # A batch goes out short when the queue catches up with the
+        # listeners mid-flood, so allow a few over the minimum.
+        minimum = -(-events // MAX_EMBEDS)
+        assert len(logs.sent) <= minimum + minimum // 4, len(logs.sent)
+        assert all(kwargs["view"].is_finished() for _, kwargs in logs.sent)
+        # Buttons in a shared message carry the index of their entry's embed.
+        for (_, kwargs), count in zip(logs.sent, embeds):
+            labels = [button.label for button in kwargs["view"].children]
+            if count > 1:
+                assert labels == [
+                    f"#{i} View Raw Contents" for i in range(1, count + 1)
+                ]
+    finally:
+        listeners.cog_unload()
+        bot.close()
+
+
+async def unbatchable(events: int) -> None:
+    # Content can't be merged, so these must not wait for a burst to gather.
+    bot = FakeBot()
+    logs = FakeChannel()
+    queue = LogQueue(bot)
+    queue.channel = lambda: logs  # type: ignore
+
+    try:
+        start = time.perf_counter()
+        for i in range(events):
+            await queue.put(f"event {i}")
+            await asyncio.sleep(0)
+        await queue.close()
+        elapsed = time.perf_counter() - start
+        print(f"{events} content events -> {len(logs.sent)} messages in {elapsed:.2f}s")
+        assert len(logs.sent) == events
+        assert elapsed < queue.interval, elapsed
+    finally:
+        bot.close()
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Flood the log queue.")
+    parser.add_argument("--events", type=int, default=200)
+    args = parser.parse_args()
+    try:
+        await flood(args.events)
+        await unbatchable(args.events)
+    finally:
+        shutil.rmtree(TMP, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from maps import crop_map
+
+
+def crop_map_loop(image: Image.Image) -> Image.Image:
+    # The crop va.py used to run on the event loop.
+    grayscale_image = image.convert("L")
+
+    left, upper, right, lower = image.size[0], image.size[1], 0, 0
+    pixels = grayscale_image.load()
+
+    for x in range(image.size[0]):
+        for y in range(image.size[1]):
+            if pixels[x, y] < 255:  # type: ignore
+                left = min(left, x)
+                upper = min(upper, y)
+                right = max(right, x)
+                lower = max(lower, y)
+
+    return image.crop((left, upper + 1, right, lower))
+
+
+def make_map(size: int = 2048) -> Image.Image:
+    image = Image.new("RGB", (size, size), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle(
+        (size // 8, size // 4, size - size // 8, size - size // 4), fill=(9, 57, 97)
+    )
+    draw.line(
+        (size // 8, size // 4, size - size // 8, size - size // 4),
+        fill=(38, 129, 180),
+        width=4,
+    )
+    return image
+
+
+def timed(func, image: Image.Image, runs: int) -> tuple[float, Image.Image]:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = func(image)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 2048
+    image = make_map(size)
+
+    old_time, old = timed(crop_map_loop, image, 1)
+    new_time, new = timed(crop_map, image, 10)
+
+    assert old.size == new.size and old.tobytes() == new.tobytes()
+
+    print(f"map size:   {size}x{size}")
+    print(f"pixel loop: {old_time * 1000:.1f}ms")
+    print(f"getbbox:    {new_time * 1000:.1f}ms")
+    print(f"speedup:    {old_time / new_time:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
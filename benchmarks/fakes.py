@@ -0,0 +1,311 @@
+import io
+import itertools
+import os
+import random
+import sqlite3
+import tempfile
+
+import discord
+from discord.ext.pages import PaginatorButton
+from PIL import Image
+
+# The cogs read DB at import time, so it's pointed at a temporary directory
+# before anything else from the bot is imported.
+import bot as botmodule
+
+TMP = tempfile.mkdtemp(prefix="clearbot-bench-")
+botmodule.DB["main"] = os.path.join(TMP, "main.db")
+botmodule.DB["va"] = os.path.join(TMP, "va.db")
+
+from avatars import AvatarCache
+from cache import TieredCache
+from dispatch import MessageDispatcher
+from leaderboards import Leaderboards
+from rendering import Renderer
+
+_ids = itertools.count(10**17)
+
+
+def snowflake() -> int:
+    return next(_ids)
+
+
+def make_airports(count: int = 28000, seed: int = 1) -> dict:
+    # Roughly the size and shape of the mwgg airports.json the bot downloads.
+    rng = random.Random(seed)
+    letters = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+    airports = {}
+    while len(airports) < count:
+        icao = "".join(rng.choice(letters) for _ in range(4))
+        airports[icao] = {
+            "icao": icao,
+            "iata": "".join(rng.choice(letters) for _ in range(3))
+            if rng.random() < 0.3
+            else "",
+            "name": f"{rng.choice(['North', 'South', 'East', 'West', 'Old', 'New'])} {icao.title()} {rng.choice(['Airport', 'Airfield', 'Intl', 'Heliport'])}",
+            "lat": rng.uniform(-80, 80),
+            "lon": rng.uniform(-180, 180),
+        }
+    for icao in ("KJFK", "EGLL", "EBBR", "KLAX"):
+        airports[icao] = {
+            "icao": icao,
+            "iata": icao[1:],
+            "name": f"{icao} International Airport",
+            "lat": rng.uniform(-80, 80),
+            "lon": rng.uniform(-180, 180),
+        }
+    return airports
+
+
+def avatar_png(seed: int, size: int = 256) -> bytes:
+    img = Image.new("RGB", (size, size), (seed * 37 % 255, seed * 91 % 255, 120))
+    out = io.BytesIO()
+    img.save(out, format="PNG")
+    return out.getvalue()
+
+
+class FakeAsset:
+    def __init__(self, key: str, data: bytes) -> None:
+        self.key = key
+        self.url = f"https://cdn.discordapp.com/avatars/{key}.png"
+        self._data = data
+
+    def with_size(self, size: int) -> "FakeAsset":
+        return self
+
+    async def read(self) -> bytes:
+        return self._data
+
+
+class FakeMessage:
+    def __init__(self, author=None, content: str = "", channel=None) -> None:
+        self.id = snowflake()
+        self.author = author
+        self.content = content
+        self.clean_content = content
+        self.channel = channel or FakeChannel()
+        self.embeds = []
+        self.attachments = []
+        self.pinned = False
+        self.type = discord.MessageType.default
+
+    async def edit(self, *args, **kwargs) -> "FakeMessage":
+        return self
+
+    async def delete(self, *args, **kwargs) -> None:
+        pass
+
+    async def reply(self, *args, **kwargs) -> "FakeMessage":
+        return FakeMessage(content=kwargs.get("content") or "", channel=self.channel)
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int | None = None) -> None:
+        self.id = channel_id or snowflake()
+        self.mention = f"<#{self.id}>"
+        self.sent: list = []
+
+    async def send(self, content: str | None = None, **kwargs) -> FakeMessage:
+        self.sent.append((content, kwargs))
+        return FakeMessage(content=content or "", channel=self)
+
+    async def fetch_message(self, message_id: int) -> FakeMessage:
+        return FakeMessage(channel=self)
+
+
+class FakeMember:
+    def __init__(self, user_id: int | None = None, name: str | None = None) -> None:
+        self.id = user_id or snowflake()
+        self.name = name or f"user{self.id % 100000}"
+        self.display_name = self.name
+        self.global_name = self.name
+        self.mention = f"<@{self.id}>"
+        self.bot = False
+        self.roles = []
+        self.display_avatar = FakeAsset(str(self.id), avatar_png(self.id))
+
+    def __str__(self) -> str:
+        return self.name
+
+
+class FakeResponse:
+    def __init__(self) -> None:
+        self._done = False
+        self.sent: list = []
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def defer(self, *args, **kwargs) -> None:
+        self._done = True
+
+    async def send_message(self, *args, **kwargs) -> None:
+        self._done = True
+        self.sent.append((args, kwargs))
+
+
+class FakeWebhook:
+    def __init__(self) -> None:
+        self.sent: list = []
+
+    async def send(self, *args, **kwargs) -> FakeMessage:
+        self.sent.append((args, kwargs))
+        return FakeMessage(content=kwargs.get("content") or "")
+
+
+class FakeInteraction(discord.Interaction):
+    # Paginator.respond insists on a real Interaction, so this skips the
+    # gateway payload and fills in only what the cogs touch.
+    def __init__(self, user: FakeMember) -> None:
+        self.id = snowflake()
+        self.user = user
+        self.message = None
+        self._cs_response = FakeResponse()
+        self._webhook = FakeWebhook()
+
+    @property
+    def followup(self) -> FakeWebhook:  # type: ignore
+        return self._webhook
+
+
+class FakeContext:
+    def __init__(self, bot, author: FakeMember | None = None) -> None:
+        self.bot = bot
+        self.author = author or FakeMember()
+        self.user = self.author
+        self.interaction = FakeInteraction(self.author)
+        self.guild = None
+        self.channel = FakeChannel()
+        self.responses: list = []
+
+    async def defer(self, *args, **kwargs) -> None:
+        await self.interaction.response.defer()
+
+    async def respond(self, *args, **kwargs) -> None:
+        self.responses.append((args, kwargs))
+        if not self.interaction.response.is_done():
+            await self.interaction.response.send_message(*args, **kwargs)
+        else:
+            await self.interaction.followup.send(*args, **kwargs)
+
+
+class FakeAutocompleteContext:
+    def __init__(self, bot, value: str, options: dict | None = None) -> None:
+        self.bot = bot
+        self.value = value
+        self.options = options or {}
+        self.interaction = None
+        self.focused = None
+
+
+class FakeBot:
+    def __init__(self, airports: dict | None = None) -> None:
+        self.airports = airports if airports is not None else make_airports()
+        self.airports_ac = botmodule.airport_choices(self.airports)
+        self.theme = 0
+        self.bot_id = snowflake()
+        self.user = None
+        self.server_id = snowflake()
+        self.channels = {"fbo": snowflake(), "logs": snowflake()}
+        self.roles = {"admin": snowflake()}
+        self.va = botmodule.VA
+        self.paginator_buttons = [
+            PaginatorButton("first", label="<<", style=discord.ButtonStyle.secondary),
+            PaginatorButton("prev", label="<", style=discord.ButtonStyle.danger),
+            PaginatorButton(
+                "page_indicator", style=discord.ButtonStyle.gray, disabled=True
+            ),
+            PaginatorButton("next", label=">", style=discord.ButtonStyle.primary),
+            PaginatorButton("last", label=">>", style=discord.ButtonStyle.secondary),
+        ]
+        self.renderer = Renderer()
+        self.avatars = AvatarCache()
+        self.leaderboards = Leaderboards(self)
+        self.messages = MessageDispatcher(self)
+        self.level_cards = TieredCache(max_bytes=32 * 1024 * 1024)
+        self.logs_sent: list = []
+        self.users: dict[int, FakeMember] = {}
+
+    def color(self, type: int = 0) -> int:
+        return 0x6DB2D9
+
+    def user_object(self, user):
+        return user
+
+    async def get_or_fetch_user(self, user_id: int) -> FakeMember:
+        return self.users.setdefault(user_id, FakeMember(user_id))
+
+    def get_channel(self, channel_id: int) -> None:
+        return None
+
+    def sendable_channel(self, channel):
+        return channel
+
+    async def send_log(self, content: str | None = None, **kwargs) -> bool:
+        self.logs_sent.append((content, kwargs))
+        return True
+
+    def close(self) -> None:
+        self.leaderboards.close()
+        self.renderer.shutdown()
+
+
+def create_main_db(members: list[FakeMember]) -> None:
+    with sqlite3.connect(botmodule.DB["main"]) as db:
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS leveling (id INTEGER PRIMARY KEY, author_id TEXT, level INTEGER, nom INTEGER, denom INTEGER, last_msg INTEGER)"
+        )
+        db.execute("CREATE TABLE IF NOT EXISTS config (key TEXT, value TEXT)")
+        db.execute("INSERT INTO config VALUES ('theme', '0')")
+        db.executemany(
+            "INSERT INTO leveling (author_id, level, nom, denom, last_msg) VALUES (?, ?, ?, ?, 0)",
+            [
+                (str(member.id), i % 40, i % 25, 25 + (i % 40) * 20)
+                for i, member in enumerate(members)
+            ],
+        )
+
+
+def create_va_db(
+    users: list[FakeMember], airports: dict, flights_per_user: int = 30, seed: int = 1
+) -> None:
+    rng = random.Random(seed)
+    icaos = list(airports)[:500]
+    aircraft = ["B738", "A320", "C172", "B77W", "A359", "DH8D", "E175", "PA28"]
+    with sqlite3.connect(botmodule.DB["va"]) as db:
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS users (id INTEGER PRIMARY KEY, user_id TEXT, is_ban INTEGER DEFAULT 0, is_trial INTEGER DEFAULT 0)"
+        )
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS aircraft (id INTEGER PRIMARY KEY, icao TEXT, is_official INTEGER, type TEXT, crz_speed INTEGER)"
+        )
+        db.execute(
+            "CREATE TABLE IF NOT EXISTS flights (id INTEGER PRIMARY KEY, user_id TEXT, flight_number TEXT, aircraft TEXT, origin TEXT, destination TEXT, filed_at INTEGER, is_completed INTEGER, divert TEXT, incident TEXT)"
+        )
+        db.executemany(
+            "INSERT INTO users (user_id) VALUES (?)", [(str(u.id),) for u in users]
+        )
+        db.executemany(
+            "INSERT INTO aircraft (icao, is_official, type, crz_speed) VALUES (?, ?, ?, ?)",
+            [
+                (icao, i % 2, "GA" if icao in ("C172", "PA28") else "Airliner", 450)
+                for i, icao in enumerate(aircraft)
+            ],
+        )
+        db.executemany(
+            "INSERT INTO flights (user_id, flight_number, aircraft, origin, destination, filed_at, is_completed, divert, incident) VALUES (?, ?, ?, ?, ?, ?, 1, ?, ?)",
+            [
+                (
+                    str(user.id),
+                    f"CR{rng.randint(100, 9999)}",
+                    rng.choice(aircraft),
+                    rng.choice(icaos),
+                    rng.choice(icaos),
+                    1700000000 + rng.randint(0, 10**7),
+                    "" if rng.random() > 0.05 else f" (diverted to {rng.choice(icaos)})",
+                    "" if rng.random() > 0.02 else " (incident)",
+                )
+                for user in users
+                for _ in range(flights_per_user)
+            ],
+        )
@@ -1,4 +1,6 @@
+import asyncio
 import datetime
+import hashlib
 import os
 import re
 import sqlite3
@@ -11,6 +13,17 @@ import discord
 import requests
 from discord.ext.pages import PaginatorButton
 
+from avatars import AvatarCache
+from cache import TieredCache
+from dispatch import MessageDispatcher
+from leaderboards import Leaderboards
+from logqueue import LogQueue
+from loopmonitor import LoopMonitor
+from maps import PlotlyRenderer
+from metrics import gauge, metrics, timed_execute
+from rendering import Renderer
+from timings import CommandTimings, TimedContext
+
 DB = {"main": os.path.join("database","main.db"), "va": os.path.join("database","va.db")}
 
 class UserObject(discord.Object):
@@ -27,7 +40,7 @@ class VA:
     async def get_users(cls, get_type: Literal["id", "full"] = "id"):
         out = []
         async with aiosqlite.connect(DB["va"]) as db:
-            cur = await db.execute("SELECT * FROM users")
+            cur = await timed_execute(db, "users.select", "SELECT * FROM users")
             out = await cur.fetchall()
         if (get_type == "full") or (get_type is None):
             return out
@@ -39,8 +52,11 @@ class VA:
     @classmethod
     async def has_flights(cls, user: discord.User | discord.Member):
         async with aiosqlite.connect(DB["va"]) as db:
-            cur = await db.execute(
-                "SELECT id FROM flights WHERE user_id=?", (str(user.id),)
+            cur = await timed_execute(
+                db,
+                "flights.select",
+                "SELECT id FROM flights WHERE user_id=?",
+                (str(user.id),),
             )
             flights = await cur.fetchall()
 
@@ -54,7 +70,9 @@ class VA:
         cls, aircraft_icao, origin_icao, destination_icao, prefix="CR"
     ):
         async with aiosqlite.connect(DB["va"]) as db:
-            cur = await db.execute("SELECT icao FROM aircraft")
+            cur = await timed_execute(
+                db, "aircraft.select", "SELECT icao FROM aircraft"
+            )
             aircraft = await cur.fetchall()
             aircraft = [aircraft[0] for aircraft in aircraft]
         abc = "ABCDEFGHIJKLMNOPQRSTUVWXYZ1234567890"
@@ -87,13 +105,17 @@ class VA:
             aircraft_type = "All"
         async with aiosqlite.connect(DB["va"]) as db:
             if aircraft_type != "All":
-                cur = await db.execute(
+                cur = await timed_execute(
+                    db,
+                    "aircraft.select",
                     "SELECT * FROM aircraft WHERE type=?",
                     (aircraft_type,),
                 )
                 aircraft = await cur.fetchall()
             else:
-                cur = await db.execute("SELECT * FROM aircraft")
+                cur = await timed_execute(
+                    db, "aircraft.select", "SELECT * FROM aircraft"
+                )
                 aircraft = await cur.fetchall()
         if output_type == "list":
             aircraft = [ac[1] for ac in aircraft]
@@ -105,11 +127,37 @@ class VA:
     @classmethod
     def get_flights_from_user(cls, user: discord.Member | discord.User) -> list[tuple]:
         db = sqlite3.connect(DB["va"])
-        cur = db.execute("SELECT * FROM flights WHERE user_id=?", (str(user.id),))
-        flights = cur.fetchall()
+        with metrics.timed(metrics.db, "flights.select"):
+            cur = db.execute("SELECT * FROM flights WHERE user_id=?", (str(user.id),))
+            flights = cur.fetchall()
         return flights
 
 
+ROLE_EDIT_CONCURRENCY = 3
+
+
+def airport_choices(airports: dict) -> list[str]:
+    choices = []
+    for ap in airports:
+        icao = airports[ap].get("icao")
+        iata = airports[ap].get("iata")
+        name = airports[ap].get("name")
+
+        choices.append(
+            f"{icao if icao else 'N/A'}, {iata if iata else 'N/A'}, {name if name else 'N/A'}"
+        )
+    return choices
+
+
+async def get_airports(ctx: discord.AutocompleteContext):
+    if ctx.value == "":
+        return ["Start typing the name of an airport for results to appear (e.g. KJFK)"]
+
+    value = ctx.value.lower().replace("‘", "'").replace("’", "'")
+
+    return [airport for airport in ctx.bot.airports_ac if (value in airport.lower())]
+
+
 class ClearBot(discord.Bot):
     def __init__(self, *args, **kwargs) -> None:
         self.color = self.embed_color
@@ -123,16 +171,7 @@ class ClearBot(discord.Bot):
         resp = requests.get("https://github.com/mwgg/Airports/raw/master/airports.json")
         self.airports = resp.json()
 
-        self.airports_ac = []
-
-        for ap in self.airports:
-            icao = self.airports[ap].get("icao")
-            iata = self.airports[ap].get("iata")
-            name = self.airports[ap].get("name")
-
-            self.airports_ac.append(
-                f"{icao if icao else 'N/A'}, {iata if iata else 'N/A'}, {name if name else 'N/A'}"
-            )
+        self.airports_ac = airport_choices(self.airports)
 
         self.airports_icao = [
             self.airports[ap].get("icao")
@@ -196,8 +235,73 @@ class ClearBot(discord.Bot):
 
         self.va = VA
 
+        self.renderer = Renderer()
+        self.renderer.start(warm=True, theme=self.theme)
+        self.avatars = AvatarCache()
+        self.plotly = PlotlyRenderer()
+        self.leaderboards = Leaderboards(self)
+        self.messages = MessageDispatcher(self)
+        self.command_timings = CommandTimings()
+        self.logs = LogQueue(self)
+        self.loop_monitor = LoopMonitor(self)
+        self.level_cards = TieredCache(
+            max_bytes=32 * 1024 * 1024,
+            directory=os.path.join("cache", "level_cards"),
+        )
+        metrics.watch_cache("avatars", self.avatars.cache)
+        metrics.watch_cache("level_cards", self.level_cards.memory)
+        if self.level_cards.disk is not None:
+            metrics.watch_cache("level_cards_disk", self.level_cards.disk)
+        metrics.collect(self.metric_lines)
+        metrics.collect(self.loop_monitor.metric_lines)
+
         super().__init__(*args, **kwargs)
 
+    async def close(self) -> None:
+        # Flush queued logs while the connection is still up.
+        await self.logs.close()
+        self.loop_monitor.stop()
+        self.leaderboards.close()
+        self.renderer.shutdown()
+        await metrics.stop()
+        await super().close()
+
+    def metric_lines(self):
+        yield from gauge(
+            "clearbot_gateway_latency_seconds",
+            "Gateway heartbeat latency.",
+            {"": self.latency},
+        )
+        yield from gauge(
+            "clearbot_render_queue",
+            "Render jobs waiting or running.",
+            {"": self.renderer.pending},
+        )
+        yield from gauge(
+            "clearbot_render_bytes",
+            "Average encoded size of a render.",
+            {name: t.avg_bytes for name, t in self.renderer.timings.items()},
+            "job",
+        )
+        yield from gauge(
+            "clearbot_render_bytes_saved_total",
+            "Bytes saved by encoding renders, against their raw RGBA size.",
+            {name: t.saved_bytes for name, t in self.renderer.timings.items()},
+            "job",
+            type="counter",
+        )
+        yield from gauge(
+            "clearbot_log_queue", "Log queue counters.", self.logs.stats(), "state"
+        )
+
+    async def get_application_context(
+        self, interaction: discord.Interaction, cls=TimedContext
+    ) -> discord.ApplicationContext:
+        return await super().get_application_context(interaction, cls=cls)
+
+    async def on_message(self, message: discord.Message) -> None:
+        await self.messages.dispatch(message)
+
     def embed_color(self, type: int = 0) -> int:
         try:
             return self._colors[type][self.theme]
@@ -238,11 +342,13 @@ class ClearBot(discord.Bot):
             return False
 
     async def setup_server(self) -> bool:
-        file1 = discord.File(
-            f"ui/images/banners/{self.theme}/rules.png", filename="rules.png"
-        )
+        rules = os.path.join("ui", "images", "banners", str(self.theme), "rules.png")
+        async with aiofiles.open(rules, "rb") as f:
+            digest = hashlib.sha256(await f.read()).hexdigest()[:12]
+        # The name changes with the theme and the file, so sync_channel sees it.
+        rules_name = f"rules-{self.theme}-{digest}.png"
         rembed1 = discord.Embed(color=self.color()).set_image(
-            url="attachment://rules.png"
+            url=f"attachment://{rules_name}"
         )
         rembed2 = discord.Embed(
             color=self.color(),
@@ -271,9 +377,6 @@ class ClearBot(discord.Bot):
             colour=self.color(),
         )
 
-        def check(msg: discord.Message) -> bool:
-            return msg.author.bot
-
         fbo = self.sendable_channel(self.get_channel(self.channels.get("fbo", 0)))
         if not fbo:
             raise Exception("Didn't find the fbo channel.")
@@ -336,32 +439,92 @@ https://forums.x-plane.org/index.php?/files/file/76763-stableapproach-flight-dat
         )
         info = self.sendable_channel(self.get_channel(self.channels.get("info", 0)))
         if info and overv_channel and liv_channel:
-            await info.purge(check=check)
-            await overv_channel.purge(check=check)
-            await liv_channel.purge(check=check)
-            await info.send(
-                embeds=[rembed1, rembed2], view=RulesView(bot=self), file=file1
+            await self.sync_channel(
+                info,
+                [
+                    {
+                        "embeds": [rembed1, rembed2],
+                        "view": RulesView(bot=self),
+                        "file": (rules, rules_name),
+                    },
+                    {"embeds": [rembed3]},
+                ],
             )
-            await info.send(embeds=[rembed3])
-            await overv_channel.send(
-                embeds=[vembed, vembed2], view=VAStartView(bot=self)
+            await self.sync_channel(
+                overv_channel,
+                [{"embeds": [vembed, vembed2], "view": VAStartView(bot=self)}],
             )
-            await liv_channel.send(embed=emb)
+            await self.sync_channel(liv_channel, [{"embeds": [emb]}])
             return True
         else:
             return False
 
+    def _embed_key(self, embed: discord.Embed) -> tuple:
+        # Discord trims text and rewrites attachment URLs, compare what we control.
+        image = embed.image.url if embed.image else None
+        if image and (image.startswith("attachment://") or "/attachments/" in image):
+            # Both forms end in the file name, which is all that's ours.
+            image = image.split("?")[0].rsplit("/", 1)[-1]
+        return (
+            (embed.title or "").strip(),
+            (embed.description or "").strip(),
+            embed.colour.value if embed.colour else None,
+            embed.url or None,
+            image,
+            tuple((f.name, f.value.strip()) for f in embed.fields),
+        )
+
+    async def sync_channel(
+        self, channel: discord.TextChannel | discord.VoiceChannel, layout: list[dict]
+    ) -> None:
+        current = [msg async for msg in channel.history(limit=50) if msg.author.bot]
+        current.reverse()
+
+        same_layout = len(current) == len(layout) and all(
+            len(msg.embeds) == len(spec["embeds"])
+            and bool(msg.attachments) == ("file" in spec)
+            and bool(msg.components) == ("view" in spec)
+            for msg, spec in zip(current, layout)
+        )
+        if not same_layout:
+            await channel.purge(check=lambda msg: msg.author.bot)
+            for spec in layout:
+                kwargs = {"embeds": spec["embeds"]}
+                if "view" in spec:
+                    kwargs["view"] = spec["view"]
+                if "file" in spec:
+                    kwargs["file"] = discord.File(*spec["file"])
+                await channel.send(**kwargs)
+            return
+
+        for msg, spec in zip(current, layout):
+            if [self._embed_key(e) for e in msg.embeds] == [
+                self._embed_key(e) for e in spec["embeds"]
+            ]:
+                continue
+            kwargs = {"embeds": spec["embeds"]}
+            if "view" in spec:
+                kwargs["view"] = spec["view"]
+            if "file" in spec:
+                kwargs["file"] = discord.File(*spec["file"])
+                kwargs["attachments"] = []
+            await msg.edit(**kwargs)
+
     async def set_theme(self, author: str, theme: int = 0) -> dict[str, bool | list]:
         if not self.is_ready():
             return {"guild_success": False, "failed_roles": list(self.roles.items())}
 
         async with aiosqlite.connect(DB["main"]) as db:
-            await db.execute(
-                "UPDATE config SET value = ? WHERE key = 'theme'", (theme,)
+            await timed_execute(
+                db,
+                "config.update",
+                "UPDATE config SET value = ? WHERE key = 'theme'",
+                (theme,),
             )
             await db.commit()
 
         self.theme = theme
+        self.renderer.set_theme(theme)
 
         role_colors = {
             "*": {0: 0x6DB2D9, 1: 0xFEB32D, 2: 0x00A628},
@@ -376,33 +539,31 @@ https://forums.x-plane.org/index.php?/files/file/76763-stableapproach-flight-dat
         guild_success = False
 
         if guild:
-            for name, role_id in self.roles.items():
+            reason = f"{author} asked for a theme ({self.theme_name}) change."
+            # Discord's role route is rate limited per guild, a few at a time keeps
+            # the edits from queueing up behind 429s.
+            limit = asyncio.Semaphore(ROLE_EDIT_CONCURRENCY)
+
+            async def recolor(name: str, role_id: int) -> None:
+                role = guild.get_role(role_id)
                 try:
-                    if name == "member":
-                        role = guild.get_role(role_id)
-                        if role:
-                            await role.edit(
-                                color=role_colors["member"][self.theme],
-                                reason=f"{author} asked for a theme ({self.theme_name}) change.",
-                            )
-                        else:
-                            raise discord.DiscordException("Role not found")
-
-                    elif name != "admin":
-                        role = guild.get_role(role_id)
-                        if role:
-                            await role.edit(
-                                color=role_colors["*"][self.theme],
-                                reason=f"{author} asked for a theme ({self.theme_name}) change.",
-                            )
-                        else:
-                            raise discord.DiscordException("Role not found")
+                    if not role:
+                        raise discord.DiscordException("Role not found")
+                    color = role_colors["member" if name == "member" else "*"]
+                    if role.color.value == color[self.theme]:
+                        return
+                    async with limit:
+                        await role.edit(color=color[self.theme], reason=reason)
                 except Exception:
-                    role = guild.get_role(role_id)
-                    if role:
-                        failed.append(role.name)
-                    else:
-                        failed.append("Unknown Role")
+                    failed.append(role.name if role else "Unknown Role")
+
+            await asyncio.gather(
+                *(
+                    recolor(name, role_id)
+                    for name, role_id in self.roles.items()
+                    if name != "admin"
+                )
+            )
 
             async with aiofiles.open(
                 os.path.join("ui", "images", "logo", str(theme), "logo.png"), "rb"
@@ -416,10 +577,8 @@ https://forums.x-plane.org/index.php?/files/file/76763-stableapproach-flight-dat
 
         return {"guild_success": guild_success, "failed_roles": failed}
 
-    async def send_log(self, *args, **kwargs) -> None:
-        logs = self.get_channel(self.channels.get("logs", 0))
-        if isinstance(logs, discord.TextChannel):
-            await logs.send(*args, **kwargs)
+    async def send_log(self, content: str | None = None, **kwargs) -> bool:
+        return await self.logs.put(content, **kwargs)
 
     def is_valid_url(self, url: str) -> bool:
         pattern = "(http|https):\/\/([a-zA-Z-0-9]*)\..*"
@@ -519,7 +678,9 @@ Head over to {fbo.mention} to file your first flight!
                 "is_ban": False,
             }
             async with aiosqlite.connect(DB["va"]) as db:
-                await db.execute(
+                await timed_execute(
+                    db,
+                    "users.insert",
                     "INSERT INTO users (user_id, sign_time, is_trial, is_ban) VALUES (:user_id, :sign_time, :is_trial, :is_ban)",
                     user,
                 )
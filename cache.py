@@ -0,0 +1,208 @@
+import asyncio
+import contextlib
+import hashlib
+import os
+from collections import OrderedDict
+
+import aiofiles
+import aiofiles.os
+
+
+def cache_key(*parts) -> str:
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+
+def read_and_touch(path: str) -> bytes:
+    with open(path, "rb") as f:
+        data = f.read()
+    # The index is rebuilt from mtimes on startup, so reads count as use.
+    with contextlib.suppress(FileNotFoundError):
+        os.utime(path)
+    return data
+
+
+class DiskCache:
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+
+        # key -> size in bytes, least recently used first
+        self._index: OrderedDict[str, int] = OrderedDict()
+        entries = [
+            entry
+            for entry in os.scandir(self.directory)
+            if entry.is_file() and not entry.name.endswith(".tmp")
+        ]
+        for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+            self._index[entry.name] = entry.stat().st_size
+
+    @property
+    def size(self) -> int:
+        return sum(self._index.values())
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    async def get(self, key: str) -> bytes | None:
+        if key not in self._index:
+            self.misses += 1
+            return None
+
+        try:
+            data = await asyncio.to_thread(read_and_touch, self._path(key))
+        except FileNotFoundError:
+            self._index.pop(key, None)
+            self.misses += 1
+            return None
+
+        self._index.move_to_end(key)
+        self.hits += 1
+        return data
+
+    async def set(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+
+        tmp_path = self._path(key) + ".tmp"
+        async with aiofiles.open(tmp_path, "wb") as f:
+            await f.write(data)
+        await aiofiles.os.replace(tmp_path, self._path(key))
+
+        self._index[key] = len(data)
+        self._index.move_to_end(key)
+        await self.evict()
+
+    async def delete(self, key: str) -> None:
+        if self._index.pop(key, None) is None:
+            return
+        try:
+            await aiofiles.os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    async def evict(self) -> None:
+        total = self.size
+        while total > self.max_bytes and self._index:
+            key, size = next(iter(self._index.items()))
+            await self.delete(key)
+            total -= size
+
+    async def clear(self) -> None:
+        for key in list(self._index):
+            await self.delete(key)
+
+
+class LRUCache:
+    def __init__(
+        self,
+        max_items: int | None = None,
+        max_bytes: int | None = None,
+        sizeof=len,
+    ) -> None:
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+        # key -> (value, size), least recently used first
+        self._data: OrderedDict = OrderedDict()
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key, default=None):
+        try:
+            value, _ = self._data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value) -> None:
+        size = self.sizeof(value) if self.max_bytes is not None else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            self.pop(key)
+            return
+
+        self.pop(key)
+        self._data[key] = (value, size)
+        self.size += size
+
+        while (self.max_items is not None and len(self._data) > self.max_items) or (
+            self.max_bytes is not None and self.size > self.max_bytes
+        ):
+            _, (_, old_size) = self._data.popitem(last=False)
+            self.size -= old_size
+
+    def pop(self, key, default=None):
+        try:
+            value, size = self._data.pop(key)
+        except KeyError:
+            return default
+
+        self.size -= size
+        return value
+
+    def keys(self) -> list:
+        return list(self._data)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.size = 0
+
+
+class TieredCache:
+    def __init__(
+        self,
+        max_bytes: int,
+        directory: str | None = None,
+        disk_bytes: int | None = None,
+    ) -> None:
+        self.memory = LRUCache(max_bytes=max_bytes)
+        self.disk = (
+            DiskCache(directory, disk_bytes or max_bytes * 8) if directory else None
+        )
+
+        # group -> keys stored for it, so a whole group can be dropped at once
+        self._groups: dict = {}
+
+    async def get(self, key: tuple) -> bytes | None:
+        data = self.memory.get(key)
+        if data is not None or self.disk is None:
+            return data
+
+        data = await self.disk.get(cache_key(*key))
+        if data is not None:
+            self.memory.set(key, data)
+            self._groups.setdefault(key[0], set()).add(key)
+        return data
+
+    async def set(self, key: tuple, data: bytes) -> None:
+        self.memory.set(key, data)
+        self._groups.setdefault(key[0], set()).add(key)
+        if self.disk is not None:
+            await self.disk.set(cache_key(*key), data)
+
+    async def invalidate(self, group) -> None:
+        for key in self._groups.pop(group, ()):
+            self.memory.pop(key)
+            if self.disk is not None:
+                await self.disk.delete(cache_key(*key))
@@ -1,13 +1,18 @@
+import asyncio
 import re
 import discord
 import aiohttp
+import aiofiles
 import io
 import os, json, fitz
 import datetime
+import weakref
 from discord import option
 from discord.ext.pages import Page, Paginator
 from discord.ext import commands
-from main import ClearBot, get_airports
+from cache import DiskCache, cache_key
+from bot import ClearBot, get_airports
+from metrics import TRACE_CONFIGS
 
 CLD_COVERS = {
     "CLR" : "Clear",
@@ -39,9 +44,103 @@ def calculate_active_runways(
     offsets = sorted(offsets, key=lambda x: x[1])
     return [str(int(rwy[0]/10)) for rwy in offsets]
 
+
+# AIRAC 2001 became effective on this date, every cycle after it lasts 28 days.
+AIRAC_EPOCH = datetime.date(2020, 1, 2)
+
+
+def airac_cycle(date: datetime.date | None = None) -> str:
+    if not date:
+        date = datetime.datetime.utcnow().date()
+    cycles = (date - AIRAC_EPOCH).days // 28
+    effective = AIRAC_EPOCH + datetime.timedelta(days=cycles * 28)
+    number = (effective.timetuple().tm_yday - 1) // 28 + 1
+    return f"{effective.year % 100:02d}{number:02d}"
+
+
+def rasterize_pdf(data: bytes, dpi: int, format: str) -> list[bytes]:
+    doc = fitz.open("pdf", io.BytesIO(data))  # type: ignore
+    return [
+        page.get_pixmap(dpi=dpi).pil_tobytes(format=format, optimize=True)
+        for page in doc
+    ]
+
+
+class ChartCache:
+    def __init__(
+        self,
+        directory: str = os.path.join("cache", "charts"),
+        max_bytes: int = 512 * 1024 * 1024,
+        dpi: int = 150,
+        format: str = "JPEG",
+    ) -> None:
+        self.disk = DiskCache(directory, max_bytes)
+        self.cycle_file = directory.rstrip(os.sep) + ".airac"
+        self.dpi = dpi
+        self.format = format
+        self.cycle = None
+        # A lock only lives while someone is filling or waiting on its chart.
+        self._locks: weakref.WeakValueDictionary[str, asyncio.Lock] = (
+            weakref.WeakValueDictionary()
+        )
+
+    async def check_cycle(self) -> None:
+        cycle = airac_cycle()
+        if cycle == self.cycle:
+            return
+
+        stored = None
+        if os.path.exists(self.cycle_file):
+            async with aiofiles.open(self.cycle_file, "r") as f:
+                stored = (await f.read()).strip()
+
+        if stored != cycle:
+            await self.disk.clear()
+            async with aiofiles.open(self.cycle_file, "w") as f:
+                await f.write(cycle)
+
+        self.cycle = cycle
+
+    async def _cached_pages(self, url: str) -> list[bytes] | None:
+        count = await self.disk.get(cache_key(url, self.dpi, self.format, "pages"))
+        if count is None:
+            return None
+
+        pages = []
+        for i in range(int(count)):
+            page = await self.disk.get(cache_key(url, i, self.dpi, self.format))
+            if page is None:
+                return None
+            pages.append(page)
+        return pages
+
+    async def pages(self, url: str) -> list[bytes]:
+        await self.check_cycle()
+
+        async with self._locks.setdefault(url, asyncio.Lock()):
+            pages = await self._cached_pages(url)
+            if pages is not None:
+                return pages
+
+            async with aiohttp.ClientSession(trace_configs=TRACE_CONFIGS) as cs:
+                async with cs.get(url) as r:
+                    pdf_data = await r.content.read()
+
+            pages = await asyncio.to_thread(
+                rasterize_pdf, pdf_data, self.dpi, self.format
+            )
+            for i, page in enumerate(pages):
+                await self.disk.set(cache_key(url, i, self.dpi, self.format), page)
+            await self.disk.set(
+                cache_key(url, self.dpi, self.format, "pages"),
+                str(len(pages)).encode(),
+            )
+            return pages
+
 class AvCommands(discord.Cog):
     def __init__(self, bot: ClearBot):
         self.bot = bot
+        self.charts = ChartCache()
 
     av = discord.SlashCommandGroup(
         name="aviation", description="✈️ Commands related to aviation."
@@ -66,7 +165,7 @@ class AvCommands(discord.Cog):
     async def metar(self, ctx: discord.ApplicationContext, airport):
         await ctx.defer()
         icao = airport[:4].upper()
-        async with aiohttp.ClientSession() as cs:
+        async with aiohttp.ClientSession(trace_configs=TRACE_CONFIGS) as cs:
             async with cs.get(f"https://aviationweather.gov/api/data/metar?ids={icao}&format=json&taf=false") as resp:
                 data = await resp.json()
         
@@ -129,7 +228,7 @@ Dew point:     **{na('dewp')}** °C
     async def chart(self, ctx, airport, chart):
         await ctx.defer()
         if chart == "Approaches":
-            async with aiohttp.ClientSession() as cs:
+            async with aiohttp.ClientSession(trace_configs=TRACE_CONFIGS) as cs:
                 async with cs.get(
                     f"https://api.aviationapi.com/v1/charts?apt={airport[:4].upper()}&group=6"
                 ) as r:
@@ -143,21 +242,11 @@ Dew point:     **{na('dewp')}** °C
                     )
                     await ctx.respond(embed=embed)
                 else:
-                    url = load[airport[:4].upper()][0]["pdf_path"]
-                    async with aiohttp.ClientSession() as cs:
-                        async with cs.get(url) as r:
-                            i = 0
-                            pages = []
+                    i = 0
+                    pages = []
                     for chart in load[airport[:4].upper()]:
                         url = load[airport[:4].upper()][i]["pdf_path"]
-                        async with aiohttp.ClientSession() as cs:
-                            async with cs.get(url) as r:
-                                chart_data = await r.content.read()
-                        chart_file = io.BytesIO(chart_data)
-                        doc = fitz.open("pdf", chart_file)  # type: ignore
-                        for page in doc:
-                            pix = page.get_pixmap(dpi=150)
-                            img_data = pix.pil_tobytes(format="JPEG", optimize=True)
+                        for img_data in await self.charts.pages(url):
                             chart_img = io.BytesIO(img_data)
                             dfile = discord.File(chart_img, filename=f"chart{i}.jpg")
                             pages.append(
@@ -192,7 +281,7 @@ Dew point:     **{na('dewp')}** °C
                 )
                 await ctx.respond(embed=embed)
         if chart == "Minimums":
-            async with aiohttp.ClientSession() as cs:
+            async with aiohttp.ClientSession(trace_configs=TRACE_CONFIGS) as cs:
                 async with cs.get(
                     f"https://api.aviationapi.com/v1/charts?apt={airport[:4].upper()}&group=3"
                 ) as r:
@@ -206,21 +295,11 @@ Dew point:     **{na('dewp')}** °C
                     )
                     await ctx.respond(embed=embed)
                 else:
-                    url = load[airport[:4].upper()][0]["pdf_path"]
-                    async with aiohttp.ClientSession() as cs:
-                        async with cs.get(url) as r:
-                            i = 0
-                            pages = []
+                    i = 0
+                    pages = []
                     for j, chart in enumerate(load[airport[:4].upper()]):
                         url = load[airport[:4].upper()][j]["pdf_path"]
-                        async with aiohttp.ClientSession() as cs:
-                            async with cs.get(url) as r:
-                                chart_data = await r.content.read()
-                        chart_file = io.BytesIO(chart_data)
-                        doc = fitz.open("pdf", chart_file)  # type: ignore
-                        for page in doc:
-                            pix = page.get_pixmap(dpi=150)
-                            img_data = pix.pil_tobytes(format="JPEG", optimize=True)
+                        for img_data in await self.charts.pages(url):
                             chart_img = io.BytesIO(img_data)
                             dfile = discord.File(chart_img, filename=f"chart{i}.jpg")
                             pages.append(
@@ -255,7 +334,7 @@ Dew point:     **{na('dewp')}** °C
                 await ctx.respond(embed=embed)
         if chart == "Airport Diagram":
             if airport[:4].upper().startswith(("K", "P", "0")):
-                async with aiohttp.ClientSession() as cs:
+                async with aiohttp.ClientSession(trace_configs=TRACE_CONFIGS) as cs:
                     async with cs.get(
                         f"https://api.aviationapi.com/v1/charts?apt={airport[:4].upper()}&group=2"
                     ) as r:
@@ -271,14 +350,7 @@ Dew point:     **{na('dewp')}** °C
                 else:
                     url = load[airport[:4].upper()][0]["pdf_path"]
                     dfile = None
-                    async with aiohttp.ClientSession() as cs:
-                        async with cs.get(url) as r:
-                            chart_data = await r.content.read()
-                            chart_file = io.BytesIO(chart_data)
-                            doc = fitz.open("pdf", chart_file)  # type: ignore
-                    for i, page in enumerate(doc):
-                        pix = page.get_pixmap(dpi=150)
-                        img_data = pix.pil_tobytes(format="JPEG", optimize=True)
+                    for img_data in await self.charts.pages(url):
                         chart_img = io.BytesIO(img_data)
                         dfile = discord.File(chart_img, filename=f"apd.jpg")
                     embed = discord.Embed(
@@ -302,7 +374,7 @@ Dew point:     **{na('dewp')}** °C
         autocomplete=get_airports,
     )
     async def airport_info(self, ctx: discord.ApplicationContext, airport: str):
-        async with aiohttp.ClientSession() as cs:
+        async with aiohttp.ClientSession(trace_configs=TRACE_CONFIGS) as cs:
             async with cs.get(
                 f"https://airportdb.io/api/v1/airport/{airport[:4].upper()}?apiToken={os.getenv('ADB_TOKEN')}"
             ) as resp:
@@ -473,10 +545,10 @@ Elevation: **{elev[0]}**ft / **{elev[1]}**ft
     async def active_runways(self, ctx: discord.ApplicationContext, airport: str):
         await ctx.defer()
         icao = airport[:4].upper()
-        async with aiohttp.ClientSession() as cs:
+        async with aiohttp.ClientSession(trace_configs=TRACE_CONFIGS) as cs:
             async with cs.get(f"https://aviationweather.gov/api/data/metar?ids={icao}&format=json&taf=false") as resp:
                 metar_data = await resp.json()
-        async with aiohttp.ClientSession() as cs:
+        async with aiohttp.ClientSession(trace_configs=TRACE_CONFIGS) as cs:
             async with cs.get(
                 f"https://airportdb.io/api/v1/airport/{icao}?apiToken={os.getenv('ADB_TOKEN')}"
             ) as resp:
@@ -1,4 +1,5 @@
 import datetime
+import io
 import platform
 import subprocess
 import aiohttp
@@ -14,6 +15,8 @@ from discord.ext.pages import Page, Paginator
 
 from main import roles
 from bot import ClearBot, DB
+from metrics import TRACE_CONFIGS, timed_execute
+from profiler import MAX_SECONDS, capture
 
 
 async def getattrs(ctx):
@@ -64,7 +67,7 @@ class LocalStatusStatsView(discord.ui.View):
             )
             return
 
-        async with aiohttp.ClientSession() as cs:
+        async with aiohttp.ClientSession(trace_configs=TRACE_CONFIGS) as cs:
             async with cs.get(
                 "https://local-status.vercel.app/api/fetch?name=rpi-stats"
             ) as resp:
@@ -257,7 +260,9 @@ Reloaded cogs:
 
     async def get_datarefs(self, ctx: discord.AutocompleteContext):
         async with aiosqlite.connect(DB["main"]) as db:
-            cursor = await db.execute("SELECT path FROM datarefs")
+            cursor = await timed_execute(
+                db, "datarefs.select", "SELECT path FROM datarefs"
+            )
             rows = await cursor.fetchall()
             datarefList1 = [row[0] for row in rows]
         with open("dev/aircraft/defaultDatarefsCommands.json") as f:
@@ -271,7 +276,9 @@ Reloaded cogs:
         global customDatarefList
         customDatarefList = []
         async with aiosqlite.connect(DB["main"]) as db:
-            cursor = await db.execute("SELECT path FROM datarefs")
+            cursor = await timed_execute(
+                db, "datarefs.select", "SELECT path FROM datarefs"
+            )
             rows = await cursor.fetchall()
             customDatarefList = [row[0] for row in rows]
         return [dataref for dataref in customDatarefList if ctx.value in dataref]
@@ -522,7 +529,9 @@ Reloaded cogs:
     async def dreflist(self, ctx: discord.ApplicationContext):
         await ctx.defer()
         async with aiosqlite.connect(DB["main"]) as db:
-            cursor = await db.execute("SELECT path FROM datarefs")
+            cursor = await timed_execute(
+                db, "datarefs.select", "SELECT path FROM datarefs"
+            )
             rows = await cursor.fetchall()
             drefs = [row[0] for row in rows]
         var = 0
@@ -568,8 +577,11 @@ Reloaded cogs:
         if dataref in datarefList:
             if dataref.startswith("ClearFly"):
                 async with aiosqlite.connect(DB["main"]) as db:
-                    dref = await db.execute(
-                        "SELECT * FROM datarefs WHERE path = ?", (dataref,)
+                    dref = await timed_execute(
+                        db,
+                        "datarefs.select",
+                        "SELECT * FROM datarefs WHERE path = ?",
+                        (dataref,),
                     )
                     dref = await dref.fetchone()
                     if not dref:
@@ -656,7 +668,9 @@ Description :
                     "description": description,
                 }
                 cur = await db.cursor()
-                await cur.execute(
+                await timed_execute(
+                    cur,
+                    "datarefs.insert",
                     "INSERT INTO datarefs (path, type, unit, description) VALUES (:path, :type, :unit, :description)",
                     newdref,
                 )
@@ -717,8 +731,11 @@ Description :
         if dataref in customDatarefList:
             await ctx.defer()
             async with aiosqlite.connect(DB["main"]) as db:
-                old_dref = await db.execute(
-                    "SELECT * FROM datarefs WHERE path = ?", (dataref,)
+                old_dref = await timed_execute(
+                    db,
+                    "datarefs.select",
+                    "SELECT * FROM datarefs WHERE path = ?",
+                    (dataref,),
                 )
                 old_dref = await old_dref.fetchone()
                 if not old_dref:
@@ -734,7 +751,9 @@ Description :
             }
             async with aiosqlite.connect(DB["main"]) as db:
                 cursor = await db.cursor()
-                await cursor.execute(
+                await timed_execute(
+                    cursor,
+                    "datarefs.update",
                     "UPDATE datarefs SET path=:path, type=:type, unit=:unit, description=:description WHERE path=:old_path",
                     newDref,
                 )
@@ -768,7 +787,12 @@ Description :
         if dataref in customDatarefList:
             async with aiosqlite.connect(DB["main"]) as db:
                 cursor = await db.cursor()
-                await cursor.execute("DELETE FROM datarefs WHERE path=?", (dataref,))
+                await timed_execute(
+                    cursor,
+                    "datarefs.delete",
+                    "DELETE FROM datarefs WHERE path=?",
+                    (dataref,),
+                )
                 await db.commit()
             embed = discord.Embed(
                 title=f"Dataref `{dataref}` successfully deleted.",
@@ -904,6 +928,83 @@ Channel: {sendable.mention if sendable else 'N/A' }
 
             await ctx.respond(embed=embed)
 
+    @dev.command(name="perf", description="⏱️ Show the slowest commands.")
+    @commands.has_role(roles.get("admin", 0))
+    async def perf(self, ctx: discord.ApplicationContext):
+        slowest = self.bot.command_timings.slowest()
+        if not slowest:
+            embed = discord.Embed(
+                title="No commands timed yet",
+                colour=self.bot.color(1),
+            )
+            await ctx.respond(embed=embed, ephemeral=True)
+            return
+
+        ms = lambda seconds: f"{round(seconds*1000)}ms"
+        rows = [
+            f"{s.name[:24]:<24} {s.count:>5} {s.errors:>4} {ms(s.p50):>7} {ms(s.p95):>7} {ms(s.p99):>7} {ms(s.respond_p95) if s.respond_p95 is not None else '-':>7}"
+            for s in slowest
+        ]
+        embed = discord.Embed(
+            title="Slowest commands",
+            description=f"""
+```
+{'command':<24} {'runs':>5} {'errs':>4} {'p50':>7} {'p95':>7} {'p99':>7} {'resp95':>7}
+{chr(10).join(rows)}
+```
+            """,
+            colour=self.bot.color(),
+        )
+        embed.set_footer(
+            text="Last 24h, up to 256 runs per command. resp95 is the p95 time from defer to the first response."
+        )
+        await ctx.respond(embed=embed, ephemeral=True)
+
+    @dev.command(name="profile", description="🔬 Profile the running bot.")
+    @option(
+        "seconds",
+        description="How long to profile for.",
+        min_value=1,
+        max_value=MAX_SECONDS,
+        default=10,
+    )
+    @option(
+        "mode",
+        description="Sampling is cheap enough for peak load, cProfile sees every call.",
+        choices=["sampling", "cprofile"],
+        default="sampling",
+    )
+    @option(
+        "memory",
+        description="Also diff memory allocations over the capture.",
+        default=False,
+    )
+    @commands.is_owner()
+    async def profile(
+        self, ctx: discord.ApplicationContext, seconds: int, mode: str, memory: bool
+    ):
+        await ctx.defer(ephemeral=True)
+        try:
+            files = await capture(seconds, mode, memory)
+        except ValueError as e:
+            embed = discord.Embed(title=str(e), colour=self.bot.color(1))
+            await ctx.respond(embed=embed, ephemeral=True)
+            return
+
+        embed = discord.Embed(
+            title=f"Profiled for {seconds}s ({mode})",
+            description=f"```\n{files['summary.txt'][:3900]}\n```",
+            colour=self.bot.color(),
+        )
+        await ctx.respond(
+            embed=embed,
+            files=[
+                discord.File(io.BytesIO(text.encode()), filename=name)
+                for name, text in files.items()
+            ],
+            ephemeral=True,
+        )
+
     @dev.command(description="🔦 Execute an SQL Query.")
     @discord.option(
         name="database",
@@ -915,7 +1016,7 @@ Channel: {sendable.mention if sendable else 'N/A' }
     async def query(self, ctx: discord.ApplicationContext, database: str, query: str):
         try:
             async with aiosqlite.connect(database) as db:
-                o = await db.execute(query)
+                o = await timed_execute(db, "dev.query", query)
                 await db.commit()
                 await ctx.respond(
                     f"Success!\n\n```{await o.fetchall()}```", ephemeral=True
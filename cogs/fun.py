@@ -6,15 +6,14 @@ from discord.ui.item import Item
 import pyfiglet
 import random
 import textwrap
-import flag
 import time
 from dadjokes import Dadjoke
 from discord import option
 from discord.ext import commands
-from pilmoji import Pilmoji
-from wonderwords import RandomSentence
-from PIL import Image, ImageDraw, ImageFont
+from PIL import Image
 from main import ClearBot
+from flaggame import new_game
+from rendering import FlagGameJob, MemeJob, QuoteJob, filename
 
 
 class ButtonGameView(discord.ui.View):
@@ -321,37 +320,18 @@ class FunCommands(discord.Cog):
     @commands.cooldown(1, 5, commands.BucketType.user)
     async def quote(self, ctx: discord.ApplicationContext, message: discord.Message):
         await ctx.defer()
-        data = await message.author.display_avatar.read()
-        avatarorigin = Image.open(io.BytesIO(data))
-        avatar = avatarorigin.resize((1024, 1024))
-        qclear = Image.open("ui/images/quote/quote.png")
-        qavmask = Image.open("ui/images/quote/AVMask.png")
-        img = Image.new("RGBA", (2048, 1024), 0)
-        img.paste(avatar, qavmask)  # type: ignore
-        img.paste(qclear, mask=qclear)
-        font = ImageFont.truetype(
-            "ui/fonts/Inter-Regular.ttf",
-            size=100,
-            layout_engine=ImageFont.Layout.BASIC,
-        )
-        text = f"{textwrap.fill(message.clean_content, 22, max_lines=6)}"
-        author = f"- {message.author.name}"
-        with Pilmoji(img) as pilmoji:
-            pilmoji.text((950, 100), text, font=font, emoji_position_offset=(0, 20))
-            pilmoji.text(
-                (1000, 824),
-                author,
-                font=font,
-                fill=(130, 130, 130),
-                emoji_position_offset=(0, 20),
-            )
-
-        with io.BytesIO() as output:
-            img.save(output, format="PNG")
-            output.seek(0)
-            await ctx.respond(
-                file=discord.File(output, filename=f"qoute{message.id}.png")
+        avatar_key, avatar = await self.bot.avatars.read(message.author.display_avatar)
+        data = await self.bot.renderer.render(
+            QuoteJob(
+                avatar_key=avatar_key,
+                avatar=avatar,
+                text=message.clean_content,
+                author=f"- {message.author.name}",
             )
+        )
+        await ctx.respond(
+            file=discord.File(io.BytesIO(data), filename=filename(QuoteJob, f"qoute{message.id}"))
+        )
 
     @fun.command(
         name="flag-game",
@@ -365,77 +345,13 @@ class FunCommands(discord.Cog):
     @commands.cooldown(1, 10, commands.BucketType.user)
     async def flagsgame(self, ctx: discord.ApplicationContext, difficulty: str):
         await ctx.defer()
-        fileName = "flaggame" + str(random.randint(0, 100)) + ".png"
-
-        s = RandomSentence()
-
-        match difficulty:
-            case "Very Easy":
-                oldText = s.simple_sentence()
-            case "Easy":
-                oldText = s.simple_sentence()
-            case "Normal":
-                oldText = s.bare_bone_with_adjective()
-            case "Hard":
-                oldText = s.sentence()
-            case "Very Hard":
-                oldText = s.sentence()
-            case _:
-                oldText = s.simple_sentence()
-
-        def flag_gen(
-            text: str,
-            difficulty: str,
-        ) -> str:
-            match difficulty:
-                case "Very Easy":
-                    diff = "countrycodes_veasy.txt"
-                case "Easy":
-                    diff = "countrycodes_easy.txt"
-                case "Normal":
-                    diff = "countrycodes_normal.txt"
-                case "Hard":
-                    diff = "countrycodes_hard.txt"
-                case "Very Hard":
-                    diff = "countrycodes_vhard.txt"
-                case _:
-                    diff = "countrycodes_veasy.txt"
-
-            with open(f"ccodes/{diff}", "r") as f:
-                ccodes = f.readlines()
-
-            conv_text = text
-
-            for ccode in ccodes:
-                conv_text = conv_text.replace(
-                    ccode.lower()[:2], flag.flag(ccode.upper())
-                )
+        fileName = filename(FlagGameJob, f"flaggame{ctx.interaction.id}")
 
-            if conv_text == text:
-                try:
-                    return flag_gen(text, difficulty)
-                except:
-                    return "S🇴🇲🇪🇹h🇮🇳g went w🇷🇴🇳🇬..."
-            else:
-                return conv_text
-
-        newText = flag_gen(oldText, difficulty)
+        oldText, newText = new_game(difficulty)
         newText = textwrap.fill(newText, 28, max_lines=2)
 
-        with Image.new("RGBA", (2048, 512)) as image:
-            font = ImageFont.truetype("ui/fonts/Inter-Regular.ttf", 144)
-            with Pilmoji(image) as pilmoji:
-                pilmoji.text(
-                    (10, 10),
-                    newText,
-                    (255, 255, 255),
-                    font,
-                    emoji_position_offset=(0, 20),
-                )
-            with io.BytesIO() as output:
-                image.save(output, format="PNG")
-                output.seek(0)
-                file = discord.File(output, filename=fileName)
+        data = await self.bot.renderer.render(FlagGameJob(newText))
+        file = discord.File(io.BytesIO(data), filename=fileName)
 
         embed = discord.Embed(
             title="Guess the sentence!",
@@ -590,7 +506,6 @@ class FunCommands(discord.Cog):
             return
 
         meme_id_n = random.randint(10, 99)
-        meme_id = f"meme{meme_id_n}.png"
         img_data = await image.read()
         img = Image.open(io.BytesIO(img_data))
         resolution = img.size
@@ -604,184 +519,17 @@ class FunCommands(discord.Cog):
             return
         if text_size is None:
             text_size = round(resolution[0] * 0.06)
-        font = ImageFont.truetype("ui/fonts/Anton-Regular.ttf", size=text_size)
-        font_bars = ImageFont.truetype("ui/fonts/Lato-Bold.ttf", size=text_size)
-        border_offset = round(text_size / 25)
-        if top_text != None:
-            with Pilmoji(img) as pilmoji:
-                if bars:
-                    draw = ImageDraw.ImageDraw(img)
-                    draw.rectangle(
-                        ((0, 0), (resolution[0], round(resolution[1] / 6))),
-                        fill=(255, 255, 255),
-                    )
-                    pilmoji.text(
-                        (
-                            round(resolution[0] / 2)
-                            - (round(font_bars.getlength(top_text) / 2)),
-                            round(resolution[1] / 47),
-                        ),
-                        textwrap.fill(top_text, 25, max_lines=2),
-                        font=font_bars,
-                        fill=(0, 0, 0),
-                        emoji_position_offset=(0, 20),
-                        align="center",
-                    )
-                else:
-                    pilmoji.text(
-                        (
-                            round(resolution[0] / 2)
-                            + border_offset
-                            - round(font.getlength(top_text.upper()) / 2),
-                            round(resolution[1] / 40) + border_offset,
-                        ),
-                        textwrap.fill(top_text.upper(), 25, max_lines=2),
-                        font=font,
-                        emoji_position_offset=(0 - border_offset, 20 - border_offset),
-                        fill=(0, 0, 0),
-                        align="center",
-                    )
-                    pilmoji.text(
-                        (
-                            round(resolution[0] / 2)
-                            - border_offset
-                            - round(font.getlength(top_text.upper()) / 2),
-                            round(resolution[1] / 40) - border_offset,
-                        ),
-                        textwrap.fill(top_text.upper(), 25, max_lines=2),
-                        font=font,
-                        emoji_position_offset=(border_offset, 20 + border_offset),
-                        fill=(0, 0, 0),
-                        align="center",
-                    )
-                    pilmoji.text(
-                        (
-                            round(resolution[0] / 2)
-                            + border_offset
-                            - round(font.getlength(top_text.upper()) / 2),
-                            round(resolution[1] / 40) - border_offset,
-                        ),
-                        textwrap.fill(top_text.upper(), 25, max_lines=2),
-                        font=font,
-                        emoji_position_offset=(0 - border_offset, 20 + border_offset),
-                        fill=(0, 0, 0),
-                        align="center",
-                    )
-                    pilmoji.text(
-                        (
-                            round(resolution[0] / 2)
-                            - border_offset
-                            - round(font.getlength(top_text.upper()) / 2),
-                            round(resolution[1] / 40) + border_offset,
-                        ),
-                        textwrap.fill(top_text.upper(), 25, max_lines=2),
-                        font=font,
-                        emoji_position_offset=(border_offset, 20 - border_offset),
-                        fill=(0, 0, 0),
-                        align="center",
-                    )
-                    pilmoji.text(
-                        (
-                            round(resolution[0] / 2)
-                            - round(font.getlength(top_text.upper()) / 2),
-                            round(resolution[1] / 40),
-                        ),
-                        textwrap.fill(top_text.upper(), 25, max_lines=2),
-                        font=font,
-                        emoji_position_offset=(0, 20),
-                        align="center",
-                    )
-        if bottom_text != None:
-            with Pilmoji(img) as pilmoji:
-                if bars:
-                    draw = ImageDraw.ImageDraw(img)
-                    draw.rectangle(
-                        (
-                            (0, round(resolution[1] - resolution[1] / 6)),
-                            (resolution[0], resolution[1]),
-                        ),
-                        fill=(255, 255, 255),
-                    )
-                    pilmoji.text(
-                        (
-                            round(resolution[0] / 2)
-                            - round(font_bars.getlength(bottom_text) / 2),
-                            round(resolution[1] - resolution[1] / 7),
-                        ),
-                        textwrap.fill(bottom_text, 25, max_lines=2),
-                        font=font_bars,
-                        fill=(0, 0, 0),
-                        emoji_position_offset=(0, 20),
-                        align="center",
-                    )
-                else:
-                    pilmoji.text(
-                        (
-                            round(resolution[0] / 2)
-                            + border_offset
-                            - round(font.getlength(bottom_text.upper()) / 2),
-                            round(resolution[1] - resolution[1] / 5) + border_offset,
-                        ),
-                        textwrap.fill(bottom_text.upper(), 25, max_lines=2),
-                        font=font,
-                        emoji_position_offset=(0 - border_offset, 20 - border_offset),
-                        fill=(0, 0, 0),
-                        align="center",
-                    )
-                    pilmoji.text(
-                        (
-                            round(resolution[0] / 2)
-                            - border_offset
-                            - round(font.getlength(bottom_text.upper()) / 2),
-                            round(resolution[1] - resolution[1] / 5) - border_offset,
-                        ),
-                        textwrap.fill(bottom_text.upper(), 30, max_lines=3),
-                        font=font,
-                        emoji_position_offset=(border_offset, 20 + border_offset),
-                        fill=(0, 0, 0),
-                        align="center",
-                    )
-                    pilmoji.text(
-                        (
-                            round(resolution[0] / 2)
-                            + border_offset
-                            - round(font.getlength(bottom_text.upper()) / 2),
-                            round(resolution[1] - resolution[1] / 5) - border_offset,
-                        ),
-                        textwrap.fill(bottom_text.upper(), 25, max_lines=2),
-                        font=font,
-                        emoji_position_offset=(0 - border_offset, 20 + border_offset),
-                        fill=(0, 0, 0),
-                        align="center",
-                    )
-                    pilmoji.text(
-                        (
-                            round(resolution[0] / 2)
-                            - border_offset
-                            - round(font.getlength(bottom_text.upper()) / 2),
-                            round(resolution[1] - resolution[1] / 5) + border_offset,
-                        ),
-                        textwrap.fill(bottom_text.upper(), 25, max_lines=2),
-                        font=font,
-                        emoji_position_offset=(border_offset, 20 - border_offset),
-                        fill=(0, 0, 0),
-                        align="center",
-                    )
-                    pilmoji.text(
-                        (
-                            round(resolution[0] / 2)
-                            - round(font.getlength(bottom_text.upper()) / 2),
-                            round(resolution[1] - resolution[1] / 5),
-                        ),
-                        textwrap.fill(bottom_text.upper(), 25, max_lines=2),
-                        font=font,
-                        emoji_position_offset=(0, 20),
-                        align="center",
-                    )
-        with io.BytesIO() as output:
-            img.save(output, format="PNG")
-            output.seek(0)
-            file = discord.File(output, filename=meme_id)
+        data = await self.bot.renderer.render(
+            MemeJob(
+                image=img_data,
+                top_text=top_text,
+                bottom_text=bottom_text,
+                text_size=text_size,
+                bars=bars,
+            )
+        )
+        meme_id = filename(MemeJob, f"meme{meme_id_n}", data)
+        file = discord.File(io.BytesIO(data), filename=meme_id)
 
         embed = (
             discord.Embed(
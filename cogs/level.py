@@ -1,117 +1,66 @@
 import io
-import os
 import discord
-import re
 import aiosqlite
-from pilmoji import Pilmoji
 from numerize import numerize as n
-from PIL import Image, ImageDraw, ImageFont
 from discord import option
 from discord.ext import commands
 
 from bot import ClearBot, DB
+from metrics import metrics
+from rendering import LeaderboardJob, LevelCardJob, filename
 
 
 class LevelingCommands(discord.Cog):
     def __init__(self, bot: ClearBot):
         self.bot = bot
+        self.bot.leaderboards.register("level", self.lb_rows, self.lb_job)
 
-    def userlevel_color(self, c: int = 0) -> tuple[int, int, int]:
-        colors = {
-            0: {0: (9, 57, 97), 1: (38, 129, 180)},
-            1: {0: (253, 133, 45), 1: (254, 179, 45)},
-            2: {0: (119, 0, 18), 1: (0, 166, 40)},
-        }
-
-        return colors[self.bot.theme][c]
-    
+    def cog_unload(self):
+        self.bot.leaderboards.unregister("level")
 
     async def generate_image(self, user: discord.User | discord.Member) -> tuple[int, discord.File | None]:
         fail = (False, None)
-        async with aiosqlite.connect(DB["main"]) as db:
-            usrdata = await db.execute(
-                "SELECT * FROM leveling WHERE author_id=?", (str(user.id),)
-            )
-            usrdata = await usrdata.fetchone()
-            if not usrdata:
-                return fail
+        with metrics.timed(metrics.db, "leveling.select"):
+            async with aiosqlite.connect(DB["main"]) as db:
+                usrdata = await db.execute(
+                    "SELECT * FROM leveling WHERE author_id=?", (str(user.id),)
+                )
+                usrdata = await usrdata.fetchone()
+                if not usrdata:
+                    return fail
             
-            if len(usrdata) < 2:
-                return fail
-
-        x1, y1 = 860, 547
-        x2, y2 = 2740, 710
-        img = Image.open(os.path.join("ui", "images", "userlevel", str(self.bot.theme), "userlevel.png"))
-        avatar = Image.open(io.BytesIO(await user.display_avatar.read())).resize((1024, 1024))
-        lvlnom = usrdata[3]
-        lvl = usrdata[2]
-        lvldenom = usrdata[4]
-        h, w = avatar.size
-        avmask = Image.new("L", (h, w), 0)
-        clear = Image.new("RGBA", (h, w), 1)
-        draw = ImageDraw.Draw(avmask)
-        draw.ellipse((0, 0, h, w), fill=255)
-        masked = Image.composite(avatar, clear, mask=avmask)
-        font = ImageFont.truetype(
-            os.path.join("ui", "fonts", "Inter-Regular.ttf"),
-            size=100,
-            layout_engine=ImageFont.Layout.BASIC,
+                if len(usrdata) < 2:
+                    return fail
+
+        name = filename(LevelCardJob, "userlevel")
+        key = (
+            str(user.id),
+            usrdata[2],
+            usrdata[3],
+            usrdata[4],
+            user.display_avatar.key,
+            str(user.name),
+            self.bot.theme,
+            name,
         )
-        fontbig = ImageFont.truetype(
-            os.path.join("ui", "fonts", "Inter-Regular.ttf"),
-            size=150,
-            layout_engine=ImageFont.Layout.BASIC,
-        )
-        img.paste(
-            masked.resize((612, 612)), (49, 82), mask=masked.resize((612, 612))
-        )
-        with Pilmoji(img) as pilmoji:
-            pilmoji.text(
-                (860, 120), str(user.name), fill=(255, 255, 255), font=fontbig
-            )
-            pilmoji.text(
-                (900, 380),
-                f"LVL: {n.numerize(int(lvl))}",
-                fill=(255, 255, 255),
-                font=font,
-                emoji_position_offset=(0, 10),
-            )
-            x3, y3 = x1, y1
-            x4, y4 = x1 + ((x2 - x1) * (int(lvlnom) / int(lvldenom))), y2
-            pilmoji.text(
-                (2000, 380),
-                f"XP: {n.numerize(int(lvlnom))} / {n.numerize(int(lvldenom))}",
-                fill=(255, 255, 255),
-                font=font,
-                emoji_position_offset=(0, 10),
+        data = await self.bot.level_cards.get(key)
+        if data is None:
+            avatar_key, avatar = await self.bot.avatars.read(user.display_avatar)
+            data = await self.bot.renderer.render(
+                LevelCardJob(
+                    theme=self.bot.theme,
+                    name=str(user.name),
+                    level=usrdata[2],
+                    nom=usrdata[3],
+                    denom=usrdata[4],
+                    avatar_key=avatar_key,
+                    avatar=avatar,
+                )
             )
-        bar = Image.new("RGBA", img.size, 1)
-        draw = ImageDraw.ImageDraw(bar)
-        draw.ellipse(
-            (x1 - ((y2 - y1) / 2), y1, x1 + ((y2 - y1) / 2), y2),
-            fill=self.userlevel_color(0),
-        )
-        draw.ellipse(
-            (x2 - ((y2 - y1) / 2), y1, x2 + ((y2 - y1) / 2), y2),
-            fill=self.userlevel_color(0),
-        )
-        draw.rectangle((x1, y1, x2, y2), fill=self.userlevel_color(0))
-        draw.rectangle((x3, y3, x4, y4), fill=self.userlevel_color(1))
-        draw.ellipse(
-            (x1 - ((y2 - y1) / 2), y1, x1 + ((y2 - y1) / 2), y2),
-            fill=self.userlevel_color(1),
-        )
-        draw.ellipse(
-            (x4 - ((y2 - y1) / 2), y1, x4 + ((y2 - y1) / 2), y4),
-            fill=self.userlevel_color(1),
-        )
-        img.paste(bar, mask=bar)
-        with io.BytesIO() as output:
-            img.save(output, format="PNG")
-            output.seek(0)
-            file = discord.File(output, filename="userlevel.png")
-        
-            return (True, file)
+            await self.bot.level_cards.set(key, data)
+        file = discord.File(io.BytesIO(data), filename=name)
+
+        return (True, file)
         
     leveling = discord.SlashCommandGroup(
         name="level", description="🏆 Commands related to the leveling system."
@@ -162,7 +111,7 @@ class LevelingCommands(discord.Cog):
             return
 
         embed = discord.Embed(color=self.bot.color())
-        embed.set_image(url=f"attachment://userlevel.png")
+        embed.set_image(url=f"attachment://{result[1].filename}")
         await ctx.respond(embed=embed, file=result[1])
 
     @discord.user_command(
@@ -201,7 +150,7 @@ class LevelingCommands(discord.Cog):
             return
 
         embed = discord.Embed(color=self.bot.color())
-        embed.set_image(url=f"attachment://userlevel.png")
+        embed.set_image(url=f"attachment://{result[1].filename}")
         await ctx.respond(embed=embed, file=result[1])
 
     @leveling.command(
@@ -210,77 +159,34 @@ class LevelingCommands(discord.Cog):
     @commands.cooldown(1, 5, commands.BucketType.user)
     async def lb(self, ctx: discord.ApplicationContext):
         await ctx.defer()
-        output = []
-        nameoutput = []
-        img = Image.open(f"ui/images/leaderboard/{self.bot.theme}/lb.png")
-        async with aiosqlite.connect(DB["main"]) as db:
-            sel = await db.execute("SELECT * FROM leveling")
-            fetsel = await sel.fetchall()
-            for usr in fetsel:
-                lvl = usr[2]
-                lvlnom = usr[3]
-                lvldenom = usr[4]
-                user = await self.bot.fetch_user(int(usr[1]))
-                line = f"""
-        {lvlnom+lvldenom*lvl} LVL: {lvl} XP: {lvlnom}/{n.numerize(lvldenom)}\n
-            """
-                output.append(line)
-                line2 = f"""
-            {lvlnom+lvldenom*lvl} {user.name}\n
-        """
-                nameoutput.append(line2)
-
-            def atoi(text):
-                return int(text) if text.isdigit() else text
-
-            def natural_keys(text):
-                return [atoi(c) for c in re.split(r"(\d+)", text)]
-
-            output.sort(key=natural_keys, reverse=True)
-            nameoutput.sort(key=natural_keys, reverse=True)
-
-            def delstr(lst):
-                return [f"{' '.join(elem.split()[1:]).rstrip()}" for elem in lst]
-
-            output = delstr(output)
-            nameoutput = delstr(nameoutput)
-
-            nameoutput = [f"{index}       {i}" for index, i in enumerate(nameoutput, 1)]
-            output = [direction + "\n\n" for direction in output]
-            nameoutput = [direction + "\n\n" for direction in nameoutput]
-            embed = discord.Embed(
-                title="ClearFly Level Leaderboard",
-                description=f"""
+        embed = discord.Embed(
+            title="ClearFly Level Leaderboard",
+            description=f"""
 Chat to earn xp!
                 """,
-                color=self.bot.color(),
-            )
-            font = ImageFont.truetype(
-                "ui/fonts/Inter-Regular.ttf",
-                size=43,
-                layout_engine=ImageFont.Layout.BASIC,
-            )
-            with Pilmoji(img) as pilmoji:
-                pilmoji.text(
-                    (800, 30),
-                    "".join(output[:10]),
-                    fill=(255, 255, 255),
-                    font=font,
-                    emoji_position_offset=(0, 20),
-                )
-                pilmoji.text(
-                    (27, 30),
-                    "".join(nameoutput[:10]),
-                    fill=(255, 255, 255),
-                    font=font,
-                    emoji_position_offset=(0, 20),
+            color=self.bot.color(),
+        )
+        data = await self.bot.leaderboards.get("level")
+        file = discord.File(io.BytesIO(data), filename=filename(LeaderboardJob, "lb"))
+        embed.set_image(url=f"attachment://{file.filename}")
+        await ctx.respond(embed=embed, file=file)
+
+    async def lb_rows(self) -> list[tuple]:
+        with metrics.timed(metrics.db, "leveling.top"):
+            async with aiosqlite.connect(DB["main"]) as db:
+                # Only the top 10 are drawn, so only look those users up.
+                sel = await db.execute(
+                    "SELECT author_id, level, nom, denom FROM leveling ORDER BY nom + denom * level DESC, rowid LIMIT 10"
                 )
-            with io.BytesIO() as output:
-                img.save(output, format="PNG")
-                output.seek(0)
-                file = discord.File(output, filename="lb.png")
-            embed.set_image(url=f"attachment://lb.png")
-            await ctx.respond(embed=embed, file=file)
+                return list(await sel.fetchall())
+
+    async def lb_job(self, top: list[tuple], theme: int) -> LeaderboardJob:
+        output = [f"LVL: {usr[1]} XP: {usr[2]}/{n.numerize(usr[3])}" for usr in top]
+        nameoutput = [
+            f"{index}       {self.bot.user_object(await self.bot.get_or_fetch_user(int(usr[0]))).name}"
+            for index, usr in enumerate(top, 1)
+        ]
+        return LeaderboardJob(theme=theme, names=nameoutput, values=output)
 
 
 def setup(bot):
@@ -1,17 +1,19 @@
 import asyncio
 import re
-import aiofiles
 import aiohttp
 import discord
-import os
 import random
 import aiosqlite
-import feedparser
 import time
 import datetime
-from http.client import RemoteDisconnected
 from discord.ext import commands, tasks
 from bot import ClearBot, DB
+from cache import LRUCache
+from feeds import FeedPoller
+from metrics import TRACE_CONFIGS, metrics, timed_execute
+from scamfilter import ScamFilter
+from logqueue import DetachedView
+from payloads import LogPayloads, parse_custom_id, payload_button
 
 class DeleteMsgView(discord.ui.View):
     def __init__(self, bot: ClearBot, auth):
@@ -40,20 +42,61 @@ class DeleteMsgView(discord.ui.View):
             )
 
 
+def raw_view(payload_id: int) -> DetachedView:
+    return DetachedView(
+        payload_button(
+            "raw",
+            payload_id,
+            label="View Raw Contents",
+            style=discord.ButtonStyle.primary,
+        )
+    )
+
+
+def ban_view(payload_id: int, name: str) -> DetachedView:
+    return DetachedView(
+        payload_button(
+            "ban", payload_id, label=f"Ban {name}", style=discord.ButtonStyle.danger
+        )
+    )
+
+
 class Listeners(discord.Cog):
     def __init__(self, bot: ClearBot):
         self.bot = bot
+        self.snippets = LRUCache(max_items=256, max_bytes=1024 * 1024)
+        self.feeds = FeedPoller()
+        self.scams = ScamFilter()
+        self.payloads = LogPayloads()
+
+        # Checked once per message by the bot's dispatcher, before any handler runs.
+        self.bot.messages.register(
+            "levels",
+            self.levellisten,
+            when=lambda m: m.member
+            and not m.bot
+            and m.channel_id not in (966077223260004402, 965600413376200726),
+        )
+        self.bot.messages.register("scams", self.scamcheck, when=lambda m: m.member)
+        self.bot.messages.register(
+            "github_snippets",
+            self.github_snippet,
+            when=lambda m: m.has_url
+            and not m.bot
+            and "github.com" in m.message.content,
+        )
+
+    def cog_unload(self):
+        for name in ("levels", "scams", "github_snippets"):
+            self.bot.messages.unregister(name)
 
     @commands.Cog.listener()
     async def on_ready(self):
+        await self.scams.reload()
         if not self.presence.is_running():
             self.presence.start()
-        # if not self.rssfeedtres1.is_running() and not self.bot.dev_mode:
-        #     self.rssfeedtres1.start()
-        # if not self.rssfeedtres2.is_running() and not self.bot.dev_mode:
-        #     self.rssfeedtres2.start()
-        # if not self.rssfeedtres3.is_running() and not self.bot.dev_mode:
-        #     self.rssfeedtres3.start()
+        if not self.rss_feeds.is_running() and not self.bot.dev_mode:
+            self.rss_feeds.start()
         if not self.check_theme.is_running() and not self.bot.dev_mode:
             self.check_theme.start()
         if not self.join_stats_loop.is_running() and not self.bot.dev_mode:
@@ -121,199 +164,26 @@ class Listeners(discord.Cog):
         )
 
     @tasks.loop(minutes=5)
-    async def rssfeedtres1(self):
-        table = "RSS_thresholdx_news"
-        try:
-            channel = self.bot.sendable_channel(
-                self.bot.get_channel(self.bot.channels.get("news", 0))
-            )
-            blog_feed = feedparser.parse("https://www.thresholdx.net/news/rss.xml")
-            try:
-                feed = dict(blog_feed.entries[0])
-            except:
-                return
-            async with aiosqlite.connect(DB["main"]) as db:
-                curs = await db.cursor()
-                lastIDs = await curs.execute(f"SELECT lastID FROM {table}")
-                lastIDs = await lastIDs.fetchall()
-                if lastIDs:
-                    lastIDs = [lastID[0] for lastID in lastIDs]
-                else:
-                    return
-            if feed.get("id") in lastIDs:
-                return
-            else:
-                async with aiosqlite.connect(DB["main"]) as db:
-                    cursor = await db.cursor()
-                    if lastIDs:
-                        await cursor.execute(
-                            f"UPDATE {table} SET lastID=? WHERE id=1",
-                            (feed.get("id"),),
-                        )
-                        await cursor.execute(
-                            f"UPDATE {table} SET lastID=? WHERE id=2",
-                            (lastIDs[0],),
-                        )
-                        await cursor.execute(
-                            f"UPDATE {table} SET lastID=? WHERE id=3",
-                            (lastIDs[0],),
-                        )
-                    else:
-                        await cursor.execute(
-                            f"INSERT INTO {table} (lastID) VALUES (?)",
-                            (feed.get("id"),),
-                        )
-                        await cursor.execute(
-                            f"INSERT INTO {table} (lastID) VALUES (?)",
-                            ("NULL",),
-                        )
-                        await cursor.execute(
-                            f"INSERT INTO {table} (lastID) VALUES (?)",
-                            ("NULL",),
-                        )
-                    await db.commit()
-
-                if channel:
-                    await channel.send(
-                        f"""
-# {feed.get('title')}
-
-{feed.get('link')}
-                    """
-                    )
-        except Exception as e:
-            if isinstance(e, RemoteDisconnected):
-                pass
-            else:
-                raise
-
-    @tasks.loop(minutes=5)
-    async def rssfeedtres2(self):
-        table = "RSS_thresholdx_opinion"
-        try:
+    async def rss_feeds(self):
+        for feed, entry in await self.feeds.poll_all():
             channel = self.bot.sendable_channel(
-                self.bot.get_channel(self.bot.channels.get("news", 0))
+                self.bot.get_channel(self.bot.channels.get(feed[3], 0))
             )
-            blog_feed = feedparser.parse("https://www.thresholdx.net/opinion/rss.xml")
+            if not channel:
+                await self.feeds.post_failed(feed)
+                continue
             try:
-                feed = dict(blog_feed.entries[0])
-            except:
-                return
-            async with aiosqlite.connect(DB["main"]) as db:
-                curs = await db.cursor()
-                lastIDs = await curs.execute(f"SELECT lastID FROM {table}")
-                lastIDs = await lastIDs.fetchall()
-                if lastIDs:
-                    lastIDs = [lastID[0] for lastID in lastIDs]
-                else:
-                    return
-            if feed.get("id") in lastIDs:
-                return
-            else:
-                async with aiosqlite.connect(DB["main"]) as db:
-                    cursor = await db.cursor()
-                    if lastIDs:
-                        await cursor.execute(
-                            f"UPDATE {table} SET lastID=? WHERE id=1",
-                            (feed.get("id"),),
-                        )
-                        await cursor.execute(
-                            f"UPDATE {table} SET lastID=? WHERE id=2",
-                            (lastIDs[0],),
-                        )
-                    else:
-                        await cursor.execute(
-                            f"INSERT INTO {table} (lastID) VALUES (?)",
-                            (feed.get("id"),),
-                        )
-                        await cursor.execute(
-                            f"INSERT INTO {table} (lastID) VALUES (?)",
-                            ("NULL",),
-                        )
-                        await cursor.execute(
-                            f"INSERT INTO {table} (lastID) VALUES (?)",
-                            ("NULL",),
-                        )
-                    await db.commit()
-                if channel:
-                    await channel.send(
-                        f"""
-# {feed.get('title')}
-
-{feed.get('link')}
-                    """
-                    )
-        except Exception as e:
-            if isinstance(e, RemoteDisconnected):
-                pass
-            else:
-                raise
-
-    @tasks.loop(minutes=5)
-    async def rssfeedtres3(self):
-        table = "RSS_thresholdx_article"
-        try:
-            channel = self.bot.sendable_channel(
-                self.bot.get_channel(self.bot.channels.get("news", 0))
-            )
-            blog_feed = feedparser.parse("https://www.thresholdx.net/article/rss.xml")
-            try:
-                feed = dict(blog_feed.entries[0])
-            except:
-                return
-            async with aiosqlite.connect(DB["main"]) as db:
-                curs = await db.cursor()
-                lastIDs = await curs.execute(f"SELECT lastID FROM {table}")
-                lastIDs = await lastIDs.fetchall()
-                if lastIDs:
-                    lastIDs = [lastID[0] for lastID in lastIDs]
-                else:
-                    return
-            if feed.get("id") in lastIDs:
-                return
-            else:
-                async with aiosqlite.connect(DB["main"]) as db:
-                    cursor = await db.cursor()
-                    if lastIDs:
-                        await cursor.execute(
-                            f"UPDATE {table} SET lastID=? WHERE id=1",
-                            (feed.get("id"),),
-                        )
-                        await cursor.execute(
-                            f"UPDATE {table} SET lastID=? WHERE id=2",
-                            (lastIDs[0],),
-                        )
-                        await cursor.execute(
-                            f"UPDATE {table} SET lastID=? WHERE id=3",
-                            (lastIDs[1],),
-                        )
-                    else:
-                        await cursor.execute(
-                            f"INSERT INTO {table} (lastID) VALUES (?)",
-                            (feed.get("id"),),
-                        )
-                        await cursor.execute(
-                            f"INSERT INTO {table} (lastID) VALUES (?)",
-                            ("NULL",),
-                        )
-                        await cursor.execute(
-                            f"INSERT INTO {table} (lastID) VALUES (?)",
-                            ("NULL",),
-                        )
-                    await db.commit()
-                if channel:
-                    await channel.send(
-                        f"""
-# {feed.get('title')}
+                await channel.send(
+                    f"""
+# {entry.get('title')}
 
-{feed.get('link')}
+{entry.get('link')}
                     """
-                    )
-        except Exception as e:
-            if isinstance(e, RemoteDisconnected):
-                pass
-            else:
-                raise
+                )
+            except discord.HTTPException:
+                await self.feeds.post_failed(feed)
+                continue
+            await self.feeds.mark_posted(feed, entry)
 
     @tasks.loop(hours=12)
     async def check_theme(self):
@@ -329,12 +199,7 @@ class Listeners(discord.Cog):
                 description=f"Failed roles: {failed}",
                 color=self.bot.color(),
             )
-            channel = self.bot.sendable_channel(
-                self.bot.get_channel(self.bot.channels.get("logs", 0))
-            )
-
-            if channel:
-                await channel.send(embed=embed)
+            await self.bot.send_log(embed=embed)
         elif now.month == 12 and self.bot.theme != 2:
             result = await self.bot.set_theme("auto-theme", 2)
 
@@ -345,12 +210,7 @@ class Listeners(discord.Cog):
                 description=f"Failed roles: {failed}",
                 color=self.bot.color(),
             )
-            channel = self.bot.sendable_channel(
-                self.bot.get_channel(self.bot.channels.get("logs", 0))
-            )
-
-            if channel:
-                await channel.send(embed=embed)
+            await self.bot.send_log(embed=embed)
         elif self.bot.theme != 0 and now.month != 10 and now.month != 12:
             result = await self.bot.set_theme("auto-theme", 0)
 
@@ -361,47 +221,26 @@ class Listeners(discord.Cog):
                 description=f"Failed roles: {failed}",
                 color=self.bot.color(),
             )
-            channel = self.bot.sendable_channel(
-                self.bot.get_channel(self.bot.channels.get("logs", 0))
-            )
+            await self.bot.send_log(embed=embed)
 
-            if channel:
-                await channel.send(embed=embed)
-
-    @commands.Cog.listener("on_message")
     async def levellisten(self, message):
-        if isinstance(message.author, discord.User):
-            return
         nowlvlnom = 0
-        if message.channel.id == 966077223260004402:
-            return
-        if message.channel.id == 965600413376200726:
-            return
-        if message.author.bot:
-            return
-        else:
+        with metrics.timed(metrics.db, "leveling.select"):
             async with aiosqlite.connect(DB["main"]) as db:
-                sel = await db.execute("SELECT author_id FROM leveling")
-                rows = await sel.fetchall()
-                usrs = [row[0] for row in rows]
-            if str(message.author.id) in usrs:
-                usrdata = None
-                async with aiosqlite.connect(DB["main"]) as db:
-                    curs = await db.cursor()
-                    usrdata = await curs.execute(
-                        "SELECT * FROM leveling WHERE author_id=?",
-                        (str(message.author.id),),
-                    )
-                    usrdata = await usrdata.fetchone()
-                    if not usrdata:
-                        raise ValueError("Couldn't fetch data from database.")
-
-                belvlnom = usrdata[3]
-                last = usrdata[5]
-                now = round(time.time())
-                if (now - int(last)) < 5:
-                    return
-                else:
+                curs = await db.cursor()
+                usrdata = await curs.execute(
+                    "SELECT * FROM leveling WHERE author_id=?",
+                    (str(message.author.id),),
+                )
+                usrdata = await usrdata.fetchone()
+        if usrdata:
+            belvlnom = usrdata[3]
+            last = usrdata[5]
+            now = round(time.time())
+            if (now - int(last)) < 5:
+                return
+            else:
+                with metrics.timed(metrics.db, "leveling.touch"):
                     async with aiosqlite.connect(DB["main"]) as db:
                         cursor = await db.cursor()
                         await cursor.execute(
@@ -409,20 +248,21 @@ class Listeners(discord.Cog):
                             (now, str(message.author.id)),
                         )
                         await db.commit()
-                if len(message.content) == 0:
-                    nowlvlnom = int(belvlnom) + 1
-                if len(message.content) > 0:
-                    nowlvlnom = int(belvlnom) + 1
-                if len(message.content) > 10:
-                    nowlvlnom = int(belvlnom) + 2
-                if len(message.content) > 25:
-                    nowlvlnom = int(belvlnom) + 5
-                if len(message.content) > 50:
-                    nowlvlnom = int(belvlnom) + 7
-                if len(message.content) > 75:
-                    nowlvlnom = int(belvlnom) + 10
-                lvl = usrdata[2]
-                denom = usrdata[4]
+            if len(message.content) == 0:
+                nowlvlnom = int(belvlnom) + 1
+            if len(message.content) > 0:
+                nowlvlnom = int(belvlnom) + 1
+            if len(message.content) > 10:
+                nowlvlnom = int(belvlnom) + 2
+            if len(message.content) > 25:
+                nowlvlnom = int(belvlnom) + 5
+            if len(message.content) > 50:
+                nowlvlnom = int(belvlnom) + 7
+            if len(message.content) > 75:
+                nowlvlnom = int(belvlnom) + 10
+            lvl = usrdata[2]
+            denom = usrdata[4]
+            with metrics.timed(metrics.db, "leveling.update"):
                 async with aiosqlite.connect(DB["main"]) as db:
                     cursor = await db.cursor()
                     await cursor.execute(
@@ -430,58 +270,71 @@ class Listeners(discord.Cog):
                         (nowlvlnom, str(message.author.id)),
                     )
                     await db.commit()
-                if int(nowlvlnom) >= int(denom):
-                    async with aiosqlite.connect(DB["main"]) as db:
-                        cursor = await db.cursor()
-                        await cursor.execute(
-                            "UPDATE leveling SET nom=0, level=?, denom=? WHERE author_id=?",
-                            (
-                                lvl + 1,
-                                int(denom) + (int(lvl) * 20),
-                                str(message.author.id),
-                            ),
-                        )
-                        await db.commit()
-                    if int(lvl) == 0:
-                        lvl = 1
-                    async with aiosqlite.connect(DB["main"]) as db:
-                        curs = await db.cursor()
-                        usrdata = await curs.execute(
-                            "SELECT * FROM leveling WHERE author_id=?",
-                            (str(message.author.id),),
-                        )
-                        usrdata = await usrdata.fetchone()
-                        if not usrdata:
-                            raise ValueError("Couldn't fetch data from database.")
-
-                    lvlp = usrdata[2]
-                    await message.channel.send(
-                        f"{message.author.mention} :partying_face: You reached level {lvlp}!"
-                    )
-            else:
-                new_user = {
-                    "author_id": str(message.author.id),
-                    "level": 0,
-                    "nom": 1,
-                    "denom": 25,
-                    "last_msg": round(time.time()),
-                }
+            await self.bot.level_cards.invalidate(str(message.author.id))
+            self.bot.leaderboards.mark_dirty("level")
+            if int(nowlvlnom) >= int(denom):
                 async with aiosqlite.connect(DB["main"]) as db:
-                    cur = await db.cursor()
-                    await cur.execute(
-                        "INSERT INTO leveling (author_id, level, nom, denom, last_msg) VALUES (:author_id, :level, :nom, :denom, :last_msg)",
-                        new_user,
+                    cursor = await db.cursor()
+                    await timed_execute(
+                        cursor,
+                        "leveling.update",
+                        "UPDATE leveling SET nom=0, level=?, denom=? WHERE author_id=?",
+                        (
+                            lvl + 1,
+                            int(denom) + (int(lvl) * 20),
+                            str(message.author.id),
+                        ),
                     )
                     await db.commit()
+                if int(lvl) == 0:
+                    lvl = 1
+                async with aiosqlite.connect(DB["main"]) as db:
+                    curs = await db.cursor()
+                    usrdata = await timed_execute(
+                        curs,
+                        "leveling.select",
+                        "SELECT * FROM leveling WHERE author_id=?",
+                        (str(message.author.id),),
+                    )
+                    usrdata = await usrdata.fetchone()
+                    if not usrdata:
+                        raise ValueError("Couldn't fetch data from database.")
+
+                lvlp = usrdata[2]
+                await message.channel.send(
+                    f"{message.author.mention} :partying_face: You reached level {lvlp}!"
+                )
+        else:
+            new_user = {
+                "author_id": str(message.author.id),
+                "level": 0,
+                "nom": 1,
+                "denom": 25,
+                "last_msg": round(time.time()),
+            }
+            async with aiosqlite.connect(DB["main"]) as db:
+                cur = await db.cursor()
+                await timed_execute(
+                    cur,
+                    "leveling.insert",
+                    "INSERT INTO leveling (author_id, level, nom, denom, last_msg) VALUES (:author_id, :level, :nom, :denom, :last_msg)",
+                    new_user,
+                )
+                await db.commit()
+            self.bot.leaderboards.mark_dirty("level")
 
     @tasks.loop(time=datetime.time(hour=19, minute=0))
     async def join_stats_loop(self):
         if (datetime.datetime.now().weekday() == 6) and ():
             async with aiosqlite.connect(DB["main"]) as db:
-                await db.execute(
-                    "CREATE TABLE IF NOT EXISTS stats (id INTEGER PRIMARY KEY, name TEXT, last INTEGER, now INTEGER)"
+                await timed_execute(
+                    db,
+                    "stats.create",
+                    "CREATE TABLE IF NOT EXISTS stats (id INTEGER PRIMARY KEY, name TEXT, last INTEGER, now INTEGER)",
+                )
+                cur = await timed_execute(
+                    db, "stats.select", "SELECT * FROM stats WHERE name='join'"
                 )
-                cur = await db.execute("SELECT * FROM stats WHERE name='join'")
                 join_stats = await cur.fetchone()
                 if not join_stats:
                     raise ValueError("Couldn't fetch data from database.")
@@ -514,14 +367,11 @@ Joins last week: **{join_stats[2]}**
 {join_pphrase}
                 """,
                 )
-                channel = self.bot.sendable_channel(
-                    self.bot.get_channel(self.bot.channels.get("logs", 0))
-                )
-
-                if channel:
-                    await channel.send(embed=embed)
-                await db.execute(
-                    "UPDATE stats SET last = now, now = 0 WHERE name = 'join'"
+                await self.bot.send_log(embed=embed)
+                await timed_execute(
+                    db,
+                    "stats.update",
+                    "UPDATE stats SET last = now, now = 0 WHERE name = 'join'",
                 )
                 await db.commit()
 
@@ -530,10 +380,6 @@ Joins last week: **{join_stats[2]}**
         channel = self.bot.sendable_channel(
             self.bot.get_channel(self.bot.channels.get("arrivals", 0))
         )
-        logchannel = self.bot.sendable_channel(
-            self.bot.get_channel(self.bot.channels.get("logs", 0))
-        )
-
         emb = discord.Embed(
             title=f"Welcome to ClearFly!",
             description=f"Hey there, {member.mention}! Be sure to read the <#{self.bot.channels.get('info')}> to become a member and gain full access to the server! Thanks for joining!",
@@ -569,24 +415,26 @@ Joins last week: **{join_stats[2]}**
             color=self.bot.color(),
         ).set_thumbnail(url=member.display_avatar.url)
         async with aiosqlite.connect(DB["main"]) as db:
-            await db.execute(
-                "CREATE TABLE IF NOT EXISTS stats (id INTEGER PRIMARY KEY, name TEXT, last INTEGER, now INTEGER)"
+            await timed_execute(
+                db,
+                "stats.create",
+                "CREATE TABLE IF NOT EXISTS stats (id INTEGER PRIMARY KEY, name TEXT, last INTEGER, now INTEGER)",
             )
-            await db.execute(
+            await timed_execute(
+                db,
+                "stats.insert",
                 "INSERT OR IGNORE INTO stats (name, last, now) VALUES (?, ?, ?)",
                 ("join", 0, 0),
             )
-            await db.execute("UPDATE stats SET now = now + 1 WHERE name = 'join'")
+            await timed_execute(
+                db, "stats.update", "UPDATE stats SET now = now + 1 WHERE name = 'join'"
+            )
             await db.commit()
 
-        if logchannel:
-            await logchannel.send(embed=emb)
+        await self.bot.send_log(embed=emb)
 
     @commands.Cog.listener()
     async def on_member_remove(self, member):
-        channel = self.bot.sendable_channel(
-            self.bot.get_channel(self.bot.channels.get("logs", 0))
-        )
         emb = discord.Embed(
             title=f"{member} left.",
             color=self.bot.color(),
@@ -594,40 +442,14 @@ Joins last week: **{join_stats[2]}**
         )
         pfp = member.display_avatar.url
         emb.set_thumbnail(url=pfp)
-        if channel:
-            await channel.send(embed=emb)
+        await self.bot.send_log(embed=emb)
 
     @commands.Cog.listener()
     async def on_message_delete(self, message: discord.Message):
         if isinstance(message.author, discord.User):
             return
 
-        class ViewRawMessage(discord.ui.View):
-            def __init__(self, bot):
-                self.bot = bot
-                super().__init__(timeout=None)
-
-            @discord.ui.button(
-                label="View Raw Contents", style=discord.ButtonStyle.primary
-            )
-            async def viewRawButtonCallback(self, button, interaction):
-                if message.content == "":
-                    message.content = "None"
-                message.content = message.content.replace("```", "`` `")
-                await interaction.response.send_message(
-                    f"""
-Message Content:
-```md
-{message.content}
-```
-                """,
-                    ephemeral=True,
-                )
-
         if message.author.bot == False:
-            channel = self.bot.sendable_channel(
-                self.bot.get_channel(self.bot.channels.get("logs", 0))
-            )
             msgcontent = message.clean_content
             if msgcontent == "":
                 msgcontent = "None"
@@ -681,51 +503,18 @@ ID: **{message.id}**
             )
             embed.set_thumbnail(url=pfp)
             embs.append(embed)
-            if channel:
-                await channel.send(embeds=embs, view=ViewRawMessage(self.bot))
+            payload_id = await self.payloads.add("raw", {"content": message.content})
+            await self.bot.send_log(embeds=embs, view=raw_view(payload_id))
 
     @commands.Cog.listener()
     async def on_message_edit(self, before, after):
         if isinstance(before.author, discord.User):
             return
 
-        class ViewRawMessage(discord.ui.View):
-            def __init__(self, bot):
-                self.bot = bot
-                super().__init__(timeout=None)
-
-            @discord.ui.button(
-                label="View Raw Contents", style=discord.ButtonStyle.primary
-            )
-            async def viewRawButtonCallback(self, button, interaction):
-                if before.content == "":
-                    before.content = "None"
-                if after.content == "":
-                    after.content = "None"
-                before.content, after.content = before.content.replace(
-                    "```", "` ` `"
-                ), after.content.replace("```", "`` `")
-                await interaction.response.send_message(
-                    f"""
-Before:
-```md
-{before.content}
-```
-After:
-```md
-{after.content}
-```
-                """,
-                    ephemeral=True,
-                )
-
         if before.author.bot == False:
             if before.content == after.content:
                 pass
             else:
-                channel = self.bot.sendable_channel(
-                    self.bot.get_channel(self.bot.channels.get("logs", 0))
-                )
                 msgeditb = before.clean_content
                 msgedita = after.clean_content
                 msgatr = before.author.mention
@@ -753,16 +542,15 @@ ID: **{after.id}**
                 """,
                 )
                 emb.set_thumbnail(url=pfp)
-                if channel:
-                    await channel.send(embed=emb, view=ViewRawMessage(self.bot))
+                payload_id = await self.payloads.add(
+                    "raw", {"before": before.content, "after": after.content}
+                )
+                await self.bot.send_log(embed=emb, view=raw_view(payload_id))
 
     @commands.Cog.listener()
     async def on_guild_channel_update(
         self, before: discord.TextChannel, after: discord.TextChannel
     ):
-        channel = self.bot.sendable_channel(
-            self.bot.get_channel(self.bot.channels.get("logs", 0))
-        )
         embed = discord.Embed(title=f"Channel Updated", colour=self.bot.color())
         embed.add_field(name="", value=after.mention, inline=False)
         if before.name != after.name:
@@ -871,14 +659,13 @@ After: **{after.category}**
                         """
                     )
             embed.add_field(name="Permissions", value="\n".join(out), inline=False)
-        if channel:
-            await channel.send(embed=embed)
+        await self.bot.send_log(embed=embed)
 
     @commands.Cog.listener()
     async def on_member_update(self, before, after):
-        logs = self.bot.sendable_channel(
-            self.bot.get_channel(self.bot.channels.get("logs", 0))
-        )
+        if before.roles != after.roles:
+            admin = self.bot.roles.get("admin", 0)
+            self.scams.update_admin(after.id, any(r.id == admin for r in after.roles))
         if before.bot == False:
             if before.name != after.name:
                 embed = discord.Embed(
@@ -886,24 +673,21 @@ After: **{after.category}**
                     colour=self.bot.color(),
                 )
                 embed.set_thumbnail(url=after.display_avatar.url)
-                if logs:
-                    await logs.send(embed=embed)
+                await self.bot.send_log(embed=embed)
             if before.display_name != after.display_name:
                 embed = discord.Embed(
                     title=f"{before} changed their nickname to `{after.display_name}`.",
                     colour=self.bot.color(),
                 )
                 embed.set_thumbnail(url=after.display_avatar.url)
-                if logs:
-                    await logs.send(embed=embed)
+                await self.bot.send_log(embed=embed)
             if before.discriminator != after.discriminator:
                 embed = discord.Embed(
                     title=f"{before} changed their discriminator to `{after.discriminator}`.",
                     colour=self.bot.color(),
                 )
                 embed.set_thumbnail(url=after.display_avatar.url)
-                if logs:
-                    await logs.send(embed=embed)
+                await self.bot.send_log(embed=embed)
             if before.roles != after.roles:
                 embed = discord.Embed(
                     title=f"{before} got their roles changed.", colour=self.bot.color()
@@ -927,128 +711,193 @@ After: **{after.category}**
                 embed.add_field(name="Roles removed:", value=str(difr))
                 embed.add_field(name="Roles added:", value=str(difa))
                 embed.set_thumbnail(url=after.display_avatar.url)
-                if logs:
-                    await logs.send(embed=embed)
+                await self.bot.send_log(embed=embed)
             if before.display_avatar != after.display_avatar:
                 embed = discord.Embed(
                     title=f"{before} changed their avatar to the following image.",
                     colour=self.bot.color(),
                 )
                 embed.set_image(url=after.display_avatar.url)
-                if logs:
-                    await logs.send(embed=embed)
+                await self.bot.send_log(embed=embed)
         else:
             pass
 
-    @commands.Cog.listener("on_message")
+    def admin_ids(self) -> set[int] | None:
+        if self.scams.admins is None:
+            guild = self.bot.get_guild(self.bot.server_id)
+            if not guild:
+                return None
+            role = guild.get_role(self.bot.roles.get("admin", 0))
+            if not role:
+                return None
+            self.scams.set_admins(member.id for member in role.members)
+        return self.scams.admins
+
     async def scamcheck(self, message: discord.Message):
-        if isinstance(message.author, discord.User):
+        admins = self.admin_ids()
+        if admins is None or message.author.id in admins:
+            return
+        await self.scams.maybe_reload()
+        if self.scams.check(message.clean_content) is None:
             return
 
-        class BanView(discord.ui.View):
-            def __init__(self, bot):
-                self.bot = bot
-                super().__init__(timeout=None)
+        await message.reply(
+            content="Your message included blacklisted words, and has been deleted."
+        )
+        embed = discord.Embed(
+            title=f"`{message.author}` might have sent a scam",
+            description=message.content,
+            colour=self.bot.color(1),
+        )
+        await message.delete(reason=f"{message.author} might have sent a scam.")
+        payload_id = await self.payloads.add(
+            "ban", {"user_id": message.author.id, "name": str(message.author)}
+        )
+        await self.bot.send_log(
+            embed=embed, view=ban_view(payload_id, str(message.author))
+        )
 
-            @discord.ui.button(
-                label=f"Ban {message.author}", style=discord.ButtonStyle.danger
+    @commands.Cog.listener()
+    async def on_interaction(self, interaction: discord.Interaction):
+        if interaction.type != discord.InteractionType.component:
+            return
+        parsed = parse_custom_id(interaction.custom_id or "")
+        if parsed is None:
+            return
+        kind, payload_id = parsed
+        handler = {"raw": self.show_raw, "ban": self.ban_author}.get(kind)
+        if handler is None:
+            return
+
+        data = await self.payloads.get(kind, payload_id)
+        if data is None:
+            await interaction.response.send_message(
+                "This log entry has expired.", ephemeral=True
             )
-            async def button_callback(self, button, interaction):
-                try:
-                    if isinstance(message.author, discord.User):
-                        return
+            return
+        await handler(interaction, data)
 
-                    await message.author.ban(
-                        reason=f"{message.author} sent a scam, confirmed by {interaction.user}"
-                    )
-                    embed = discord.Embed(
-                        title=f"Successfully banned `{message.author}`", colour=0x00FF00
-                    )
-                    await interaction.response.send_message(embed=embed)
-                except Exception as error:
-                    embed = discord.Embed(
-                        title=f"While trying to ban `{message.author}`, I got the following error:",
-                        description=f"\n```{error}\n```",
-                        colour=self.bot.color(1),
-                    )
-                    await interaction.response.send_message(embed=embed)
+    async def show_raw(self, interaction: discord.Interaction, data: dict):
+        if "content" in data:
+            content = (data["content"] or "None").replace("```", "`` `")
+            await interaction.response.send_message(
+                f"""
+Message Content:
+```md
+{content}
+```
+                """,
+                ephemeral=True,
+            )
+            return
 
-        def scamChecker(string):
-            change = 0
-            blacklist = ["@everyone", "@here", "porn", "nudes", "crypto", "free nitro"]
-            for i in blacklist:
-                if blacklist[change] in string:
-                    return True
-                change += 1
+        before = (data["before"] or "None").replace("```", "` ` `")
+        after = (data["after"] or "None").replace("```", "`` `")
+        await interaction.response.send_message(
+            f"""
+Before:
+```md
+{before}
+```
+After:
+```md
+{after}
+```
+                """,
+            ephemeral=True,
+        )
 
-        guild = self.bot.get_guild(self.bot.server_id)
-        if guild:
-            role = guild.get_role(self.bot.roles.get("admin", 0))
-            if not role:
-                return
-        else:
+    async def ban_author(self, interaction: discord.Interaction, data: dict):
+        name = data["name"]
+        if interaction.guild is None:
+            await interaction.response.send_message(
+                "Bans can only be made from inside the server.", ephemeral=True
+            )
             return
-        members = [member.id for member in role.members]
-        logs = self.bot.sendable_channel(
-            self.bot.get_channel(self.bot.channels.get("logs", 0))
-        )
-        if message.author.id not in members:
-            if scamChecker(message.clean_content):
-                await message.reply(
-                    content="Your message included blacklisted words, and has been deleted."
-                )
-                embed = discord.Embed(
-                    title=f"`{message.author}` might have sent a scam",
-                    description=message.content,
-                    colour=self.bot.color(1),
-                )
-                await message.delete(reason=f"{message.author} might have sent a scam.")
-                if logs:
-                    await logs.send(embed=embed, view=BanView(bot=self.bot))
-            else:
-                pass
-        else:
-            pass
+        # The custom_id outlives the message, so check who's clicking every time.
+        permissions = getattr(interaction.user, "guild_permissions", None)
+        if permissions is None or not permissions.ban_members:
+            await interaction.response.send_message(
+                "You need the Ban Members permission to do that!", ephemeral=True
+            )
+            return
+
+        try:
+            await interaction.guild.ban(
+                discord.Object(id=data["user_id"]),
+                reason=f"{name} sent a scam, confirmed by {interaction.user}",
+            )
+            embed = discord.Embed(title=f"Successfully banned `{name}`", colour=0x00FF00)
+            await interaction.response.send_message(embed=embed)
+        except Exception as error:
+            embed = discord.Embed(
+                title=f"While trying to ban `{name}`, I got the following error:",
+                description=f"\n```{error}\n```",
+                colour=self.bot.color(1),
+            )
+            await interaction.response.send_message(embed=embed)
+
+    async def fetch_snippet(
+        self, raw_url: str, start_line: int, end_line: int
+    ) -> str | None:
+        key = (raw_url, start_line, end_line)
+        snip = self.snippets.get(key)
+        if snip is not None:
+            return snip
+
+        lines = []
+        async with aiohttp.ClientSession(trace_configs=TRACE_CONFIGS) as cs:
+            async with cs.get(raw_url) as r:
+                if r.status != 200:
+                    return None
+                line_no = 0
+                try:
+                    async for line in r.content:
+                        line_no += 1
+                        if line_no >= start_line:
+                            lines.append(line)
+                        if line_no >= end_line:
+                            break
+                except ValueError:
+                    # aiohttp gives up on lines longer than its buffer, which
+                    # minified files hit. Those make no sensible snippet anyway.
+                    return None
+
+        snip = b"".join(lines).decode(errors="replace")
+        self.snippets.set(key, snip)
+        return snip
 
-    @commands.Cog.listener("on_message")
     async def github_snippet(self, message):
-        if not message.author.bot:
-            match = re.search(
-                r"https?://github\.com/[\w-]+/[\w-]+/[\w./-]+#L(\d+)-L(\d+)",
-                message.content,
+        match = re.search(
+            r"https?://github\.com/[\w-]+/[\w-]+/[\w./-]+#L(\d+)-L(\d+)",
+            message.content,
+        )
+        if match:
+            url = match.group()
+            start_line = match.group(1)
+            end_line = match.group(2)
+            if (int(end_line) - int(start_line)) > 25:
+                return
+            raw_url = url.replace(
+                "github.com", "raw.githubusercontent.com"
+            ).replace("/blob", "").split("#")[0]
+            out_snip = await self.fetch_snippet(
+                raw_url, int(start_line), int(end_line)
             )
-            if match:
-                random.seed(message.content)
-                snip_id = random.randint(0, 100)
-                url = match.group()
-                start_line = match.group(1)
-                end_line = match.group(2)
-                if (int(end_line) - int(start_line)) > 25:
-                    return
-                raw_url = url.replace(
-                    "github.com", "raw.githubusercontent.com"
-                ).replace("/blob", "")
-                async with aiohttp.ClientSession() as cs:
-                    async with cs.get(raw_url) as r:
-                        async with aiofiles.open(f"snip{snip_id}.txt", "wb") as f:
-                            await f.write(await r.content.read())
-                async with aiofiles.open(f"snip{snip_id}.txt", "r") as f:
-                    snip = await f.readlines()
+            if out_snip is None:
+                return
 
-                file_name = url.split("/")[len(url.split("/")) - 1].split("#")[0]
-                syntaxh = file_name.split(".")[1]
-                out_snip = "".join(snip[int(start_line) - 1 : int(end_line)])
-                await message.reply(
-                    f"""
+            file_name = url.split("/")[len(url.split("/")) - 1].split("#")[0]
+            syntaxh = file_name.split(".")[1]
+            await message.reply(
+                f"""
 `{url.split("/")[3]}/{url.split("/")[4]}`: `{file_name}` line **{start_line}**-**{end_line}**
 ```{syntaxh}
 {out_snip}
 ```
                 """,
-                    view=DeleteMsgView(bot=self.bot, auth=message.author),
-                )
-                os.remove(f"snip{snip_id}.txt")
-
+                view=DeleteMsgView(bot=self.bot, auth=message.author),
+            )
 
 def setup(bot):
     bot.add_cog(Listeners(bot=bot))
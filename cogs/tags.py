@@ -6,6 +6,7 @@ from discord.ext import commands
 from discord.ext.pages import Page, Paginator
 
 from bot import ClearBot, DB
+from metrics import timed_execute
 
 
 class TagCommands(discord.Cog):
@@ -22,7 +23,7 @@ class TagCommands(discord.Cog):
 
     async def get_tags(self, ctx: discord.AutocompleteContext):
         async with aiosqlite.connect(DB["main"]) as db:
-            cursor = await db.execute("SELECT name FROM tags")
+            cursor = await timed_execute(db, "tags.select", "SELECT name FROM tags")
             rows = await cursor.fetchall()
             tags = [row[0] for row in rows]
         return [tag for tag in tags if ctx.value in tag]
@@ -46,13 +47,15 @@ class TagCommands(discord.Cog):
         tags = []
         await ctx.defer()
         async with aiosqlite.connect(DB["main"]) as db:
-            cursor = await db.execute("SELECT name FROM tags")
+            cursor = await timed_execute(db, "tags.select", "SELECT name FROM tags")
             rows = await cursor.fetchall()
             tags = [row[0] for row in rows]
         if tag in tags:
             async with aiosqlite.connect(DB["main"]) as db:
                 curs = await db.cursor()
-                output = await curs.execute("SELECT * FROM tags WHERE name=?", (tag,))
+                output = await timed_execute(
+                    curs, "tags.select", "SELECT * FROM tags WHERE name=?", (tag,)
+                )
                 output = await output.fetchone()
                 if not output:
                     raise ValueError("Couldn't fetch the tag from the database")
@@ -98,7 +101,7 @@ Didn't found {tag}.
         await ctx.defer()
         tags = []
         async with aiosqlite.connect(DB["main"]) as db:
-            cursor = await db.execute("SELECT name FROM tags")
+            cursor = await timed_execute(db, "tags.select", "SELECT name FROM tags")
             rows = await cursor.fetchall()
             tags = [row[0] for row in rows]
         var = 0
@@ -158,7 +161,9 @@ Didn't found {tag}.
                 }
                 async with aiosqlite.connect(DB["main"]) as db:
                     cur = await db.cursor()
-                    await cur.execute(
+                    await timed_execute(
+                        cur,
+                        "tags.insert",
                         "INSERT INTO tags (name, value, author, edited_at, created_at) VALUES (:name, :value, :author, :edited_at, :created_at)",
                         new_tag,
                     )
@@ -199,7 +204,9 @@ Didn't found {tag}.
             async def callback(self, interaction: discord.Interaction):
                 tags = []
                 async with aiosqlite.connect(DB["main"]) as db:
-                    cursor = await db.execute("SELECT name FROM tags")
+                    cursor = await timed_execute(
+                        db, "tags.select", "SELECT name FROM tags"
+                    )
                     rows = await cursor.fetchall()
                     tags = [row[0] for row in rows]
                 if edit in tags:
@@ -211,7 +218,9 @@ Didn't found {tag}.
                     }
                     async with aiosqlite.connect(DB["main"]) as db:
                         cursor = await db.cursor()
-                        await cursor.execute(
+                        await timed_execute(
+                            cursor,
+                            "tags.update",
                             "UPDATE tags SET name=:name, value=:value, edited_at=:edited_at WHERE name=:old_name",
                             new_tag,
                         )
@@ -234,7 +243,9 @@ Didn't found {edit}.
 
         async with aiosqlite.connect(DB["main"]) as db:
             curs = await db.cursor()
-            edit_tag = await curs.execute("SELECT * FROM tags WHERE name=?", (edit,))
+            edit_tag = await timed_execute(
+                curs, "tags.select", "SELECT * FROM tags WHERE name=?", (edit,)
+            )
             edit_tag = await edit_tag.fetchone()
             if not edit_tag:
                 raise ValueError("Couldn't fetch tag from database.")
@@ -267,7 +278,9 @@ Didn't found {edit}.
         await ctx.defer()
         async with aiosqlite.connect(DB["main"]) as db:
             curs = await db.cursor()
-            del_tag = await curs.execute("SELECT * FROM tags WHERE name=?", (tag,))
+            del_tag = await timed_execute(
+                curs, "tags.select", "SELECT * FROM tags WHERE name=?", (tag,)
+            )
             del_tag = await del_tag.fetchone()
             if not del_tag:
                 raise ValueError("Couldn't fetch tag from database.")
@@ -279,7 +292,9 @@ Didn't found {edit}.
         if int(del_tag[3]) == ctx.author.id:
             async with aiosqlite.connect(DB["main"]) as db:
                 cursor = await db.cursor()
-                await cursor.execute("DELETE FROM tags WHERE name=?", (tag,))
+                await timed_execute(
+                    cursor, "tags.delete", "DELETE FROM tags WHERE name=?", (tag,)
+                )
                 await db.commit()
             embed = discord.Embed(
                 title=f"Tag `{tag}` deleted successfully", colour=self.bot.color()
@@ -287,7 +302,9 @@ Didn't found {edit}.
         elif self.bot.roles.get("admin", 0) in authroles:
             async with aiosqlite.connect(DB["main"]) as db:
                 cursor = await db.cursor()
-                await cursor.execute("DELETE FROM tags WHERE name=?", (tag,))
+                await timed_execute(
+                    cursor, "tags.delete", "DELETE FROM tags WHERE name=?", (tag,)
+                )
                 await db.commit()
             embed = discord.Embed(
                 title=f"Tag `{tag}` deleted successfully (it was not yours!)",
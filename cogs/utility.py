@@ -11,6 +11,7 @@ from discord import option
 from discord.ext import commands
 import aiosqlite
 from bot import ClearBot, DB
+from metrics import timed_execute
 
 timezones = pytz.all_timezones
 
@@ -51,7 +52,9 @@ class PollTypeYesNo(discord.ui.Modal):
         }
         async with aiosqlite.connect(DB["main"]) as db:
             cur = await db.cursor()
-            await cur.execute(
+            await timed_execute(
+                cur,
+                "poll.insert",
                 "INSERT INTO poll (poll_id, author, question, type) VALUES (:poll_id, :author, :question, :type)",
                 new_poll,
             )
@@ -120,7 +123,9 @@ class PollTypeMChoice(discord.ui.Modal):
         }
         async with aiosqlite.connect(DB["main"]) as db:
             cur = await db.cursor()
-            await cur.execute(
+            await timed_execute(
+                cur,
+                "poll.insert",
                 "INSERT INTO poll (poll_id, author, question, type) VALUES (:poll_id, :author, :question, :type)",
                 new_poll,
             )
@@ -743,8 +748,11 @@ class UtilityCommands(discord.Cog):
         else:
             async with aiosqlite.connect(DB["main"]) as db:
                 curs = await db.cursor()
-                poll = await curs.execute(
-                    "SELECT * FROM poll WHERE poll_id=?", (poll_id,)
+                poll = await timed_execute(
+                    curs,
+                    "poll.select",
+                    "SELECT * FROM poll WHERE poll_id=?",
+                    (poll_id,),
                 )
                 poll = await poll.fetchone()
             if poll == None:
@@ -787,7 +795,12 @@ Total votes: **{total_count}**
                 await poll_msg.edit(embed=embed)
                 async with aiosqlite.connect(DB["main"]) as db:
                     cursor = await db.cursor()
-                    await cursor.execute("DELETE FROM poll WHERE poll_id=?", (poll_id,))
+                    await timed_execute(
+                        cursor,
+                        "poll.delete",
+                        "DELETE FROM poll WHERE poll_id=?",
+                        (poll_id,),
+                    )
                     await db.commit()
                 embed = discord.Embed(
                     title="Successfully closed poll!", colour=self.bot.color()
@@ -1001,7 +1014,9 @@ Second: **{second}**
     async def server_stats(self, ctx: discord.ApplicationContext):
         join_stats = None
         async with aiosqlite.connect(DB["main"]) as db:
-            cur = await db.execute("SELECT * FROM stats WHERE name='join'")
+            cur = await timed_execute(
+                db, "stats.select", "SELECT * FROM stats WHERE name='join'"
+            )
             join_stats = await cur.fetchone()
             if not join_stats:
                 raise Exception("Couldn't fetch join_stats from database.")
@@ -1089,14 +1104,27 @@ Joins last week: **{join_stats[2]}**
         hours, remainder = divmod(int(delta_uptime.total_seconds()), 3600)
         minutes, seconds = divmod(remainder, 60)
         days, hours = divmod(hours, 24)
+        assets = await self.bot.renderer.asset_stats()
+        logs = self.bot.logs.stats()
+        lag = self.bot.loop_monitor.stats()
+        handlers = ", ".join(
+            f"{h.name} {round(h.timings.avg*1000)}ms"
+            for h in self.bot.messages.handlers.values()
+        )
         embed = discord.Embed(
             title="**Bot Stats**",
             description=f"""
 **Uptime:** {days}d {hours}h {minutes}m {seconds}s.
 **Latency:** {round(self.bot.latency*1000)}ms
+**Loop lag:** avg {round(lag['avg_lag']*1000)}ms, max {round(lag['max_lag']*1000)}ms, {int(lag['blocks'])} blocks
 **CPU usage:** {psutil.cpu_percent()}%
 **CPU temp:** {temp}
 **RAM usage:** {psutil.virtual_memory()[2]}% (total {round(psutil.virtual_memory()[0]/1000000)}MB)
+**Map renders:** {self.bot.plotly.count} (avg {round(self.bot.plotly.avg_time*1000)}ms, {self.bot.plotly.queued} queued)
+**Render assets:** {assets['fonts']} fonts, {assets['templates']} templates ({round(assets['bytes']/1000000, 1)}MB)
+**Messages:** {self.bot.messages.messages} ({self.bot.messages.skipped} skipped by prefilters)
+**Message handlers:** {handlers}
+**Log queue:** {logs['sent']} events in {logs['messages']} messages, {logs['queued']} queued, {logs['dropped']} dropped
 **Total lines of code:** {loc}
 
 **Cogs loaded:**
@@ -4,7 +4,6 @@ import io
 import json
 import math
 import sqlite3
-import textwrap
 import aiohttp
 import discord
 import aiosqlite
@@ -17,10 +16,16 @@ from discord.ext import commands, tasks
 from discord.ext.pages import Paginator, Page
 import pymongo
 from exceptions import UserVABanned, UserNotVA
-from main import get_airports
-from PIL import Image, ImageFont
-from pilmoji import Pilmoji
-from bot import ClearBot, DB
+from bot import ClearBot, DB, get_airports
+from maps import download_basemap, native_available, route_traces
+from metrics import TRACE_CONFIGS, metrics, timed_execute
+from rendering import (
+    FlightCardJob,
+    FlightMapJob,
+    LeaderboardJob,
+    MapCropJob,
+    filename,
+)
 import kaleido
 
 PROJECTION_TYPES = [
@@ -113,7 +118,7 @@ PROJECTION_TYPES = [
 
 async def get_aircraft(ctx: discord.AutocompleteContext):
     async with aiosqlite.connect(DB["va"]) as db:
-        cur = await db.execute("SELECT icao FROM aircraft")
+        cur = await timed_execute(db, "aircraft.select", "SELECT icao FROM aircraft")
         aircraft = await cur.fetchall()
         aircraft = [aircraft[0] for aircraft in aircraft]
 
@@ -124,10 +129,11 @@ def is_allowed_check():
     def predicate(ctx: discord.ApplicationContext):
         if isinstance(ctx.author, discord.Member | discord.User):
             db = sqlite3.connect(DB["va"])
-            cur = db.execute(
-                "SELECT is_ban FROM users WHERE user_id=?", (str(ctx.author.id),)
-            )
-            result = cur.fetchone()
+            with metrics.timed(metrics.db, "users.select"):
+                cur = db.execute(
+                    "SELECT is_ban FROM users WHERE user_id=?", (str(ctx.author.id),)
+                )
+                result = cur.fetchone()
             if result:
                 is_ban = True if result[0] != 0 else False
 
@@ -216,8 +222,11 @@ class VAReportModal(discord.ui.Modal):
             return
 
         async with aiosqlite.connect(DB["va"]) as db:
-            cur = await db.execute(
-                "SELECT id FROM flights WHERE user_id=?", (str(interaction.user.id),)
+            cur = await timed_execute(
+                db,
+                "flights.select",
+                "SELECT id FROM flights WHERE user_id=?",
+                (str(interaction.user.id),),
             )
             flights = await cur.fetchall()
 
@@ -229,11 +238,15 @@ class VAReportModal(discord.ui.Modal):
                 "content": self.children[1].value,
             }
 
-            await db.execute(
+            await timed_execute(
+                db,
+                "reports.insert",
                 "INSERT INTO reports (user_id, flight_id, time, title, content) VALUES (:user_id, :flight_id, :time, :title, :content)",
                 report,
             )
-            await db.execute(
+            await timed_execute(
+                db,
+                "flights.update",
                 "UPDATE flights SET incident=' **__INCIDENT__**' WHERE id=?",
                 (flights[-1][0],),  # type: ignore
             )
@@ -321,14 +334,18 @@ class VAFlightSelectView(discord.ui.View):
             embed=discord.Embed(title="Loading...", color=self.bot.color()), files=[]
         )
         async with aiosqlite.connect(DB["va"]) as db:
-            cursor = await db.execute(
+            cursor = await timed_execute(
+                db,
+                "flights.select",
                 "SELECT * FROM flights WHERE id=?",
                 (int(select.values[0]),),
             )
             flight_data = await cursor.fetchone()
             if not flight_data:
                 return
-            cursor = await db.execute(
+            cursor = await timed_execute(
+                db,
+                "aircraft.select",
                 "SELECT crz_speed, type FROM aircraft WHERE icao=?",
                 (flight_data[3],),
             )
@@ -339,7 +356,6 @@ class VAFlightSelectView(discord.ui.View):
         airports_data = self.bot.airports
 
         waypoints = []
-        fig = go.Figure()
 
         origin_data = airports_data.get(flight_data[4])
         dest_data = airports_data.get(flight_data[5])
@@ -351,103 +367,103 @@ class VAFlightSelectView(discord.ui.View):
         else:
             raise Exception("No origin/destination data available.")
 
-        for waypoint in waypoints:
-            fig.add_trace(
-                go.Scattergeo(
-                    lat=[wayp[0] for wayp in waypoint],
-                    lon=[wayp[1] for wayp in waypoint],
-                    mode="lines",
-                    line=dict(color="#6db2d9", width=2),
+        projection_type = "natural earth" if self.auto_zoom else "equirectangular"
+        if native_available(projection_type):
+            map_data = await self.bot.renderer.render(
+                FlightMapJob(
+                    routes=waypoints,
+                    projection=projection_type,
+                    theme=self.bot.theme,
+                    auto_zoom=self.auto_zoom,
+                    labels=[
+                        (origin_coords, flight_data[4]),
+                        (dest_coords, flight_data[5]),
+                    ],
+                    marker_line=5,
+                    label_size=32 if self.auto_zoom else 12,
                 )
             )
-
-            for i, coords in enumerate(waypoint, 4):
-                fig.add_trace(
-                    go.Scattergeo(
-                        lat=[coords[0]],
-                        lon=[coords[1]],
-                        mode="markers",
-                        marker=dict(
-                            symbol="circle",
-                            color="#ffffff",
-                            size=5,
-                            line=dict(color="#6db2d9", width=5),
-                        ),
-                    )
-                )
+        else:
+            fig = go.Figure()
+            for waypoint in waypoints:
                 fig.add_trace(
                     go.Scattergeo(
-                        lat=[coords[0]],
-                        lon=[coords[1]],
-                        mode="text",
-                        text=flight_data[i],
-                        textfont=dict(
-                            color="#ffffff",
-                            size=32 if self.auto_zoom else 12,
-                        ),
-                        textposition=["top center"],
-                        line=dict(color="#6db2d9", width=5),
+                        lat=[wayp[0] for wayp in waypoint],
+                        lon=[wayp[1] for wayp in waypoint],
+                        mode="lines",
+                        line=dict(color="#6db2d9", width=2),
                     )
                 )
 
-        if self.auto_zoom:
-            fig.update_geos(
-                resolution=50,
-                projection_type="natural earth",
-                showland=True,
-                landcolor="#093961",
-                showocean=True,
-                oceancolor="#142533",
-                showrivers=True,
-                rivercolor="#142533",
-                showcountries=True,
-                countrycolor="#2681b4",
-                showlakes=True,
-                lakecolor="#142533",
-                showframe=False,
-                coastlinecolor="#2681b4",
-                fitbounds="locations",
-            )
-        else:
-            fig.update_geos(
-                resolution=50,
-                projection_type="equirectangular",
-                showland=True,
-                landcolor="#093961",
-                showocean=True,
-                oceancolor="#142533",
-                showrivers=True,
-                rivercolor="#142533",
-                showcountries=True,
-                countrycolor="#2681b4",
-                showlakes=True,
-                lakecolor="#142533",
-                showframe=False,
-                coastlinecolor="#2681b4",
-            )
-        fig.update_layout(showlegend=False)
-
-        if self.auto_zoom:
-            image_bytes = fig.to_image(format="png", width=2048, height=2048)
-        else:
-            image_bytes = fig.to_image(format="png", width=2048, height=2048)
-
-        image = Image.open(BytesIO(image_bytes))
-
-        grayscale_image = image.convert("L")
+                for i, coords in enumerate(waypoint, 4):
+                    fig.add_trace(
+                        go.Scattergeo(
+                            lat=[coords[0]],
+                            lon=[coords[1]],
+                            mode="markers",
+                            marker=dict(
+                                symbol="circle",
+                                color="#ffffff",
+                                size=5,
+                                line=dict(color="#6db2d9", width=5),
+                            ),
+                        )
+                    )
+                    fig.add_trace(
+                        go.Scattergeo(
+                            lat=[coords[0]],
+                            lon=[coords[1]],
+                            mode="text",
+                            text=flight_data[i],
+                            textfont=dict(
+                                color="#ffffff",
+                                size=32 if self.auto_zoom else 12,
+                            ),
+                            textposition=["top center"],
+                            line=dict(color="#6db2d9", width=5),
+                        )
+                    )
 
-        left, upper, right, lower = image.size[0], image.size[1], 0, 0
-        pixels = grayscale_image.load()
+            if self.auto_zoom:
+                fig.update_geos(
+                    resolution=50,
+                    projection_type="natural earth",
+                    showland=True,
+                    landcolor="#093961",
+                    showocean=True,
+                    oceancolor="#142533",
+                    showrivers=True,
+                    rivercolor="#142533",
+                    showcountries=True,
+                    countrycolor="#2681b4",
+                    showlakes=True,
+                    lakecolor="#142533",
+                    showframe=False,
+                    coastlinecolor="#2681b4",
+                    fitbounds="locations",
+                )
+            else:
+                fig.update_geos(
+                    resolution=50,
+                    projection_type="equirectangular",
+                    showland=True,
+                    landcolor="#093961",
+                    showocean=True,
+                    oceancolor="#142533",
+                    showrivers=True,
+                    rivercolor="#142533",
+                    showcountries=True,
+                    countrycolor="#2681b4",
+                    showlakes=True,
+                    lakecolor="#142533",
+                    showframe=False,
+                    coastlinecolor="#2681b4",
+                )
+            fig.update_layout(showlegend=False)
 
-        for x in range(image.size[0]):
-            for y in range(image.size[1]):
-                if pixels[x, y] < 255:
-                    left = min(left, x)
-                    upper = min(upper, y)
-                    right = max(right, x)
-                    lower = max(lower, y)
+            image_bytes = await self.bot.plotly.render(fig)
 
-        cropped_image = image.crop((left, upper + 1, right, lower))
+            map_data = await self.bot.renderer.render(MapCropJob(image_bytes))
 
         if (flight_data[8] == "") or (flight_data[9] == ""):
             notes = "*No Notes*"
@@ -462,15 +478,14 @@ class VAFlightSelectView(discord.ui.View):
 
         flight_time = f"{flight_time[0]}:{flight_time[1]}"
 
-        with io.BytesIO() as output:
-            output_filename = f"flight_{self.user.id}_{select.values[0]}.png"
-            cropped_image.save(output, format="PNG")
-            output.seek(0)
-            map_file = discord.File(output, filename=output_filename)
-            embed = (
-                discord.Embed(
-                    title=f"Flight {flight_data[2]}",
-                    description=f"""
+        output_filename = filename(
+            FlightMapJob, f"flight_{self.user.id}_{select.values[0]}", map_data
+        )
+        map_file = discord.File(BytesIO(map_data), filename=output_filename)
+        embed = (
+            discord.Embed(
+                title=f"Flight {flight_data[2]}",
+                description=f"""
 Flight number: **{flight_data[2]}**
 Aircraft: **{flight_data[3]}**
 Origin: **{flight_data[4]}** - **{airports_data.get(flight_data[4]).get('name', 'Unnamed')}**
@@ -481,19 +496,19 @@ Filed at: **<t:{flight_data[6]}:F>**
 Notes:
 {notes}
                 """,
-                    colour=self.bot.color(),
-                )
-                .set_image(url=f"attachment://{output_filename}")
-                .set_author(
-                    name=f"Flown by {self.user.name}",
-                    icon_url=self.user.display_avatar.url,
-                )
+                colour=self.bot.color(),
             )
-            if self.auto_zoom:
-                embed.set_footer(
-                    text="Can't figure out where this is on the map? Try running the command with auto_zoom disabled."
-                )
-            await interaction.edit_original_response(embed=embed, file=map_file)
+            .set_image(url=f"attachment://{output_filename}")
+            .set_author(
+                name=f"Flown by {self.user.name}",
+                icon_url=self.user.display_avatar.url,
+            )
+        )
+        if self.auto_zoom:
+            embed.set_footer(
+                text="Can't figure out where this is on the map? Try running the command with auto_zoom disabled."
+            )
+        await interaction.edit_original_response(embed=embed, file=map_file)
 
     @discord.ui.button(label="<<", style=discord.ButtonStyle.secondary, disabled=True)
     async def first_button_callback(
@@ -546,10 +561,30 @@ Notes:
 class VACommands(discord.Cog):
     def __init__(self, bot: ClearBot):
         self.bot = bot
+        self.bot.leaderboards.register("va", self.lb_rows, self.lb_job)
+        self.bot.messages.register(
+            "auto_complete_flight",
+            self.auto_complete_flight,
+            when=lambda m: m.channel_id == self.bot.channels.get("fbo")
+            and not m.own
+            and m.has_embeds,
+        )
 
         self.client = pymongo.MongoClient(os.getenv("MONGODB_URI"))
         self.db = self.client["ClearFly"]
         self.col = self.db["SAReportUsers"]
+        self.warmup: asyncio.Task | None = None
+
+    def cog_unload(self):
+        if self.warmup:
+            self.warmup.cancel()
+        self.bot.leaderboards.unregister("va")
+        self.bot.messages.unregister("auto_complete_flight")
+
+    async def warm_maps(self):
+        # Without the basemap, maps keep going through plotly.
+        await download_basemap()
+        await self.bot.plotly.start()
 
     va = discord.SlashCommandGroup(
         name="va",
@@ -577,70 +612,72 @@ class VACommands(discord.Cog):
             self.completed_flight_check.start()
         print("\033[34m|\033[0m \033[96;1mVA\033[0;36m cog loaded sucessfully\033[0m")
 
-    @commands.Cog.listener("on_message")
     async def auto_complete_flight(self, message: discord.Message):
-        if message.channel.id != self.bot.channels.get("fbo"):
-            return
-        if message.author.id != self.bot.bot_id and len(message.embeds) != 0:
-            embed = message.embeds[0]
+        embed = message.embeds[0]
 
-            lines = str(embed.description).split("\n")
+        lines = str(embed.description).split("\n")
 
-            title = (
-                lines[0]
-                .replace("### <@", "")
-                .replace(">", "")
-                .replace("!", "")
-                .split(" ")
-            )
-            data = (title[0], title[3], title[6])
+        title = (
+            lines[0]
+            .replace("### <@", "")
+            .replace(">", "")
+            .replace("!", "")
+            .split(" ")
+        )
+        data = (title[0], title[3], title[6])
 
-            async with aiosqlite.connect(DB["va"]) as db:
-                cur = await db.execute(
-                    "SELECT id FROM flights WHERE user_id=? AND is_completed=0 AND destination=? AND aircraft=?",
-                    data,
-                )
-                flight_ids = await cur.fetchall()
-                cur2 = await db.execute(
-                    "SELECT * FROM flights WHERE user_id=? AND is_completed=0 AND destination=? AND aircraft=?",
-                    data,
-                )
-                flight_id2 = await cur2.fetchall()
+        async with aiosqlite.connect(DB["va"]) as db:
+            cur = await timed_execute(
+                db,
+                "flights.select",
+                "SELECT id FROM flights WHERE user_id=? AND is_completed=0 AND destination=? AND aircraft=?",
+                data,
+            )
+            flight_ids = await cur.fetchall()
+            cur2 = await timed_execute(
+                db,
+                "flights.select",
+                "SELECT * FROM flights WHERE user_id=? AND is_completed=0 AND destination=? AND aircraft=?",
+                data,
+            )
+            flight_id2 = await cur2.fetchall()
 
-                if flight_ids == []:
-                    embed = discord.Embed(
-                        title="I couldn't find any non-completed flights",
-                        colour=self.bot.color(2),
-                        description="""
+            if flight_ids == []:
+                embed = discord.Embed(
+                    title="I couldn't find any non-completed flights",
+                    colour=self.bot.color(2),
+                    description="""
 - You may have marked your flight as completed before landing (which you shouldn't do).
 - You were not flying for the VA, but still had it enabled. To disable, go to settings and change the VA name (`ClearFly-Official/StableApproach`) to something else.
 - You needed to divert to another airport, use </va flight divert:1016059999056826479> if so. *This warning might appear when landing at the diverted airport even if you ran the command*
 """,
-                    )
-                    await message.reply(f"<@{data[0]}>", embed=embed)
-                    return
-                else:
-                    await db.execute(
-                        "UPDATE flights SET is_completed=1 WHERE id=?",
-                        (flight_ids[0][0],),  # type: ignore
-                    )
-                    await db.commit()
+                )
+                await message.reply(f"<@{data[0]}>", embed=embed)
+                return
+            else:
+                await timed_execute(
+                    db,
+                    "flights.update",
+                    "UPDATE flights SET is_completed=1 WHERE id=?",
+                    (flight_ids[0][0],),  # type: ignore
+                )
+                await db.commit()
 
-                flight_id2 = flight_id2[0]  # type: ignore
-                embed = discord.Embed(
-                    title="Flight automatically completed!",
-                    colour=self.bot.color(),
-                    description="I have marked your flight as completed, and it has been permantly logged.",
-                ).add_field(
-                    name="Flight Details",
-                    value=f"""
+            flight_id2 = flight_id2[0]  # type: ignore
+            embed = discord.Embed(
+                title="Flight automatically completed!",
+                colour=self.bot.color(),
+                description="I have marked your flight as completed, and it has been permantly logged.",
+            ).add_field(
+                name="Flight Details",
+                value=f"""
 Flight number: **{flight_id2[2]}**
 Aircraft: **{flight_id2[3]}**
 Origin: **{flight_id2[4]}**
 Destination: **{flight_id2[5]}**
-                """,
-                )
-            await message.reply(embed=embed)
+            """,
+            )
+        await message.reply(embed=embed)
 
     @tasks.loop(minutes=10)
     async def trial_check(self):
@@ -675,13 +712,20 @@ The ClearFly Team
                 except discord.Forbidden:
                     raise
                 async with aiosqlite.connect(DB["va"]) as db:
-                    await db.execute("DELETE FROM users WHERE user_id=?", (user[1],))
+                    await timed_execute(
+                        db,
+                        "users.delete",
+                        "DELETE FROM users WHERE user_id=?",
+                        (user[1],),
+                    )
                     await db.commit()
 
     @tasks.loop(minutes=10)
     async def completed_flight_check(self):
         async with aiosqlite.connect(DB["va"]) as db:
-            cur = await db.execute("SELECT * FROM flights WHERE is_completed=0")
+            cur = await timed_execute(
+                db, "flights.select", "SELECT * FROM flights WHERE is_completed=0"
+            )
             flights = await cur.fetchall()
 
             REM1 = 60 * 60 * 12
@@ -698,9 +742,18 @@ The ClearFly Team
                 delta_t = round(time.time() - int(flight[6]))
 
                 if delta_t > TOO_LATE:
-                    await db.execute("DELETE FROM flights WHERE id=?", (flight[0],))
-                    await db.execute(
-                        "DELETE FROM reports WHERE flight_id=?", (flight[0],)
+                    await timed_execute(
+                        db,
+                        "flights.delete",
+                        "DELETE FROM flights WHERE id=?",
+                        (flight[0],),
+                    )
+                    self.bot.leaderboards.mark_dirty("va")
+                    await timed_execute(
+                        db,
+                        "reports.delete",
+                        "DELETE FROM reports WHERE flight_id=?",
+                        (flight[0],),
                     )
                     user = self.bot.get_user(int(flight[1]))
                     if not user:
@@ -824,7 +877,9 @@ Your flight will be cancelled if you fail to do so <t:{int(flight[6])+TOO_LATE}:
                 return
 
         async with aiosqlite.connect(DB["va"]) as db:
-            cur = await db.execute("SELECT icao FROM aircraft")
+            cur = await timed_execute(
+                db, "aircraft.select", "SELECT icao FROM aircraft"
+            )
             ac_list = await cur.fetchall()
             ac_list = [craft[0] for craft in ac_list]
 
@@ -854,7 +909,7 @@ Your flight will be cancelled if you fail to do so <t:{int(flight[6])+TOO_LATE}:
             await ctx.respond(embed=embed)
             return
 
-        async with aiohttp.ClientSession() as cs:
+        async with aiohttp.ClientSession(trace_configs=TRACE_CONFIGS) as cs:
             async with cs.get(f"https://aviationweather.gov/api/data/metar?ids={icao}&format=json&taf=false") as resp:
                 metar_data = await resp.json()
 
@@ -870,10 +925,15 @@ Your flight will be cancelled if you fail to do so <t:{int(flight[6])+TOO_LATE}:
             name=f"Filed by {ctx.author.name}", icon_url=ctx.author.display_avatar.url
         )
         async with aiosqlite.connect(DB["va"]) as db:
-            cur = await db.execute(
-                "SELECT is_trial FROM users WHERE user_id=?", (str(ctx.author.id),)
+            cur = await timed_execute(
+                db,
+                "users.select",
+                "SELECT is_trial FROM users WHERE user_id=?",
+                (str(ctx.author.id),),
             )
-            cur2 = await db.execute(
+            cur2 = await timed_execute(
+                db,
+                "flights.select",
                 "SELECT is_completed FROM flights WHERE user_id=?",
                 (str(ctx.author.id),),
             )
@@ -887,8 +947,11 @@ Your flight will be cancelled if you fail to do so <t:{int(flight[6])+TOO_LATE}:
                 embed.set_footer(
                     text="You have filed a flight within 24 hours from sign up, so you're now officially a member of the VA. Congratulations!"
                 )
-                await db.execute(
-                    "UPDATE users SET is_trial=0 WHERE user_id=?", (str(ctx.author.id),)
+                await timed_execute(
+                    db,
+                    "users.update",
+                    "UPDATE users SET is_trial=0 WHERE user_id=?",
+                    (str(ctx.author.id),),
                 )
                 await db.commit()
             if not is_completed == []:
@@ -900,11 +963,7 @@ Your flight will be cancelled if you fail to do so <t:{int(flight[6])+TOO_LATE}:
                     )
                     await ctx.respond(embed=embed)
                     return
-        card_id = "flight_card" + str(random.randint(0, 9)) + ".png"
-        img = Image.open(f"ui/images/va_card/{self.bot.theme}/va_flightcard_blank.png")
-        font = ImageFont.truetype("ui/fonts/Inter-Regular.ttf", size=48)
-        route_font = ImageFont.truetype("ui/fonts/RobotoMono-Regular.ttf", size=128)
-        metar_font = ImageFont.truetype("ui/fonts/RobotoMono-Regular.ttf", size=36)
+        card_id = filename(FlightCardJob, "flight_card" + str(random.randint(0, 9)))
 
         if len(metar_data) == 0:
             metar = "No METAR found"
@@ -914,7 +973,12 @@ Your flight will be cancelled if you fail to do so <t:{int(flight[6])+TOO_LATE}:
                 metar = "No METAR found"
 
         async with aiosqlite.connect(DB["va"]) as db:
-            cur = await db.execute("SELECT * FROM aircraft WHERE icao=?", (aircraft,))
+            cur = await timed_execute(
+                db,
+                "aircraft.select",
+                "SELECT * FROM aircraft WHERE icao=?",
+                (aircraft,),
+            )
             aircraft_data = await cur.fetchone()
             if not aircraft_data:
                 raise Exception("Couldn't fetch aircraft data.")
@@ -922,110 +986,38 @@ Your flight will be cancelled if you fail to do so <t:{int(flight[6])+TOO_LATE}:
         airport_data = self.bot.airports
         now = datetime.datetime.now(datetime.timezone.utc)
         time_str = now.strftime("%H:%M UTC | %d/%m/%Y")
-        with Pilmoji(img) as pilmoji:
-            colour = (255, 255, 255)
-            x_padding = 40
-            flight_time = str(
-                datetime.timedelta(
-                    hours=calculate_time(
-                        (
-                            airport_data.get(icao).get("lat", 181),
-                            airport_data.get(icao).get("lon", 181),
-                        ),
-                        (
-                            airport_data.get(destination[:4].upper()).get("lat", 181),
-                            airport_data.get(destination[:4].upper()).get("lon", 181),
-                        ),
-                        aircraft_data[4],
-                    )
-                )
-            ).split(":")
+        origin_coords = (
+            airport_data.get(icao).get("lat", 181),
+            airport_data.get(icao).get("lon", 181),
+        )
+        dest_coords = (
+            airport_data.get(destination[:4].upper()).get("lat", 181),
+            airport_data.get(destination[:4].upper()).get("lon", 181),
+        )
+        flight_time = str(
+            datetime.timedelta(
+                hours=calculate_time(origin_coords, dest_coords, aircraft_data[4])
+            )
+        ).split(":")
 
-            flight_time = f"{flight_time[0]}:{flight_time[1]}"
+        flight_time = f"{flight_time[0]}:{flight_time[1]}"
 
-            pilmoji.text(
-                (img.size[0] - (font.getlength(time_str) + x_padding), 43),  # type: ignore
-                time_str,
-                font=font,
-                fill=colour,
-            )
-            pilmoji.text(
-                (x_padding, 43),
-                flight_num,
-                font=font,
-                fill=colour,
-            )
-            pilmoji.text(
-                (x_padding + 10, 135), icao, font=route_font, fill=colour
-            )
-            pilmoji.text(
-                (
-                    (
-                        img.size[0]
-                        - (
-                            route_font.getlength(destination[:4].upper())
-                            + (x_padding + 10)
-                        )
-                    ),  # type: ignore
-                    135,
-                ),
-                destination[:4].upper(),
-                font=route_font,
-                fill=colour,
-            )
-            pilmoji.text(
-                (170, 415),
-                textwrap.fill(ctx.author.name, 10, max_lines=1),
-                font=font,
-                fill=colour,
-            )
-            pilmoji.text(
-                (720, 415),
-                aircraft,
-                font=font,
-                fill=colour,
-            )
-            pilmoji.text(
-                (170, 357),
-                flight_time,
-                font=font,
-                fill=colour,
-            )
-            pilmoji.text(
-                (720, 357),
-                str(
-                    round(
-                        calculate_distance(
-                            (
-                                airport_data.get(icao).get("lat", 181),
-                                airport_data.get(icao).get("lon", 181),
-                            ),
-                            (
-                                airport_data.get(destination[:4].upper()).get(
-                                    "lat", 181
-                                ),
-                                airport_data.get(destination[:4].upper()).get(
-                                    "lon", 181
-                                ),
-                            ),
-                        )
-                    )
-                )
+        data = await self.bot.renderer.render(
+            FlightCardJob(
+                theme=self.bot.theme,
+                flight_number=flight_num,
+                origin=icao,
+                destination=destination[:4].upper(),
+                pilot=ctx.author.name,
+                aircraft=aircraft,
+                flight_time=flight_time,
+                distance=str(round(calculate_distance(origin_coords, dest_coords)))
                 + " NM",
-                font=font,
-                fill=colour,
-            )
-            pilmoji.text(
-                (x_padding + 5, 525 + x_padding // 6),
-                textwrap.fill(metar, 42, max_lines=5),
-                font=metar_font,
-                fill=colour,
+                metar=metar,
+                time_str=time_str,
             )
-
-        with io.BytesIO() as output:
-            img.save(output, format="PNG")
-            output.seek(0)
-            file = discord.File(output, filename=card_id)
+        )
+        file = discord.File(io.BytesIO(data), filename=card_id)
         embed.set_image(url=f"attachment://{card_id}")
 
         flight = {
@@ -1041,11 +1033,14 @@ Your flight will be cancelled if you fail to do so <t:{int(flight[6])+TOO_LATE}:
         }
 
         async with aiosqlite.connect(DB["va"]) as db:
-            await db.execute(
+            await timed_execute(
+                db,
+                "flights.insert",
                 "INSERT INTO flights (user_id, flight_number, aircraft, origin, destination, filed_at, is_completed, divert, incident) VALUES (:user_id, :flight_number, :aircraft, :origin, :destination, :filed_at, :is_completed, :divert, :incident)",
                 flight,
             )
             await db.commit()
+        self.bot.leaderboards.mark_dirty("va")
 
         await ctx.respond(embed=embed, file=file)
 
@@ -1058,12 +1053,16 @@ Your flight will be cancelled if you fail to do so <t:{int(flight[6])+TOO_LATE}:
         await ctx.defer()
 
         async with aiosqlite.connect(DB["va"]) as db:
-            cur = await db.execute(
+            cur = await timed_execute(
+                db,
+                "flights.select",
                 "SELECT id FROM flights WHERE user_id=? AND is_completed=0",
                 (str(ctx.author.id),),
             )
             flight_ids = await cur.fetchall()
-            cur2 = await db.execute(
+            cur2 = await timed_execute(
+                db,
+                "flights.select",
                 "SELECT * FROM flights WHERE user_id=? AND is_completed=0",
                 (str(ctx.author.id),),
             )
@@ -1078,8 +1077,11 @@ Your flight will be cancelled if you fail to do so <t:{int(flight[6])+TOO_LATE}:
                 await ctx.respond(embed=embed)
                 return
             else:
-                await db.execute(
-                    "UPDATE flights SET is_completed=1 WHERE id=?", (flight_ids[0][0],)  # type: ignore
+                await timed_execute(
+                    db,
+                    "flights.update",
+                    "UPDATE flights SET is_completed=1 WHERE id=?",
+                    (flight_ids[0][0],),  # type: ignore
                 )
                 await db.commit()
 
@@ -1106,8 +1108,11 @@ Destination: **{flight_id2[5]}**
         await ctx.defer()
 
         async with aiosqlite.connect(DB["va"]) as db:
-            cur = await db.execute(
-                "SELECT * FROM flights WHERE user_id=?", (str(ctx.author.id),)
+            cur = await timed_execute(
+                db,
+                "flights.select",
+                "SELECT * FROM flights WHERE user_id=?",
+                (str(ctx.author.id),),
             )
             flights = await cur.fetchall()
 
@@ -1127,11 +1132,20 @@ Destination: **{flight_id2[5]}**
                 )
                 await ctx.respond(embed=embed)
             else:
-                await db.execute("DELETE FROM flights WHERE id=?", (last_flight[0],))
-                await db.execute(
-                    "DELETE FROM reports WHERE flight_id=?", (last_flight[0],)
+                await timed_execute(
+                    db,
+                    "flights.delete",
+                    "DELETE FROM flights WHERE id=?",
+                    (last_flight[0],),
+                )
+                await timed_execute(
+                    db,
+                    "reports.delete",
+                    "DELETE FROM reports WHERE flight_id=?",
+                    (last_flight[0],),
                 )
                 await db.commit()
+                self.bot.leaderboards.mark_dirty("va")
                 embed = discord.Embed(
                     title="Flight successfully cancelled!", colour=self.bot.color()
                 )
@@ -1151,8 +1165,11 @@ Destination: **{flight_id2[5]}**
         await ctx.defer()
 
         async with aiosqlite.connect(DB["va"]) as db:
-            cur = await db.execute(
-                "SELECT * FROM flights WHERE user_id=?", (str(ctx.author.id),)
+            cur = await timed_execute(
+                db,
+                "flights.select",
+                "SELECT * FROM flights WHERE user_id=?",
+                (str(ctx.author.id),),
             )
             flights = await cur.fetchall()
 
@@ -1172,7 +1189,9 @@ Destination: **{flight_id2[5]}**
                 )
                 await ctx.respond(embed=embed)
             else:
-                await db.execute(
+                await timed_execute(
+                    db,
+                    "flights.update",
                     "UPDATE flights SET divert=? WHERE id=?",
                     (f" __*diverted to **{airport[:4].upper()}***__", last_flight[0]),
                 )
@@ -1191,8 +1210,11 @@ Destination: **{flight_id2[5]}**
     @is_allowed_check()
     async def va_report(self, ctx: discord.ApplicationContext):
         async with aiosqlite.connect(DB["va"]) as db:
-            cur = await db.execute(
-                "SELECT * FROM flights WHERE user_id=?", (str(ctx.author.id),)
+            cur = await timed_execute(
+                db,
+                "flights.select",
+                "SELECT * FROM flights WHERE user_id=?",
+                (str(ctx.author.id),),
             )
             flights = await cur.fetchall()
 
@@ -1232,8 +1254,11 @@ Destination: **{flight_id2[5]}**
             user = ctx.author
 
         async with aiosqlite.connect(DB["va"]) as db:
-            cur = await db.execute(
-                "SELECT * FROM reports WHERE user_id=?", (str(user.id),)
+            cur = await timed_execute(
+                db,
+                "reports.select",
+                "SELECT * FROM reports WHERE user_id=?",
+                (str(user.id),),
             )
             reports = await cur.fetchall()
             if reports == []:
@@ -1294,8 +1319,11 @@ Destination: **{flight_id2[5]}**
 
         flights = []
         async with aiosqlite.connect(DB["va"]) as db:
-            cursor = await db.execute(
-                "SELECT * FROM flights WHERE user_id=?", (str(user.id),)
+            cursor = await timed_execute(
+                db,
+                "flights.select",
+                "SELECT * FROM flights WHERE user_id=?",
+                (str(user.id),),
             )
             rows = await cursor.fetchall()
             flights = [
@@ -1379,17 +1407,23 @@ Destination: **{flight_id2[5]}**
 
         async with aiosqlite.connect(DB["va"]) as db:
             if version == "General Aviation":
-                cursor = await db.execute(
+                cursor = await timed_execute(
+                    db,
+                    "flights.select",
                     f"SELECT origin, destination FROM flights WHERE user_id=? AND aircraft IN {await self.bot.va.get_aircraft_from_type('GA', 'IN_SQL')}",
                     (str(user.id),),
                 )
             elif version == "Airliner":
-                cursor = await db.execute(
+                cursor = await timed_execute(
+                    db,
+                    "flights.select",
                     f"SELECT origin, destination FROM flights WHERE user_id=? AND aircraft IN {await self.bot.va.get_aircraft_from_type('Airliner', 'IN_SQL')}",
                     (str(user.id),),
                 )
             else:
-                cursor = await db.execute(
+                cursor = await timed_execute(
+                    db,
+                    "flights.select",
                     "SELECT origin, destination FROM flights WHERE user_id=?",
                     (str(user.id),),
                 )
@@ -1408,71 +1442,41 @@ Destination: **{flight_id2[5]}**
                 dest_coords = (dest_data["lat"], dest_data["lon"])
                 waypoints.append((origin_coords, dest_coords))
 
-        fig = go.Figure()
-
-        for waypoint in waypoints:
-            fig.add_trace(
-                go.Scattergeo(
-                    lat=[wayp[0] for wayp in waypoint],
-                    lon=[wayp[1] for wayp in waypoint],
-                    mode="lines",
-                    line=dict(color="#6db2d9", width=2),
+        if native_available(projection_type):
+            map_data = await self.bot.renderer.render(
+                FlightMapJob(
+                    routes=waypoints,
+                    projection=projection_type,
+                    theme=self.bot.theme,
+                    auto_zoom=auto_zoom,
                 )
             )
+        else:
+            fig = go.Figure(data=route_traces(waypoints))
 
-            for coords in waypoint:
-                fig.add_trace(
-                    go.Scattergeo(
-                        lat=[coords[0]],
-                        lon=[coords[1]],
-                        mode="markers",
-                        marker=dict(
-                            symbol="circle",
-                            color="#ffffff",
-                            size=5,
-                            line=dict(color="#6db2d9", width=1),
-                        ),
-                    )
-                )
-
-        fig.update_geos(
-            resolution=50,
-            projection_type=projection_type,
-            showland=True,
-            landcolor="#093961",
-            showocean=True,
-            oceancolor="#142533",
-            showrivers=True,
-            rivercolor="#142533",
-            showcountries=True,
-            countrycolor="#2681b4",
-            showlakes=True,
-            lakecolor="#142533",
-            showframe=False,
-            coastlinecolor="#2681b4",
-            fitbounds="locations" if auto_zoom else None,
-        )
-
-        fig.update_layout(showlegend=False)
-
-        image_bytes = fig.to_image(format="png", width=2048, height=2048)
-
-        image = Image.open(BytesIO(image_bytes))
-
-        grayscale_image = image.convert("L")
+            fig.update_geos(
+                resolution=50,
+                projection_type=projection_type,
+                showland=True,
+                landcolor="#093961",
+                showocean=True,
+                oceancolor="#142533",
+                showrivers=True,
+                rivercolor="#142533",
+                showcountries=True,
+                countrycolor="#2681b4",
+                showlakes=True,
+                lakecolor="#142533",
+                showframe=False,
+                coastlinecolor="#2681b4",
+                fitbounds="locations" if auto_zoom else None,
+            )
 
-        left, upper, right, lower = image.size[0], image.size[1], 0, 0
-        pixels = grayscale_image.load()
+            fig.update_layout(showlegend=False)
 
-        for x in range(image.size[0]):
-            for y in range(image.size[1]):
-                if pixels[x, y] < 255:
-                    left = min(left, x)
-                    upper = min(upper, y)
-                    right = max(right, x)
-                    lower = max(lower, y)
+            image_bytes = await self.bot.plotly.render(fig)
 
-        cropped_image = image.crop((left, upper + 1, right, lower))
+            map_data = await self.bot.renderer.render(MapCropJob(image_bytes))
 
         if version == "Airliner":
             flight_type = "airliner"
@@ -1481,21 +1485,18 @@ Destination: **{flight_id2[5]}**
         else:
             flight_type = ""
 
-        with io.BytesIO() as output:
-            output_filename = "map.png"
-            cropped_image.save(output, format="PNG")
-            output.seek(0)
-            map_file = discord.File(output, filename=output_filename)
-            embed = discord.Embed(
-                title=f"{user.name}'s flight map",
-                description=f"{user.mention} has completed **{len(waypoints_data)}** {flight_type} flight(s)!",  # type: ignore
-                colour=self.bot.color(),
-            ).set_image(url=f"attachment://{output_filename}")
-            if auto_zoom:
-                embed.set_footer(
-                    text="Can't figure out where this is on the map? Try running the command with auto_zoom disabled."
-                )
-            await ctx.respond(embed=embed, file=map_file)
+        output_filename = filename(FlightMapJob, "map", map_data)
+        map_file = discord.File(BytesIO(map_data), filename=output_filename)
+        embed = discord.Embed(
+            title=f"{user.name}'s flight map",
+            description=f"{user.mention} has completed **{len(waypoints_data)}** {flight_type} flight(s)!",  # type: ignore
+            colour=self.bot.color(),
+        ).set_image(url=f"attachment://{output_filename}")
+        if auto_zoom:
+            embed.set_footer(
+                text="Can't figure out where this is on the map? Try running the command with auto_zoom disabled."
+            )
+        await ctx.respond(embed=embed, file=map_file)
 
         await asyncio.sleep(20)
 
@@ -1582,54 +1583,37 @@ Destination: **{flight_id2[5]}**
     async def va_lb(self, ctx: discord.ApplicationContext):
         await ctx.defer()
 
-        async with aiosqlite.connect(DB["va"]) as db:
-            cursor = await db.execute(
-                "SELECT user_id, COUNT(*) as flight_count FROM flights GROUP BY user_id ORDER BY flight_count DESC"
-            )
-            lb = await cursor.fetchall()
+        data = await self.bot.leaderboards.get("va")
+        lb_file = filename(LeaderboardJob, "lb")
+        file = discord.File(io.BytesIO(data), filename=lb_file)
+        embed = discord.Embed(
+            title="ClearFly VA Leaderboard",
+            description="See more information with </va stats:1016059999056826479>!",
+            colour=self.bot.color(),
+        ).set_image(url=f"attachment://{lb_file}")
+        await ctx.respond(embed=embed, file=file)
 
-        font = ImageFont.truetype(
-            "ui/fonts/Inter-Regular.ttf",
-            size=43,
-            layout_engine=ImageFont.Layout.BASIC,
-        )
-        img = Image.open(f"ui/images/leaderboard/{self.bot.theme}/lb.png")
+    async def lb_rows(self) -> list[tuple]:
+        with metrics.timed(metrics.db, "flights.top"):
+            async with aiosqlite.connect(DB["va"]) as db:
+                cursor = await db.execute(
+                    "SELECT user_id, COUNT(*) as flight_count FROM flights GROUP BY user_id ORDER BY flight_count DESC LIMIT 10"
+                )
+                return list(await cursor.fetchall())
+
+    async def lb_job(self, lb: list[tuple], theme: int) -> LeaderboardJob:
         names = [
             f"{i}      {self.bot.user_object(await self.bot.get_or_fetch_user(int(elem[0]))).name}"
             for i, elem in enumerate(lb, 1)
         ]
         values = [f"Flights: {elem[1]}" for elem in lb]
-        with Pilmoji(img) as pilmoji:
-            pilmoji.text(
-                (790, 30),
-                "\n\n".join(values[:10]),
-                fill=(255, 255, 255),
-                font=font,
-                emoji_position_offset=(0, 20),
-            )
-            pilmoji.text(
-                (27, 30),
-                "\n\n".join(names[:10]),
-                fill=(255, 255, 255),
-                font=font,
-                emoji_position_offset=(0, 20),
-            )
-        w, h = img.size
-        with io.BytesIO() as output:
-            if len(values) < 10:
-                img.crop((0, 0, w, h - 95 * (10 - len(values)))).save(
-                    output, format="PNG"
-                )
-            else:
-                img.save(output, format="PNG")
-            output.seek(0)
-            file = discord.File(output, filename="lb.png")
-        embed = discord.Embed(
-            title="ClearFly VA Leaderboard",
-            description="See more information with </va stats:1016059999056826479>!",
-            colour=self.bot.color(),
-        ).set_image(url="attachment://lb.png")
-        await ctx.respond(embed=embed, file=file)
+        return LeaderboardJob(
+            theme=theme,
+            names=names,
+            values=values,
+            values_x=790,
+            crop=True,
+        )
 
     @va.command(name="stats", description="📊 See the statistics of the ClearFly VA!")
     @commands.cooldown(1, 5, commands.BucketType.user)
@@ -1638,64 +1622,82 @@ Destination: **{flight_id2[5]}**
         await ctx.defer()
 
         async with aiosqlite.connect(DB["va"]) as db:
-            cur = await db.execute("SELECT COUNT(*) FROM flights")
+            cur = await timed_execute(
+                db, "flights.select", "SELECT COUNT(*) FROM flights"
+            )
             total_flights = await cur.fetchone()
             if not total_flights:
                 raise Exception("Failed to get flight count.")
             total_flights = total_flights[0]
 
-            cur = await db.execute("SELECT COUNT(*) FROM flights WHERE incident != ''")
+            cur = await timed_execute(
+                db,
+                "flights.select",
+                "SELECT COUNT(*) FROM flights WHERE incident != ''",
+            )
             incident_flights = await cur.fetchone()
             if not incident_flights:
                 raise Exception("Failed to get incident count.")
             incident_flights = incident_flights[0]
 
-            cur = await db.execute("SELECT COUNT(*) FROM users")
+            cur = await timed_execute(db, "users.select", "SELECT COUNT(*) FROM users")
             total_users = await cur.fetchone()
             if not total_users:
                 raise Exception("Failed to get incident count.")
             total_users = total_users[0]
 
-            cur = await db.execute(
-                "SELECT aircraft, COUNT(*) as count FROM flights GROUP BY aircraft ORDER BY count DESC LIMIT 1"
+            cur = await timed_execute(
+                db,
+                "flights.select",
+                "SELECT aircraft, COUNT(*) as count FROM flights GROUP BY aircraft ORDER BY count DESC LIMIT 1",
             )
             most_used_aircraft = await cur.fetchone()
             if not most_used_aircraft:
                 raise Exception("Failed to get most used aircraft.")
             most_used_aircraft = most_used_aircraft[0]
 
-            cur = await db.execute(
-                "SELECT COUNT(*), COUNT(CASE WHEN is_official THEN 1 END) FROM aircraft"
+            cur = await timed_execute(
+                db,
+                "aircraft.select",
+                "SELECT COUNT(*), COUNT(CASE WHEN is_official THEN 1 END) FROM aircraft",
             )
             total_aircraft = await cur.fetchone()
             if not total_aircraft:
                 raise Exception("Failed to get aircraft count.")
 
-            cur = await db.execute(
-                "SELECT origin, COUNT(*) as count FROM flights GROUP BY origin ORDER BY count DESC LIMIT 1"
+            cur = await timed_execute(
+                db,
+                "flights.select",
+                "SELECT origin, COUNT(*) as count FROM flights GROUP BY origin ORDER BY count DESC LIMIT 1",
             )
             most_common_origin = await cur.fetchone()
             if not most_common_origin:
                 raise Exception("Failed to get most common origin.")
             most_common_origin = most_common_origin[0]
 
-            cur = await db.execute(
-                "SELECT destination, COUNT(*) as count FROM flights GROUP BY destination ORDER BY count DESC LIMIT 1"
+            cur = await timed_execute(
+                db,
+                "flights.select",
+                "SELECT destination, COUNT(*) as count FROM flights GROUP BY destination ORDER BY count DESC LIMIT 1",
             )
             most_common_destination = await cur.fetchone()
             if not most_common_destination:
                 raise Exception("Failed to get most common destination.")
             most_common_destination = most_common_destination[0]
 
-            cur = await db.execute(
-                "SELECT COUNT(*) FROM flights WHERE divert IS NOT ''"
+            cur = await timed_execute(
+                db,
+                "flights.select",
+                "SELECT COUNT(*) FROM flights WHERE divert IS NOT ''",
             )
             diversions = await cur.fetchone()
             if not diversions:
                 raise Exception("Failed to get diversions count.")
             diversions = diversions[0]
 
-            cur = await db.execute("SELECT origin, destination FROM flights")
+            cur = await timed_execute(
+                db, "flights.select", "SELECT origin, destination FROM flights"
+            )
             origins_dests = await cur.fetchall()
 
         avg_flights_per_user = total_flights / total_users if total_users else 0
@@ -1819,10 +1821,17 @@ Most used aircraft: **{most_used_aircraft}**
         await ctx.defer()
 
         async with aiosqlite.connect(DB["va"]) as db:
-            cur = await db.execute("SELECT icao FROM aircraft")
+            cur = await timed_execute(
+                db, "aircraft.select", "SELECT icao FROM aircraft"
+            )
             ac_list = await cur.fetchall()
             ac_list = [craft[0] for craft in ac_list]
-            cur = await db.execute("SELECT * FROM aircraft WHERE icao=?", (aircraft,))
+            cur = await timed_execute(
+                db,
+                "aircraft.select",
+                "SELECT * FROM aircraft WHERE icao=?",
+                (aircraft,),
+            )
             aircraft_data = await cur.fetchone()
             if not aircraft_data:
                 raise Exception("Couldn't fetch aircraft data.")
@@ -1938,7 +1947,9 @@ The distance between airports is **{distance}** with estimated flight time being
         is_official: bool,
     ):
         async with aiosqlite.connect(DB["va"]) as db:
-            cur = await db.execute("SELECT icao FROM aircraft")
+            cur = await timed_execute(
+                db, "aircraft.select", "SELECT icao FROM aircraft"
+            )
             aircraft = await cur.fetchall()
             aircraft = [aircraft[0] for aircraft in aircraft]
 
@@ -1950,7 +1961,9 @@ The distance between airports is **{distance}** with estimated flight time being
                 )
                 await ctx.respond(embed=embed)
                 return
-            await db.execute(
+            await timed_execute(
+                db,
+                "aircraft.insert",
                 "INSERT INTO aircraft (icao, is_official, type, crz_speed) VALUES (?, ?, ?, ?)",
                 (icao.upper(), is_official, aircraft_type, crz_speed),
             )
@@ -1978,12 +1991,19 @@ The distance between airports is **{distance}** with estimated flight time being
     @commands.has_role(965422406036488282)
     async def remove_ac(self, ctx: discord.ApplicationContext, icao: str):
         async with aiosqlite.connect(DB["va"]) as db:
-            cur = await db.execute("SELECT icao FROM aircraft")
+            cur = await timed_execute(
+                db, "aircraft.select", "SELECT icao FROM aircraft"
+            )
             aircraft = await cur.fetchall()
             aircraft = [aircraft[0] for aircraft in aircraft]
 
             if icao.upper() in aircraft:
-                await db.execute("DELETE FROM aircraft WHERE icao=?", (icao.upper(),))
+                await timed_execute(
+                    db,
+                    "aircraft.delete",
+                    "DELETE FROM aircraft WHERE icao=?",
+                    (icao.upper(),),
+                )
                 await db.commit()
                 embed = discord.Embed(
                     title=f"`{icao.upper()}` deleted successfully",
@@ -2006,7 +2026,7 @@ The distance between airports is **{distance}** with estimated flight time being
     @commands.has_role(965422406036488282)
     async def list_ac(self, ctx: discord.ApplicationContext):
         async with aiosqlite.connect(DB["va"]) as db:
-            cur = await db.execute("SELECT * FROM aircraft")
+            cur = await timed_execute(db, "aircraft.select", "SELECT * FROM aircraft")
             aircraft = await cur.fetchall()
 
         aircraft = [
@@ -2033,8 +2053,11 @@ The distance between airports is **{distance}** with estimated flight time being
             await ctx.respond(embed=embed)
             return
         async with aiosqlite.connect(DB["va"]) as db:
-            await db.execute(
-                "UPDATE users SET is_ban=1 WHERE user_id=?", (str(user.id),)
+            await timed_execute(
+                db,
+                "users.update",
+                "UPDATE users SET is_ban=1 WHERE user_id=?",
+                (str(user.id),),
             )
             await db.commit()
 
@@ -2056,8 +2079,11 @@ The distance between airports is **{distance}** with estimated flight time being
             await ctx.respond(embed=embed)
             return
         async with aiosqlite.connect(DB["va"]) as db:
-            await db.execute(
-                "UPDATE users SET is_ban=0 WHERE user_id=?", (str(user.id),)
+            await timed_execute(
+                db,
+                "users.update",
+                "UPDATE users SET is_ban=0 WHERE user_id=?",
+                (str(user.id),),
             )
             await db.commit()
 
@@ -2089,4 +2115,7 @@ The distance between airports is **{distance}** with estimated flight time being
 
 
 def setup(bot):
-    bot.add_cog(VACommands(bot))
+    cog = VACommands(bot)
+    bot.add_cog(cog)
+    # on_ready fires again on every reconnect, this only runs once per load.
+    cog.warmup = bot.loop.create_task(cog.warm_maps())
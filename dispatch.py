@@ -0,0 +1,93 @@
+import asyncio
+import time
+import traceback
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable
+
+import discord
+
+
+@dataclass
+class MessageInfo:
+    message: discord.Message
+    channel_id: int
+    member: bool
+    bot: bool
+    own: bool
+    has_url: bool
+    has_embeds: bool
+
+
+@dataclass
+class HandlerTimings:
+    count: int = 0
+    failed: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    @property
+    def avg(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+@dataclass
+class Handler:
+    name: str
+    func: Callable[[discord.Message], Awaitable[None]]
+    when: Callable[[MessageInfo], bool]
+    timings: HandlerTimings = field(default_factory=HandlerTimings)
+
+
+class MessageDispatcher:
+    def __init__(self, bot) -> None:
+        self.bot = bot
+        self.handlers: dict[str, Handler] = {}
+        self.messages = 0
+        self.skipped = 0
+
+    def register(
+        self,
+        name: str,
+        func: Callable[[discord.Message], Awaitable[None]],
+        when: Callable[[MessageInfo], bool] = lambda info: True,
+    ) -> None:
+        self.handlers[name] = Handler(name, func, when)
+
+    def unregister(self, name: str) -> None:
+        self.handlers.pop(name, None)
+
+    def classify(self, message: discord.Message) -> MessageInfo:
+        return MessageInfo(
+            message=message,
+            channel_id=message.channel.id,
+            member=isinstance(message.author, discord.Member),
+            bot=message.author.bot,
+            own=message.author.id == self.bot.bot_id,
+            has_url="http" in message.content,
+            has_embeds=bool(message.embeds),
+        )
+
+    async def run(self, handler: Handler, message: discord.Message) -> None:
+        start = time.perf_counter()
+        try:
+            await handler.func(message)
+        except Exception:
+            handler.timings.failed += 1
+            print(f"\033[34m|\033[0m Message handler {handler.name} failed:")
+            traceback.print_exc()
+            return
+        elapsed = time.perf_counter() - start
+        handler.timings.count += 1
+        handler.timings.total += elapsed
+        handler.timings.max = max(handler.timings.max, elapsed)
+
+    async def dispatch(self, message: discord.Message) -> None:
+        self.messages += 1
+        info = self.classify(message)
+        handlers = [handler for handler in self.handlers.values() if handler.when(info)]
+        if not handlers:
+            self.skipped += 1
+        elif len(handlers) == 1:
+            await self.run(handlers[0], message)
+        else:
+            await asyncio.gather(*(self.run(handler, message) for handler in handlers))
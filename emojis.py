@@ -0,0 +1,131 @@
+import io
+import os
+import shutil
+import sys
+import tarfile
+import tempfile
+
+import requests
+from pilmoji.source import BaseSource
+
+from cache import LRUCache
+
+EMOJI_DIR = os.path.join("ui", "emoji")
+DISCORD_EMOJI_DIR = os.path.join(EMOJI_DIR, "discord")
+# Twemoji is what Discord itself draws, 72x72 PNGs named by codepoint.
+TWEMOJI_URL = "https://github.com/jdecked/twemoji/archive/refs/tags/v15.1.0.tar.gz"
+TWEMOJI_ASSETS = "/assets/72x72/"
+CHUNK_SIZE = 1024 * 1024
+
+
+def emoji_names(emoji: str) -> list[str]:
+    codepoints = [f"{ord(c):x}" for c in emoji]
+    names = ["-".join(codepoints)]
+    # Twemoji drops the variation selector unless the emoji is a ZWJ sequence.
+    stripped = [c for c in codepoints if c != "fe0f"]
+    if stripped != codepoints and stripped:
+        names.append("-".join(stripped))
+    return names
+
+
+class LocalEmojiSource(BaseSource):
+    def __init__(self, directory: str = EMOJI_DIR, max_bytes: int = 8 * 1024 * 1024):
+        self.directory = directory
+        self.cache = LRUCache(max_bytes=max_bytes)
+
+    def _read(self, key, paths: list[str]) -> io.BytesIO | None:
+        data = self.cache.get(key)
+        if data is None:
+            for path in paths:
+                try:
+                    with open(path, "rb") as f:
+                        data = f.read()
+                    break
+                except OSError:
+                    continue
+            else:
+                return None
+            self.cache.set(key, data)
+        return io.BytesIO(data)
+
+    def get_emoji(self, emoji: str, /) -> io.BytesIO | None:
+        return self._read(
+            emoji,
+            [
+                os.path.join(self.directory, f"{name}.png")
+                for name in emoji_names(emoji)
+            ],
+        )
+
+    def get_discord_emoji(self, id: int, /) -> io.BytesIO | None:
+        return self._read(id, [os.path.join(DISCORD_EMOJI_DIR, f"{id}.png")])
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "emoji": len(self.cache),
+            "bytes": self.cache.size,
+            "hits": self.cache.hits,
+            "misses": self.cache.misses,
+        }
+
+
+# Shared by every Pilmoji draw in a render worker.
+emoji_source = LocalEmojiSource()
+
+
+def has_emoji(directory: str = EMOJI_DIR) -> bool:
+    return os.path.isdir(directory) and any(
+        name.endswith(".png") for name in os.listdir(directory)
+    )
+
+
+def _extract(archive, directory: str) -> int:
+    # Unpack next to the store first so a failed download never looks complete.
+    tmp = directory + ".tmp"
+    os.makedirs(tmp, exist_ok=True)
+    names = []
+    with tarfile.open(fileobj=archive, mode="r|gz") as tar:
+        for member in tar:
+            if not member.isfile() or TWEMOJI_ASSETS not in member.name:
+                continue
+            f = tar.extractfile(member)
+            if f is None:
+                continue
+            name = os.path.basename(member.name)
+            with open(os.path.join(tmp, name), "wb") as out:
+                shutil.copyfileobj(f, out)
+            names.append(name)
+
+    os.makedirs(directory, exist_ok=True)
+    for name in names:
+        os.replace(os.path.join(tmp, name), os.path.join(directory, name))
+    os.rmdir(tmp)
+    return len(names)
+
+
+def download_emoji(url: str = TWEMOJI_URL, directory: str = EMOJI_DIR) -> bool:
+    # Run at install time (see the Dockerfile), the archive is tens of MB.
+    if has_emoji(directory):
+        return True
+
+    with tempfile.TemporaryFile() as archive:
+        try:
+            with requests.get(url, stream=True, timeout=30) as resp:
+                if resp.status_code != 200:
+                    return False
+                for chunk in resp.iter_content(CHUNK_SIZE):
+                    archive.write(chunk)
+        except requests.RequestException:
+            return False
+
+        archive.seek(0)
+        try:
+            count = _extract(archive, directory)
+        except (tarfile.TarError, OSError):
+            return False
+    return count > 0
+
+
+if __name__ == "__main__":
+    if not download_emoji():
+        sys.exit("Failed to download the Twemoji assets.")
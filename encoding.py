@@ -0,0 +1,73 @@
+import io
+from dataclasses import dataclass
+
+from PIL import Image
+
+
+@dataclass(frozen=True)
+class Encoding:
+    format: str
+    max_width: int
+    quality: int | None = None
+    palette: bool = False
+
+
+# Discord never shows an attachment wider than this, even when opened.
+ENCODINGS = {
+    # Flat UI with a handful of colours, text stays crisp as a palette PNG.
+    "card": Encoding("PNG", max_width=1280, palette=True),
+    # Quantizing would band the emoji drawn on leaderboards and the flag game.
+    "emoji_card": Encoding("PNG", max_width=1280),
+    # Cards with an avatar photo on them.
+    "photo_card": Encoding("WEBP", max_width=1440, quality=90),
+    "map": Encoding("WEBP", max_width=1600, quality=85),
+    "meme": Encoding("WEBP", max_width=1920, quality=85),
+}
+
+EXTENSIONS = {"PNG": "png", "WEBP": "webp", "JPEG": "jpg"}
+
+# WebP can't store a side longer than this, tall memes fall back to JPEG.
+WEBP_MAX_SIZE = 16383
+
+
+def extension(kind: str) -> str:
+    return EXTENSIONS[ENCODINGS[kind].format]
+
+
+def sniff_extension(data: bytes) -> str | None:
+    if data.startswith(b"\x89PNG"):
+        return "png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "webp"
+    if data.startswith(b"\xff\xd8"):
+        return "jpg"
+    return None
+
+
+def downscale(img: Image.Image, max_width: int) -> Image.Image:
+    if img.width <= max_width:
+        return img
+    height = round(img.height * max_width / img.width)
+    return img.resize((max_width, height), Image.Resampling.LANCZOS)
+
+
+def encode(img: Image.Image, kind: str) -> bytes:
+    encoding = ENCODINGS[kind]
+    img = downscale(img, encoding.max_width)
+    format = encoding.format
+    if format == "WEBP" and max(img.size) > WEBP_MAX_SIZE:
+        format = "JPEG"
+    options = {}
+    if format == "PNG":
+        options["optimize"] = True
+        if encoding.palette:
+            img = img.quantize(colors=256, method=Image.Quantize.FASTOCTREE)
+    else:
+        options["quality"] = encoding.quality
+        if format == "WEBP":
+            options["method"] = 4
+        elif img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+    with io.BytesIO() as output:
+        img.save(output, format=format, **options)
+        return output.getvalue()
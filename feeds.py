@@ -0,0 +1,227 @@
+import asyncio
+import time
+
+import aiohttp
+import aiosqlite
+import feedparser
+
+from bot import DB
+from metrics import TRACE_CONFIGS, timed_execute, timed_executemany
+
+# These used to be polled by their own loop each, they're disabled by default
+# just like those loops were. Enable them (or add new ones) in the feeds table.
+DEFAULT_FEEDS = [
+    (
+        "thresholdx_news",
+        "https://www.thresholdx.net/news/rss.xml",
+        "RSS_thresholdx_news",
+    ),
+    (
+        "thresholdx_opinion",
+        "https://www.thresholdx.net/opinion/rss.xml",
+        "RSS_thresholdx_opinion",
+    ),
+    (
+        "thresholdx_article",
+        "https://www.thresholdx.net/article/rss.xml",
+        "RSS_thresholdx_article",
+    ),
+]
+
+SEEN_LIMIT = 200
+POST_LIMIT = 3
+# seen_at of IDs carried over from the old tables. They only ever held the
+# last few posts, so a feed with nothing newer still gets a seeding poll.
+MIGRATED = 0
+
+
+def entry_id(entry: dict) -> str:
+    return entry.get("id") or entry.get("link")  # type: ignore
+
+
+class FeedPoller:
+    def __init__(self, db_path: str = DB["main"], timeout: float = 30.0) -> None:
+        self.db_path = db_path
+        self.timeout = aiohttp.ClientTimeout(total=timeout)
+        self.seen: dict[int, set[str]] = {}
+        self.seeded: set[int] = set()
+        self._ready = False
+
+    async def setup(self) -> None:
+        if self._ready:
+            return
+
+        async with aiosqlite.connect(self.db_path) as db:
+            await timed_execute(
+                db,
+                "feeds.create",
+                "CREATE TABLE IF NOT EXISTS feeds (id INTEGER PRIMARY KEY, name TEXT UNIQUE, url TEXT, channel TEXT DEFAULT 'news', enabled INTEGER DEFAULT 1, etag TEXT, modified TEXT)",
+            )
+            await timed_execute(
+                db,
+                "feed_seen.create",
+                "CREATE TABLE IF NOT EXISTS feed_seen (feed_id INTEGER, entry_id TEXT, seen_at INTEGER, PRIMARY KEY (feed_id, entry_id))",
+            )
+            for name, url, old_table in DEFAULT_FEEDS:
+                cur = await timed_execute(
+                    db,
+                    "feeds.insert",
+                    "INSERT OR IGNORE INTO feeds (name, url, enabled) VALUES (?, ?, 0)",
+                    (name, url),
+                )
+                if not cur.rowcount:
+                    continue
+
+                # Carry over the IDs the old per-feed tables already posted.
+                try:
+                    cur = await timed_execute(
+                        db, "rss_migration.select", f"SELECT lastID FROM {old_table}"
+                    )
+                    old_ids = [row[0] for row in await cur.fetchall()]
+                except aiosqlite.OperationalError:
+                    old_ids = []
+                await timed_executemany(db, "feeds.insert", 
+                    "INSERT OR IGNORE INTO feed_seen (feed_id, entry_id, seen_at) SELECT id, ?, ? FROM feeds WHERE name=?",
+                    [
+                        (old_id, MIGRATED, name)
+                        for old_id in old_ids
+                        if old_id and old_id != "NULL"
+                    ],
+                )
+            await db.commit()
+
+        self._ready = True
+
+    async def get_feeds(self) -> list[tuple]:
+        await self.setup()
+        async with aiosqlite.connect(self.db_path) as db:
+            cur = await timed_execute(
+                db,
+                "feeds.select",
+                "SELECT id, name, url, channel, etag, modified FROM feeds WHERE enabled=1",
+            )
+            return list(await cur.fetchall())
+
+    async def get_seen(self, feed_id: int) -> set[str]:
+        if feed_id not in self.seen:
+            async with aiosqlite.connect(self.db_path) as db:
+                cur = await timed_execute(
+                    db,
+                    "feed_seen.select",
+                    "SELECT entry_id, seen_at FROM feed_seen WHERE feed_id=?",
+                    (feed_id,),
+                )
+                rows = await cur.fetchall()
+            self.seen[feed_id] = {row[0] for row in rows}
+            if any(row[1] != MIGRATED for row in rows):
+                self.seeded.add(feed_id)
+        return self.seen[feed_id]
+
+    async def _remember(self, db, feed_id: int, entry_ids: list[str]) -> None:
+        # Oldest first, so rowid breaks seen_at ties in feed order.
+        await timed_executemany(db, "feed_seen.insert", 
+            "INSERT OR IGNORE INTO feed_seen (feed_id, entry_id, seen_at) VALUES (?, ?, ?)",
+            [(feed_id, entry_id, round(time.time())) for entry_id in entry_ids],
+        )
+        await timed_execute(
+            db,
+            "feed_seen.delete",
+            "DELETE FROM feed_seen WHERE feed_id=? AND rowid NOT IN (SELECT rowid FROM feed_seen WHERE feed_id=? ORDER BY seen_at DESC, rowid DESC LIMIT ?)",
+            (feed_id, feed_id, SEEN_LIMIT),
+        )
+        # Keep the in-memory set to exactly what the table still holds.
+        cur = await timed_execute(
+            db,
+            "feed_seen.select",
+            "SELECT entry_id FROM feed_seen WHERE feed_id=?",
+            (feed_id,),
+        )
+        seen = self.seen.setdefault(feed_id, set())
+        seen.clear()
+        seen.update(row[0] for row in await cur.fetchall())
+        self.seeded.add(feed_id)
+
+    async def mark_posted(self, feed: tuple, entry: dict) -> None:
+        async with aiosqlite.connect(self.db_path) as db:
+            await self._remember(db, feed[0], [entry_id(entry)])
+            await db.commit()
+
+    async def post_failed(self, feed: tuple) -> None:
+        # Drop the validators so the next poll fetches the feed again and
+        # retries whatever didn't go out.
+        async with aiosqlite.connect(self.db_path) as db:
+            await timed_execute(
+                db,
+                "feeds.update",
+                "UPDATE feeds SET etag=NULL, modified=NULL WHERE id=?",
+                (feed[0],),
+            )
+            await db.commit()
+
+    async def poll(self, cs: aiohttp.ClientSession, feed: tuple) -> list[dict]:
+        feed_id, _, url, _, etag, modified = feed
+
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if modified:
+            headers["If-Modified-Since"] = modified
+
+        async with cs.get(url, headers=headers) as resp:
+            if resp.status == 304 or resp.status >= 400:
+                return []
+            body = await resp.read()
+            etag = resp.headers.get("ETag")
+            modified = resp.headers.get("Last-Modified")
+
+        parsed = await asyncio.to_thread(feedparser.parse, body)
+        entries = [
+            dict(entry)
+            for entry in parsed.entries
+            if entry.get("id") or entry.get("link")
+        ]
+
+        seen = await self.get_seen(feed_id)
+        # A feed we have never polled before only gets marked, not posted.
+        first_poll = feed_id not in self.seeded
+        new = [entry for entry in entries if entry_id(entry) not in seen]
+        # Feeds list the newest entry first, post in chronological order.
+        post = [] if first_poll else list(reversed(new[:POST_LIMIT]))
+        # What gets posted is only marked once the post went out.
+        posting = {entry_id(entry) for entry in post}
+        skipped = [
+            entry_id(entry) for entry in reversed(new) if entry_id(entry) not in posting
+        ]
+
+        async with aiosqlite.connect(self.db_path) as db:
+            await timed_execute(
+                db,
+                "feeds.update",
+                "UPDATE feeds SET etag=?, modified=? WHERE id=?",
+                (etag, modified, feed_id),
+            )
+            if skipped or first_poll:
+                await self._remember(db, feed_id, skipped)
+            await db.commit()
+        return post
+
+    async def poll_all(self) -> list[tuple[tuple, dict]]:
+        feeds = await self.get_feeds()
+        if not feeds:
+            return []
+
+        async with aiohttp.ClientSession(
+            timeout=self.timeout, trace_configs=TRACE_CONFIGS
+        ) as cs:
+            results = await asyncio.gather(
+                *(self.poll(cs, feed) for feed in feeds), return_exceptions=True
+            )
+
+        out = []
+        for feed, result in zip(feeds, results):
+            if isinstance(result, (aiohttp.ClientError, asyncio.TimeoutError)):
+                continue
+            elif isinstance(result, BaseException):
+                raise result
+            out.extend((feed, entry) for entry in result)
+        return out
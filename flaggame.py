@@ -0,0 +1,52 @@
+import os
+import re
+from functools import lru_cache
+
+import flag
+from wonderwords import RandomSentence
+
+CCODES = {
+    "Very Easy": "countrycodes_veasy.txt",
+    "Easy": "countrycodes_easy.txt",
+    "Normal": "countrycodes_normal.txt",
+    "Hard": "countrycodes_hard.txt",
+    "Very Hard": "countrycodes_vhard.txt",
+}
+
+SENTENCES = {
+    "Very Easy": "simple_sentence",
+    "Easy": "simple_sentence",
+    "Normal": "bare_bone_with_adjective",
+    "Hard": "sentence",
+    "Very Hard": "sentence",
+}
+
+FALLBACK = "S🇴🇲🇪🇹h🇮🇳g went w🇷🇴🇳🇬..."
+MAX_ATTEMPTS = 10
+
+sentences = RandomSentence()
+
+
+@lru_cache(maxsize=None)
+def flag_table(difficulty: str) -> tuple[re.Pattern, dict[str, str]]:
+    path = os.path.join("ccodes", CCODES.get(difficulty, CCODES["Very Easy"]))
+    with open(path, "r") as f:
+        codes = [line.strip().lower() for line in f if line.strip()]
+
+    flags = {code: flag.flag(code.upper()) for code in codes}
+    return re.compile("|".join(map(re.escape, flags))), flags
+
+
+def flag_text(text: str, difficulty: str) -> str:
+    pattern, flags = flag_table(difficulty)
+    return pattern.sub(lambda m: flags[m.group()], text)
+
+
+def new_game(difficulty: str) -> tuple[str, str]:
+    method = getattr(sentences, SENTENCES.get(difficulty, "simple_sentence"))
+    for _ in range(MAX_ATTEMPTS):
+        text = method()
+        flagged = flag_text(text, difficulty)
+        if flagged != text:
+            return text, flagged
+    return text, FALLBACK
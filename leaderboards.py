@@ -0,0 +1,87 @@
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable
+
+from rendering import LeaderboardJob
+
+
+@dataclass
+class Board:
+    # Cheap query for the rows drawn on the image, compared to spot changes.
+    rows: Callable[[], Awaitable[list[tuple]]]
+    # Turns those rows into a job, doing the slow user lookups.
+    job: Callable[[list[tuple], int], Awaitable[LeaderboardJob]]
+
+
+class Leaderboards:
+    def __init__(self, bot, delay: float = 30.0) -> None:
+        self.bot = bot
+        self.delay = delay
+        self.boards: dict[str, Board] = {}
+        self.renders = 0
+        # (board, theme) -> (rows, image)
+        self._images: dict[tuple[str, int], tuple[list[tuple], bytes]] = {}
+        self._pending: dict[str, asyncio.Task] = {}
+        self._locks: dict[str, asyncio.Lock] = {}
+
+    def register(
+        self,
+        name: str,
+        rows: Callable[[], Awaitable[list[tuple]]],
+        job: Callable[[list[tuple], int], Awaitable[LeaderboardJob]],
+    ) -> None:
+        self.boards[name] = Board(rows, job)
+        self._locks.setdefault(name, asyncio.Lock())
+
+    def unregister(self, name: str) -> None:
+        self.boards.pop(name, None)
+        task = self._pending.pop(name, None)
+        if task:
+            task.cancel()
+        for key in [key for key in self._images if key[0] == name]:
+            del self._images[key]
+
+    async def get(self, name: str) -> bytes:
+        cached = self._images.get((name, self.bot.theme))
+        if cached is not None:
+            return cached[1]
+        return await self.refresh(name)
+
+    async def refresh(self, name: str) -> bytes:
+        board = self.boards[name]
+        async with self._locks[name]:
+            theme = self.bot.theme
+            rows = await board.rows()
+            cached = self._images.get((name, theme))
+            if cached is not None and cached[0] == rows:
+                return cached[1]
+
+            job = await board.job(rows, theme)
+            data = await self.bot.renderer.render(job)
+            self.renders += 1
+            self._images[(name, theme)] = (rows, data)
+            return data
+
+    def mark_dirty(self, name: str) -> None:
+        # Bursts of updates collapse into one check after the delay.
+        if name not in self.boards or name in self._pending:
+            return
+        self._pending[name] = asyncio.create_task(self._refresh_later(name))
+
+    async def _refresh_later(self, name: str) -> None:
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self._pending.pop(name, None)
+        if (name, self.bot.theme) not in self._images:
+            # Nobody asked for this board yet, the first caller renders it.
+            return
+        try:
+            await self.refresh(name)
+        except Exception as e:
+            print(f"\033[34m|\033[0m Failed to refresh the {name} leaderboard: {e}")
+
+    def close(self) -> None:
+        for task in self._pending.values():
+            task.cancel()
+        self._pending.clear()
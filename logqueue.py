@@ -0,0 +1,217 @@
+import asyncio
+import time
+
+import discord
+
+# Discord's limits for a single message.
+MAX_EMBEDS = 10
+MAX_EMBED_CHARS = 6000
+MAX_COMPONENTS = 25
+
+STOP = object()
+
+
+class DetachedView(discord.ui.View):
+    # Only carries buttons whose clicks are handled elsewhere, so the queue
+    # can merge several into one message and stop them once it's been sent.
+    def __init__(self, *buttons: discord.ui.Item) -> None:
+        super().__init__(timeout=None)
+        for button in buttons:
+            self.add_item(button)
+
+
+class LogQueue:
+    def __init__(
+        self,
+        bot,
+        max_size: int = 500,
+        interval: float = 2.0,
+        put_timeout: float = 5.0,
+    ) -> None:
+        self.bot = bot
+        self.interval = interval
+        self.put_timeout = put_timeout
+        self.queue: asyncio.Queue | None = None
+        self.max_size = max_size
+        self.queued = 0
+        self.sent = 0
+        self.messages = 0
+        self.dropped = 0
+        self.failed = 0
+        self._reported_drops = 0
+        self._task: asyncio.Task | None = None
+        self._closed = False
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            if self.queue is None:
+                self.queue = asyncio.Queue(maxsize=self.max_size)
+            self._task = asyncio.create_task(self._run())
+
+    async def put(self, content: str | None = None, **kwargs) -> bool:
+        if self._closed:
+            self.dropped += 1
+            return False
+        self.start()
+        assert self.queue is not None
+
+        item = (content, kwargs)
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # Slow the producer down first, only drop if the queue stays full.
+            try:
+                await asyncio.wait_for(self.queue.put(item), self.put_timeout)
+            except asyncio.TimeoutError:
+                self.dropped += 1
+                return False
+        self.queued += 1
+        return True
+
+    def channel(self) -> discord.TextChannel | None:
+        logs = self.bot.get_channel(self.bot.channels.get("logs", 0))
+        return logs if isinstance(logs, discord.TextChannel) else None
+
+    def _batchable(self, item) -> bool:
+        content, kwargs = item
+        used = {key for key, value in kwargs.items() if value is not None}
+        view = kwargs.get("view")
+        return (
+            content is None
+            and used <= {"embed", "embeds", "view"}
+            and (view is None or isinstance(view, DetachedView))
+        )
+
+    def _parts(self, item) -> tuple[list[discord.Embed], list[discord.ui.Item]]:
+        _, kwargs = item
+        embeds = list(kwargs.get("embeds") or [])
+        if kwargs.get("embed") is not None:
+            embeds.append(kwargs["embed"])
+        view = kwargs.get("view")
+        return embeds, list(view.children) if view is not None else []
+
+    def _number(self, entries: list[tuple[int, list]]) -> None:
+        # Entries sharing a message tell their buttons apart by the position
+        # of the entry's first embed.
+        if len(entries) < 2:
+            return
+        for index, buttons in entries:
+            for button in buttons:
+                button.label = f"#{index} {button.label or ''}".rstrip()
+
+    def _take(self, first) -> tuple[list, list, int, object | None]:
+        # Pull whatever else is queued into the same message, within limits.
+        assert self.queue is not None
+        embeds, buttons = self._parts(first)
+        entries = [(1, list(buttons))]
+        chars = sum(len(embed) for embed in embeds)
+        item = None
+        while not self.queue.empty() and len(embeds) < MAX_EMBEDS:
+            item = self.queue.get_nowait()
+            if item is STOP or not self._batchable(item):
+                break
+            more, more_buttons = self._parts(item)
+            size = sum(len(embed) for embed in more)
+            if (
+                len(embeds) + len(more) > MAX_EMBEDS
+                or chars + size > MAX_EMBED_CHARS
+                or len(buttons) + len(more_buttons) > MAX_COMPONENTS
+            ):
+                break
+            entries.append((len(embeds) + 1, more_buttons))
+            embeds.extend(more)
+            buttons.extend(more_buttons)
+            chars += size
+            item = None
+        self._number(entries)
+        return embeds, buttons, len(entries), item
+
+    def _drop_notice(self, embeds: list[discord.Embed]) -> None:
+        dropped = self.dropped - self._reported_drops
+        if not dropped or len(embeds) >= MAX_EMBEDS:
+            return
+        notice = discord.Embed(
+            title=f"{dropped} log event(s) dropped",
+            description="The log queue was full.",
+            colour=self.bot.color(1),
+        )
+        if sum(len(embed) for embed in embeds) + len(notice) <= MAX_EMBED_CHARS:
+            embeds.append(notice)
+            self._reported_drops = self.dropped
+
+    async def _send(self, content: str | None, **kwargs) -> None:
+        channel = self.channel()
+        if channel is None:
+            self.dropped += 1
+            return
+        try:
+            await channel.send(content, **kwargs)
+        except discord.HTTPException as e:
+            self.failed += 1
+            print(f"\033[34m|\033[0m Failed to send a log message: {e}")
+            return
+        finally:
+            # Views whose clicks are handled elsewhere don't need to stay in
+            # the view store for the lifetime of the bot.
+            view = kwargs.get("view")
+            if isinstance(view, DetachedView):
+                view.stop()
+        self.messages += 1
+
+    async def _flush_from(self, item) -> bool:
+        while item is not None:
+            if item is STOP:
+                return True
+            if not self._batchable(item):
+                content, kwargs = item
+                await self._send(content, **kwargs)
+                self.sent += 1
+                item = None
+                continue
+
+            embeds, buttons, count, item = self._take(item)
+            self.sent += count
+            self._drop_notice(embeds)
+            if embeds:
+                view = DetachedView(*buttons) if buttons else None
+                await self._send(None, embeds=embeds, view=view)
+        return False
+
+    async def _run(self) -> None:
+        assert self.queue is not None
+        while True:
+            item = await self.queue.get()
+            if item is STOP:
+                return
+            if not self._closed and self.queue.empty() and self._batchable(item):
+                # Give a burst a moment to arrive so it goes out as one message.
+                deadline = time.monotonic() + self.interval
+                while (
+                    self.queue.qsize() < MAX_EMBEDS - 1
+                    and time.monotonic() < deadline
+                ):
+                    await asyncio.sleep(0.1)
+            if await self._flush_from(item):
+                return
+
+    async def close(self, timeout: float = 10.0) -> None:
+        # Everything queued before this still goes out, in order.
+        self._closed = True
+        if self._task is None or self._task.done():
+            return
+        assert self.queue is not None
+        try:
+            await asyncio.wait_for(self.queue.put(STOP), timeout)
+            await asyncio.wait_for(self._task, timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        self._task = None
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "sent": self.sent,
+            "messages": self.messages,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
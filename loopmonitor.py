@@ -0,0 +1,181 @@
+import asyncio
+import os
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass
+
+import discord
+
+from metrics import gauge
+
+INTERVAL = 0.1
+THRESHOLD = float(os.getenv("LOOP_BLOCK_THRESHOLD", 0.25))
+DIGEST_INTERVAL = 15 * 60
+MAX_STACK = 15
+
+ROOT = os.path.abspath(os.getcwd())
+
+
+@dataclass
+class Blocker:
+    location: str
+    stack: str
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+
+def location(stack: traceback.StackSummary) -> str:
+    # The innermost frame of our own code is what needs fixing, not the
+    # library call it's stuck in.
+    for frame in reversed(stack):
+        path = os.path.abspath(frame.filename)
+        if path.startswith(ROOT) and "site-packages" not in path:
+            return f"{os.path.relpath(path, ROOT)}:{frame.lineno} in {frame.name}"
+    frame = stack[-1]
+    return f"{frame.filename}:{frame.lineno} in {frame.name}"
+
+
+class LoopMonitor:
+    def __init__(
+        self,
+        bot,
+        interval: float = INTERVAL,
+        threshold: float = THRESHOLD,
+        digest_interval: float = DIGEST_INTERVAL,
+    ) -> None:
+        self.bot = bot
+        self.interval = interval
+        self.threshold = threshold
+        self.digest_interval = digest_interval
+        self.blockers: dict[str, Blocker] = {}
+        self.ticks = 0
+        self.total_lag = 0.0
+        self.max_lag = 0.0
+        self.blocks = 0
+        self._beat = time.monotonic()
+        self._captured: Blocker | None = None
+        self._lock = threading.Lock()
+        self._loop_thread: int | None = None
+        self._stop = threading.Event()
+        self._task: asyncio.Task | None = None
+        self._digest: asyncio.Task | None = None
+        self._watchdog: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stop.clear()
+        self._task = asyncio.create_task(self._measure())
+        self._digest = asyncio.create_task(self._post_digests())
+        self._watchdog = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._watchdog.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        for task in (self._task, self._digest):
+            if task is not None:
+                task.cancel()
+        self._task = self._digest = None
+
+    async def _measure(self) -> None:
+        while True:
+            start = time.monotonic()
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            lag = max(0.0, now - start - self.interval)
+            with self._lock:
+                self._beat = now
+                self.ticks += 1
+                self.total_lag += lag
+                self.max_lag = max(self.max_lag, lag)
+                # The watchdog saw this block while it was happening, now we
+                # know how long it took.
+                blocker, self._captured = self._captured, None
+                if blocker is not None:
+                    blocker.total += lag
+                    blocker.max = max(blocker.max, lag)
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval / 2):
+            with self._lock:
+                blocked = time.monotonic() - self._beat
+                if blocked < self.threshold or self._captured is not None:
+                    continue
+            frame = sys._current_frames().get(self._loop_thread)  # type: ignore
+            if frame is None:
+                continue
+            stack = traceback.extract_stack(frame)[-MAX_STACK:]
+            del frame
+            key = location(stack)
+            with self._lock:
+                blocker = self.blockers.get(key)
+                if blocker is None:
+                    blocker = self.blockers[key] = Blocker(
+                        key, "".join(traceback.format_list(stack))
+                    )
+                blocker.count += 1
+                self.blocks += 1
+                self._captured = blocker
+
+    def take(self) -> tuple[list[Blocker], dict[str, float]]:
+        with self._lock:
+            blockers = sorted(
+                self.blockers.values(), key=lambda b: b.total, reverse=True
+            )
+            stats = self.stats()
+            self.blockers = {}
+            self.ticks = 0
+            self.total_lag = 0.0
+            self.max_lag = 0.0
+            self.blocks = 0
+        return blockers, stats
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "avg_lag": self.total_lag / self.ticks if self.ticks else 0.0,
+            "max_lag": self.max_lag,
+            "blocks": self.blocks,
+        }
+
+    def metric_lines(self):
+        yield from gauge(
+            "clearbot_loop_lag_seconds",
+            "Event loop lag since the last digest.",
+            {
+                "avg": self.stats()["avg_lag"],
+                "max": self.max_lag,
+            },
+            "stat",
+        )
+
+    def digest(self, blockers: list[Blocker], stats: dict[str, float]) -> discord.Embed:
+        embed = discord.Embed(
+            title=f"Event loop blocked {int(stats['blocks'])} time(s)",
+            description=(
+                f"Lag over the last {round(self.digest_interval / 60)} minutes: "
+                f"avg {round(stats['avg_lag']*1000)}ms, max {round(stats['max_lag']*1000)}ms"
+            ),
+            colour=self.bot.color(1),
+        )
+        for blocker in blockers[:3]:
+            embed.add_field(
+                name=f"{blocker.count}x, max {round(blocker.max*1000)}ms: {blocker.location}"[:256],
+                value=f"```py\n{blocker.stack[-900:]}\n```",
+                inline=False,
+            )
+        return embed
+
+    async def _post_digests(self) -> None:
+        # At most one message per interval, and only if something blocked.
+        while True:
+            await asyncio.sleep(self.digest_interval)
+            blockers, stats = self.take()
+            if blockers:
+                await self.bot.send_log(embed=self.digest(blockers, stats))
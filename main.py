@@ -13,25 +13,24 @@ from exceptions import UserNotVA, UserVABanned
 from discord.ext import commands
 from discord.ext.pages import PaginatorButton
 from bot import ClearBot, RulesView, VAStartView
+from emojis import has_emoji
+from metrics import metrics
 
 
 bot = ClearBot(intents=discord.Intents.all())
 
 
-async def get_airports(ctx: discord.AutocompleteContext):
-    if ctx.value == "":
-        return ["Start typing the name of an airport for results to appear (e.g. KJFK)"]
-
-    value = ctx.value.lower().replace("‘", "'").replace("’", "'")
-
-    return [airport for airport in bot.airports_ac if (value in airport.lower())]
-
-
 roles = bot.roles
 
 @bot.listen()
 async def on_ready():
     os.makedirs("database", exist_ok=True)
+    if not has_emoji():
+        print(
+            "\033[34m|\033[0m Emoji store missing, run emojis.py to draw emoji as images"
+        )
+    await metrics.start_from_env()
+    bot.loop_monitor.start()
     gc.collect()
     if bot.user:
         bot.bot_id = bot.user.id
@@ -53,10 +52,16 @@ async def on_ready():
         print("| DEV MODE")
 
 
+@bot.listen()
+async def on_application_command_completion(ctx: discord.ApplicationContext):
+    bot.command_timings.record(ctx)
+
+
 @bot.listen()
 async def on_application_command_error(
     ctx: discord.ApplicationContext, error: discord.DiscordException
 ):
+    bot.command_timings.record(ctx, failed=True)
     notHandled = True
     if isinstance(error, commands.CommandOnCooldown):
         embed = discord.Embed(
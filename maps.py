@@ -0,0 +1,546 @@
+import asyncio
+import json
+import math
+import os
+import time
+from collections import Counter
+from importlib.metadata import PackageNotFoundError, version
+
+import aiofiles
+import aiofiles.os
+import aiohttp
+import numpy as np
+import plotly.graph_objects as go
+import plotly.io as pio
+from PIL import Image, ImageDraw, ImageOps
+
+from assets import registry
+from metrics import TRACE_CONFIGS
+
+Coords = tuple[float, float]
+
+# The same topojson plotly draws its geo maps from.
+BASEMAP_URL = "https://cdn.plot.ly/world_50m.json"
+BASEMAP_PATH = os.path.join("cache", "world_50m.json")
+
+try:
+    KALEIDO_VERSION = version("kaleido")
+except PackageNotFoundError:
+    KALEIDO_VERSION = None
+
+FILL_LAYERS = ["land", "lakes"]
+LINE_LAYERS = ["rivers", "countries", "coastlines"]
+
+MAP_COLORS = {
+    0: {
+        "ocean": "#142533",
+        "land": "#093961",
+        "lakes": "#142533",
+        "rivers": "#142533",
+        "countries": "#2681b4",
+        "coastlines": "#2681b4",
+        "route": "#6db2d9",
+    },
+    1: {
+        "ocean": "#1d1411",
+        "land": "#4a2c0a",
+        "lakes": "#1d1411",
+        "rivers": "#1d1411",
+        "countries": "#fd852d",
+        "coastlines": "#fd852d",
+        "route": "#feb32d",
+    },
+    2: {
+        "ocean": "#0f1f14",
+        "land": "#770012",
+        "lakes": "#0f1f14",
+        "rivers": "#0f1f14",
+        "countries": "#00a628",
+        "coastlines": "#00a628",
+        "route": "#f2c14e",
+    },
+}
+
+
+def content_bbox(image: Image.Image) -> tuple[int, int, int, int] | None:
+    # Anything that isn't pure white is map content.
+    return ImageOps.invert(image.convert("L")).getbbox()
+
+
+def crop_map(image: Image.Image) -> Image.Image:
+    bbox = content_bbox(image)
+    if bbox is None:
+        return image
+
+    left, upper, right, lower = bbox
+    # Same box the old per-pixel loop produced, which drops the outer edge.
+    return image.crop((left, upper + 1, right - 1, lower - 1))
+
+
+def route_widths(routes: list[tuple[Coords, Coords]]) -> dict:
+    # Direction doesn't matter on the map, KJFK-EGLL and EGLL-KJFK are one line.
+    counts = Counter(tuple(sorted(route)) for route in routes)
+
+    # Routes flown more often get a thicker line.
+    return {route: 2 + min(3, int(math.log2(count))) for route, count in counts.items()}
+
+
+def route_traces(
+    routes: list[tuple[Coords, Coords]],
+    color: str = "#6db2d9",
+) -> list[go.Scattergeo]:
+    route_width = route_widths(routes)
+    widths: dict[int, list[tuple[Coords, Coords]]] = {}
+    for route, width in route_width.items():
+        widths.setdefault(width, []).append(route)
+
+    # One line trace per width.
+    traces = []
+    for width, width_routes in sorted(widths.items()):
+        lat, lon = [], []
+        for origin, destination in width_routes:
+            lat += [origin[0], destination[0], None]
+            lon += [origin[1], destination[1], None]
+        traces.append(
+            go.Scattergeo(
+                lat=lat,
+                lon=lon,
+                mode="lines",
+                line=dict(color=color, width=width),
+            )
+        )
+
+    airports = list(dict.fromkeys(coords for route in route_width for coords in route))
+    traces.append(
+        go.Scattergeo(
+            lat=[coords[0] for coords in airports],
+            lon=[coords[1] for coords in airports],
+            mode="markers",
+            marker=dict(
+                symbol="circle",
+                color="#ffffff",
+                size=5,
+                line=dict(color=color, width=1),
+            ),
+        )
+    )
+    return traces
+
+
+def equirectangular(lon: np.ndarray, lat: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    return np.radians(lon), np.radians(lat)
+
+
+def mercator(lon: np.ndarray, lat: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    phi = np.radians(np.clip(lat, -85, 85))
+    return np.radians(lon), np.log(np.tan(np.pi / 4 + phi / 2))
+
+
+def miller(lon: np.ndarray, lat: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    phi = np.radians(lat)
+    return np.radians(lon), 1.25 * np.log(np.tan(np.pi / 4 + 0.4 * phi))
+
+
+def natural_earth(lon: np.ndarray, lat: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    lam, phi = np.radians(lon), np.radians(lat)
+    phi2 = phi * phi
+    phi4 = phi2 * phi2
+    x = lam * (
+        0.8707
+        - 0.131979 * phi2
+        + phi4 * (-0.013791 + phi4 * (0.003971 * phi2 - 0.001529 * phi4))
+    )
+    y = phi * (
+        1.007226
+        + phi2 * (0.015085 + phi4 * (-0.044475 + 0.028874 * phi2 - 0.005916 * phi4))
+    )
+    return x, y
+
+
+PROJECTIONS = {
+    "equirectangular": equirectangular,
+    "mercator": mercator,
+    "miller": miller,
+    "natural earth": natural_earth,
+}
+
+
+def project(projection: str, lonlat: np.ndarray) -> np.ndarray:
+    x, y = PROJECTIONS[projection](lonlat[:, 0], lonlat[:, 1])
+    return np.column_stack((x, y))
+
+
+def sphere_outline() -> np.ndarray:
+    lat = np.linspace(-90, 90, 181)
+    lon = np.linspace(-180, 180, 361)
+    return np.column_stack(
+        (
+            np.concatenate((np.full(181, -180.0), lon, np.full(181, 180.0), lon[::-1])),
+            np.concatenate((lat, np.full(361, 90.0), lat[::-1], np.full(361, -90.0))),
+        )
+    )
+
+
+def great_circle(origin: Coords, destination: Coords, steps: int = 64) -> list:
+    lat1, lon1, lat2, lon2 = map(math.radians, (*origin, *destination))
+    p1 = np.array(
+        [
+            math.cos(lat1) * math.cos(lon1),
+            math.cos(lat1) * math.sin(lon1),
+            math.sin(lat1),
+        ]
+    )
+    p2 = np.array(
+        [
+            math.cos(lat2) * math.cos(lon2),
+            math.cos(lat2) * math.sin(lon2),
+            math.sin(lat2),
+        ]
+    )
+    omega = math.acos(max(-1.0, min(1.0, float(p1 @ p2))))
+    if omega < 1e-9:
+        return [np.array([[origin[1], origin[0]], [destination[1], destination[0]]])]
+
+    t = np.linspace(0, 1, steps)[:, None]
+    points = (np.sin((1 - t) * omega) * p1 + np.sin(t * omega) * p2) / math.sin(omega)
+    lon = np.degrees(np.arctan2(points[:, 1], points[:, 0]))
+    lat = np.degrees(np.arcsin(np.clip(points[:, 2], -1, 1)))
+
+    # Split where the arc wraps around the antimeridian, ending both halves on it.
+    segments = []
+    start = 0
+    for i in np.nonzero(np.abs(np.diff(lon)) > 180)[0]:
+        edge = 180.0 if lon[i] > 0 else -180.0
+        span = (edge - lon[i]) / ((lon[i + 1] + 2 * edge) - lon[i])
+        edge_lat = lat[i] + (lat[i + 1] - lat[i]) * span
+        segments.append(
+            np.vstack(
+                (
+                    np.column_stack((lon[start : i + 1], lat[start : i + 1])),
+                    [edge, edge_lat],
+                )
+            )
+        )
+        lon[i] = -edge
+        lat[i] = edge_lat
+        start = i
+    segments.append(np.column_stack((lon[start:], lat[start:])))
+    return segments
+
+
+def decode_arcs(topo: dict) -> list[np.ndarray]:
+    transform = topo.get("transform")
+    arcs = []
+    for arc in topo["arcs"]:
+        points = np.array([point[:2] for point in arc], dtype=float).reshape(-1, 2)
+        if transform:
+            points = (
+                np.cumsum(points, axis=0) * transform["scale"] + transform["translate"]
+            )
+        arcs.append(points)
+    return arcs
+
+
+def join_arcs(arcs: list[np.ndarray], indexes: list[int]) -> np.ndarray:
+    parts = []
+    for i in indexes:
+        part = arcs[i] if i >= 0 else arcs[~i][::-1]
+        parts.append(part[1:] if parts else part)
+    return np.concatenate(parts)
+
+
+def geometry_rings(arcs: list[np.ndarray], geometry: dict, exterior_only: bool):
+    match geometry.get("type"):
+        case "GeometryCollection":
+            for child in geometry["geometries"]:
+                yield from geometry_rings(arcs, child, exterior_only)
+        case "LineString":
+            yield join_arcs(arcs, geometry["arcs"])
+        case "MultiLineString":
+            for line in geometry["arcs"]:
+                yield join_arcs(arcs, line)
+        case "Polygon":
+            rings = geometry["arcs"][:1] if exterior_only else geometry["arcs"]
+            for ring in rings:
+                yield join_arcs(arcs, ring)
+        case "MultiPolygon":
+            for polygon in geometry["arcs"]:
+                rings = polygon[:1] if exterior_only else polygon
+                for ring in rings:
+                    yield join_arcs(arcs, ring)
+
+
+class View:
+    def __init__(self, bounds: tuple[float, float, float, float], size: int) -> None:
+        x0, y0, x1, y1 = bounds
+        self.bounds = bounds
+        self.scale = size / max(x1 - x0, y1 - y0)
+        self.width = max(1, round((x1 - x0) * self.scale))
+        self.height = max(1, round((y1 - y0) * self.scale))
+
+    def points(self, xy: np.ndarray) -> list[float]:
+        x0, _, _, y1 = self.bounds
+        return ((xy - (x0, y1)) * (self.scale, -self.scale)).ravel().tolist()
+
+    def visible(self, bbox: tuple[float, float, float, float]) -> bool:
+        x0, y0, x1, y1 = self.bounds
+        return not (bbox[2] < x0 or bbox[0] > x1 or bbox[3] < y0 or bbox[1] > y1)
+
+
+class Basemap:
+    def __init__(self, path: str = BASEMAP_PATH) -> None:
+        with open(path, "r") as f:
+            topo = json.load(f)
+
+        arcs = decode_arcs(topo)
+        self.layers: dict[str, list[np.ndarray]] = {}
+        for name in FILL_LAYERS + LINE_LAYERS:
+            if name in topo["objects"]:
+                self.layers[name] = [
+                    ring
+                    for ring in geometry_rings(
+                        arcs, topo["objects"][name], name in FILL_LAYERS
+                    )
+                    if len(ring) > 1
+                ]
+
+        self._projected: dict[str, dict] = {}
+        self._rasters: dict[tuple, Image.Image] = {}
+
+    def projected(self, projection: str) -> dict:
+        if projection not in self._projected:
+            layers = {}
+            for name, rings in self.layers.items():
+                layers[name] = []
+                for ring in rings:
+                    xy = project(projection, ring)
+                    bbox = (*xy.min(axis=0), *xy.max(axis=0))
+                    layers[name].append((xy, bbox))
+            outline = project(projection, sphere_outline())
+            self._projected[projection] = {
+                "layers": layers,
+                "outline": outline,
+                "bounds": (*outline.min(axis=0), *outline.max(axis=0)),
+            }
+        return self._projected[projection]
+
+    def draw(self, projection: str, theme: int, view: View) -> Image.Image:
+        colors = MAP_COLORS.get(theme, MAP_COLORS[0])
+        geo = self.projected(projection)
+
+        img = Image.new("RGB", (view.width, view.height), (255, 255, 255))
+        draw = ImageDraw.Draw(img)
+        draw.polygon(view.points(geo["outline"]), fill=colors["ocean"])
+        for name, rings in geo["layers"].items():
+            for xy, bbox in rings:
+                if not view.visible(bbox):
+                    continue
+                if name in FILL_LAYERS:
+                    if len(xy) > 2:
+                        draw.polygon(view.points(xy), fill=colors[name])
+                else:
+                    draw.line(view.points(xy), fill=colors[name], width=1)
+        return img
+
+    def world(self, projection: str, theme: int, size: int) -> Image.Image:
+        key = (projection, theme, size)
+        if key not in self._rasters:
+            view = View(self.projected(projection)["bounds"], size)
+            self._rasters[key] = self.draw(projection, theme, view)
+        return self._rasters[key].copy()
+
+
+_basemap: Basemap | None = None
+
+
+def basemap() -> Basemap:
+    global _basemap
+    if _basemap is None:
+        _basemap = Basemap()
+    return _basemap
+
+
+def native_available(projection: str) -> bool:
+    return (
+        os.getenv("MAP_RENDERER", "native") == "native"
+        and projection in PROJECTIONS
+        and os.path.exists(BASEMAP_PATH)
+    )
+
+
+async def download_basemap(url: str = BASEMAP_URL, path: str = BASEMAP_PATH) -> bool:
+    if os.path.exists(path):
+        return True
+
+    try:
+        async with aiohttp.ClientSession(trace_configs=TRACE_CONFIGS) as cs:
+            async with cs.get(url) as resp:
+                if resp.status != 200:
+                    return False
+                data = await resp.read()
+    except (aiohttp.ClientError, TimeoutError):
+        return False
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    async with aiofiles.open(path + ".tmp", "wb") as f:
+        await f.write(data)
+    await aiofiles.os.replace(path + ".tmp", path)
+    return True
+
+
+def zoom_bounds(
+    points: np.ndarray, world: tuple[float, float, float, float]
+) -> tuple[float, float, float, float]:
+    x0, y0 = points.min(axis=0)
+    x1, y1 = points.max(axis=0)
+    # Pad around the flights, and don't zoom in further than ~5% of the world.
+    pad = max(x1 - x0, y1 - y0) * 0.1 + (world[2] - world[0]) * 0.025
+    return (
+        max(world[0], x0 - pad),
+        max(world[1], y0 - pad),
+        min(world[2], x1 + pad),
+        min(world[3], y1 + pad),
+    )
+
+
+def render_flight_map(
+    routes: list[tuple[Coords, Coords]],
+    projection: str = "equirectangular",
+    theme: int = 0,
+    auto_zoom: bool = False,
+    labels: list[tuple[Coords, str]] | None = None,
+    marker_line: int = 1,
+    label_size: int = 12,
+    size: int = 2048,
+) -> Image.Image:
+    base = basemap()
+    colors = MAP_COLORS.get(theme, MAP_COLORS[0])
+    world = base.projected(projection)["bounds"]
+
+    widths = route_widths(routes)
+    arcs = [
+        (project(projection, segment), width)
+        for route, width in widths.items()
+        for segment in great_circle(*route)
+    ]
+    airports = list(dict.fromkeys(coords for route in widths for coords in route))
+    airports_xy = (
+        project(projection, np.array([(lon, lat) for lat, lon in airports]))
+        if airports
+        else np.empty((0, 2))
+    )
+
+    if auto_zoom and airports:
+        view = View(
+            zoom_bounds(np.vstack([xy for xy, _ in arcs] + [airports_xy]), world),
+            size,
+        )
+        img = base.draw(projection, theme, view)
+    else:
+        view = View(world, size)
+        img = base.world(projection, theme, size)
+
+    draw = ImageDraw.Draw(img)
+    for xy, width in sorted(arcs, key=lambda arc: arc[1]):
+        draw.line(view.points(xy), fill=colors["route"], width=width, joint="curve")
+
+    radius = (5 + marker_line) / 2
+    for x, y in np.reshape(view.points(airports_xy), (-1, 2)):
+        draw.ellipse(
+            (x - radius, y - radius, x + radius, y + radius),
+            fill=(255, 255, 255),
+            outline=colors["route"],
+            width=marker_line,
+        )
+
+    if labels:
+        font = registry.font("inter", label_size)
+        for (lat, lon), text in labels:
+            x, y = view.points(project(projection, np.array([[lon, lat]])))
+            draw.text(
+                (x, y - radius - 2),
+                text,
+                fill=(255, 255, 255),
+                font=font,
+                anchor="md",
+            )
+    return img
+
+
+def restart_kaleido() -> bool:
+    # Kaleido 0.2 has no public way to kill its chromium. The private call is
+    # only made on the version pinned in requirements.txt.
+    scope = pio.kaleido.scope
+    if scope is None or not (KALEIDO_VERSION or "").startswith("0.2."):
+        return False
+    scope._shutdown_kaleido()
+    return True
+
+
+class PlotlyRenderer:
+    def __init__(self, concurrency: int | None = None) -> None:
+        if concurrency is None:
+            concurrency = int(os.getenv("KALEIDO_CONCURRENCY", 1))
+        self.concurrency = max(1, concurrency)
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self.ready = False
+        self.queued = 0
+        self.count = 0
+        self.failed = 0
+        self.restarts = 0
+        self.total_time = 0.0
+        self.max_time = 0.0
+        self.last_time = 0.0
+
+    @property
+    def avg_time(self) -> float:
+        return self.total_time / self.count if self.count else 0.0
+
+    def _to_image(self, fig: go.Figure, width: int, height: int) -> bytes:
+        try:
+            return pio.to_image(fig, format="png", width=width, height=height)
+        except Exception:
+            # Kill whatever is left of chromium, the retry starts a fresh one.
+            if not restart_kaleido():
+                raise
+            self.restarts += 1
+            return pio.to_image(fig, format="png", width=width, height=height)
+
+    async def start(self) -> None:
+        if self.ready:
+            return
+
+        # Launch chromium and fetch the geo topojson once, before anyone waits on it.
+        fig = go.Figure(go.Scattergeo(lat=[0], lon=[0]))
+        fig.update_geos(resolution=50)
+        try:
+            await self.render(fig, width=64, height=64)
+        except Exception as e:
+            print(f"\033[34m|\033[0m \033[31mKaleido warmup failed: {e}\033[0m")
+            return
+        self.ready = True
+
+    async def render(
+        self, fig: go.Figure, width: int = 2048, height: int = 2048
+    ) -> bytes:
+        self.queued += 1
+        waiting = True
+        try:
+            async with self._semaphore:
+                self.queued -= 1
+                waiting = False
+                start = time.perf_counter()
+                data = await asyncio.to_thread(self._to_image, fig, width, height)
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            if waiting:
+                self.queued -= 1
+
+        elapsed = time.perf_counter() - start
+        self.count += 1
+        self.total_time += elapsed
+        self.max_time = max(self.max_time, elapsed)
+        self.last_time = elapsed
+        return data
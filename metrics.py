@@ -0,0 +1,238 @@
+import math
+import os
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Iterable
+
+import aiohttp
+from aiohttp import web
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def number(value: float) -> str:
+    # The text format spells these differently from Python's repr.
+    value = float(value)
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, label: str) -> None:
+        self.name = name
+        self.help = help
+        self.label = label
+        self.values: dict[str, float] = {}
+
+    def inc(self, label: str, amount: float = 1) -> None:
+        self.values[label] = self.values.get(label, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for label, value in sorted(self.values.items()):
+            yield f'{self.name}{{{self.label}="{escape(label)}"}} {number(value)}'
+
+
+class Histogram:
+    def __init__(
+        self, name: str, help: str, label: str, buckets: tuple = BUCKETS
+    ) -> None:
+        self.name = name
+        self.help = help
+        self.label = label
+        # +Inf is always the last bucket, so it's never listed twice.
+        self.buckets = tuple(bound for bound in buckets if not math.isinf(bound))
+        # label -> [per bucket counts (last one is +Inf), sum]
+        self.values: dict[str, tuple[list[int], list[float]]] = {}
+
+    def observe(self, label: str, seconds: float) -> None:
+        try:
+            counts, total = self.values[label]
+        except KeyError:
+            counts, total = self.values[label] = ([0] * (len(self.buckets) + 1), [0.0])
+        counts[bisect_left(self.buckets, seconds)] += 1
+        total[0] += seconds
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for label, (counts, total) in sorted(self.values.items()):
+            label = f'{self.label}="{escape(label)}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                yield f'{self.name}_bucket{{{label},le="{number(bound)}"}} {cumulative}'
+            cumulative += counts[-1]
+            yield f'{self.name}_bucket{{{label},le="+Inf"}} {cumulative}'
+            yield f"{self.name}_sum{{{label}}} {number(total[0])}"
+            yield f"{self.name}_count{{{label}}} {cumulative}"
+
+
+def gauge(
+    name: str,
+    help: str,
+    values: dict[str, float],
+    label: str | None = None,
+    type: str = "gauge",
+) -> Iterable[str]:
+    # For values that are already tracked elsewhere and only read on scrape.
+    yield f"# HELP {name} {help}"
+    yield f"# TYPE {name} {type}"
+    for key, value in sorted(values.items()):
+        labels = f'{{{label}="{escape(key)}"}}' if label else ""
+        yield f"{name}{labels} {number(value)}"
+
+
+class Metrics:
+    def __init__(self) -> None:
+        # Nothing is recorded until the endpoint is started.
+        self.enabled = False
+        self.commands = Histogram(
+            "clearbot_command_seconds", "Slash command latency.", "command"
+        )
+        self.command_errors = Counter(
+            "clearbot_command_errors_total", "Slash commands that failed.", "command"
+        )
+        self.db = Histogram(
+            "clearbot_db_query_seconds", "Database query time.", "statement"
+        )
+        self.http = Histogram(
+            "clearbot_http_request_seconds", "Outbound HTTP request latency.", "host"
+        )
+        self.http_errors = Counter(
+            "clearbot_http_errors_total", "Outbound HTTP requests that failed.", "host"
+        )
+        self.renders = Histogram(
+            "clearbot_render_seconds", "Image render job wall time.", "job"
+        )
+        self.caches: dict[str, object] = {}
+        self.collectors: list[Callable[[], Iterable[str]]] = []
+        self.scrapes = 0
+        self._runner: web.AppRunner | None = None
+
+    def watch_cache(self, name: str, cache) -> None:
+        self.caches[name] = cache
+
+    def collect(self, collector: Callable[[], Iterable[str]]) -> None:
+        self.collectors.append(collector)
+
+    def command_finished(self, name: str, wall: float, failed: bool = False) -> None:
+        if not self.enabled:
+            return
+        self.commands.observe(name, wall)
+        if failed:
+            self.command_errors.inc(name)
+
+    @contextmanager
+    def timed(self, histogram: Histogram, label: str):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            histogram.observe(label, time.perf_counter() - start)
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        config = aiohttp.TraceConfig()
+
+        async def on_start(session, ctx, params) -> None:
+            ctx.start = time.perf_counter()
+
+        async def on_end(session, ctx, params) -> None:
+            if self.enabled:
+                elapsed = time.perf_counter() - ctx.start
+                self.http.observe(params.url.host or "", elapsed)
+
+        async def on_error(session, ctx, params) -> None:
+            if self.enabled:
+                self.http_errors.inc(params.url.host or "")
+
+        config.on_request_start.append(on_start)
+        config.on_request_end.append(on_end)
+        config.on_request_exception.append(on_error)
+        return config
+
+    def render(self) -> str:
+        self.scrapes += 1
+        lines = []
+        for metric in (
+            self.commands,
+            self.command_errors,
+            self.db,
+            self.http,
+            self.http_errors,
+            self.renders,
+        ):
+            lines.extend(metric.render())
+        lines.extend(
+            gauge(
+                "clearbot_cache_hits_total",
+                "Cache hits.",
+                {name: cache.hits for name, cache in self.caches.items()},  # type: ignore
+                "cache",
+                "counter",
+            )
+        )
+        lines.extend(
+            gauge(
+                "clearbot_cache_misses_total",
+                "Cache misses.",
+                {name: cache.misses for name, cache in self.caches.items()},  # type: ignore
+                "cache",
+                "counter",
+            )
+        )
+        for collector in self.collectors:
+            lines.extend(collector())
+        return "\n".join(lines) + "\n"
+
+    async def handle(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.render(), content_type="text/plain")
+
+    async def start(self, port: int, host: str = "127.0.0.1") -> None:
+        if self._runner is not None:
+            return
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        self.enabled = True
+        print(f"\033[34m|\033[0m Metrics available on http://{host}:{port}/metrics")
+
+    async def stop(self) -> None:
+        self.enabled = False
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def start_from_env(self) -> None:
+        port = os.getenv("METRICS_PORT")
+        if port:
+            await self.start(int(port), os.getenv("METRICS_HOST", "127.0.0.1"))
+
+
+metrics = Metrics()
+TRACE_CONFIGS = [metrics.trace_config()]
+
+
+async def timed_execute(db, label: str, sql: str, params=None):
+    # Takes an aiosqlite connection or cursor, label is "<table>.<statement>".
+    with metrics.timed(metrics.db, label):
+        return await db.execute(sql, params)
+
+
+async def timed_executemany(db, label: str, sql: str, params):
+    with metrics.timed(metrics.db, label):
+        return await db.executemany(sql, params)
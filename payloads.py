@@ -0,0 +1,93 @@
+import json
+import time
+
+import aiosqlite
+import discord
+
+from bot import DB
+from metrics import metrics, timed_execute
+
+RETENTION = 30 * 24 * 3600
+PRUNE_INTERVAL = 3600
+
+
+class PayloadButton(discord.ui.Button):
+    # Clicks are routed by custom_id, so the view store never has to keep
+    # a reference to the button.
+    def is_dispatchable(self) -> bool:
+        return False
+
+
+def payload_button(kind: str, payload_id: int, **kwargs) -> PayloadButton:
+    return PayloadButton(custom_id=f"log:{kind}:{payload_id}", **kwargs)
+
+
+def parse_custom_id(custom_id: str) -> tuple[str, int] | None:
+    parts = custom_id.split(":")
+    if len(parts) != 3 or parts[0] != "log" or not parts[2].isdigit():
+        return None
+    return parts[1], int(parts[2])
+
+
+class LogPayloads:
+    def __init__(self, db_path: str = DB["main"], retention: int = RETENTION) -> None:
+        self.db_path = db_path
+        self.retention = retention
+        self._ready = False
+        self._pruned_at = 0.0
+
+    async def setup(self) -> None:
+        if self._ready:
+            return
+        async with aiosqlite.connect(self.db_path) as db:
+            await timed_execute(
+                db,
+                "log_payloads.create",
+                "CREATE TABLE IF NOT EXISTS log_payloads (id INTEGER PRIMARY KEY, kind TEXT, data TEXT, created_at INTEGER)",
+            )
+            await timed_execute(
+                db,
+                "log_payloads.create",
+                "CREATE INDEX IF NOT EXISTS log_payloads_created_at ON log_payloads (created_at)",
+            )
+            await db.commit()
+        self._ready = True
+
+    async def add(self, kind: str, data: dict) -> int:
+        await self.setup()
+        with metrics.timed(metrics.db, "log_payloads.insert"):
+            async with aiosqlite.connect(self.db_path) as db:
+                cur = await db.execute(
+                    "INSERT INTO log_payloads (kind, data, created_at) VALUES (?, ?, ?)",
+                    (kind, json.dumps(data), round(time.time())),
+                )
+                await db.commit()
+                payload_id = cur.lastrowid
+        if time.monotonic() - self._pruned_at > PRUNE_INTERVAL:
+            await self.prune()
+        return payload_id  # type: ignore
+
+    async def get(self, kind: str, payload_id: int) -> dict | None:
+        await self.setup()
+        async with aiosqlite.connect(self.db_path) as db:
+            cur = await timed_execute(
+                db,
+                "log_payloads.select",
+                "SELECT data FROM log_payloads WHERE id=? AND kind=? AND created_at>=?",
+                (payload_id, kind, round(time.time()) - self.retention),
+            )
+            row = await cur.fetchone()
+        return json.loads(row[0]) if row else None
+
+    async def prune(self) -> int:
+        await self.setup()
+        self._pruned_at = time.monotonic()
+        async with aiosqlite.connect(self.db_path) as db:
+            cur = await timed_execute(
+                db,
+                "log_payloads.delete",
+                "DELETE FROM log_payloads WHERE created_at<?",
+                (round(time.time()) - self.retention,),
+            )
+            await db.commit()
+            return cur.rowcount
@@ -0,0 +1,117 @@
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+MAX_SECONDS = 60
+SAMPLE_HZ = 100
+MAX_DEPTH = 64
+TOP = 40
+
+_lock = asyncio.Lock()
+
+
+def frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+def sample_thread(thread_id: int, seconds: float, hz: int = SAMPLE_HZ) -> Counter:
+    # Runs in its own thread, the loop only pays for the GIL handoffs.
+    stacks: Counter = Counter()
+    interval = 1 / hz
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        names = []
+        while frame is not None and len(names) < MAX_DEPTH:
+            names.append(frame_name(frame))
+            frame = frame.f_back
+        del frame
+        if names:
+            stacks[";".join(reversed(names))] += 1
+        time.sleep(interval)
+    return stacks
+
+
+def summarize(stacks: Counter) -> str:
+    total = sum(stacks.values()) or 1
+    own: Counter = Counter()
+    for stack, count in stacks.items():
+        own[stack.rsplit(";", 1)[-1]] += count
+    lines = [f"{total} samples, top functions by own time:"]
+    for name, count in own.most_common(TOP):
+        lines.append(f"{count / total * 100:6.2f}% {count:>6} {name}")
+    return "\n".join(lines)
+
+
+async def sample(seconds: float) -> dict[str, str]:
+    stacks = await asyncio.to_thread(sample_thread, threading.get_ident(), seconds)
+    collapsed = "\n".join(
+        f"{stack} {count}" for stack, count in stacks.most_common()
+    )
+    return {"summary.txt": summarize(stacks), "profile.collapsed": collapsed}
+
+
+async def profile(seconds: float) -> dict[str, str]:
+    # Deterministic, so it sees everything on the loop, but costs more.
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.disable()
+    out = io.StringIO()
+    stats = pstats.Stats(profiler, stream=out)
+    stats.sort_stats("cumulative").print_stats(TOP)
+    stats.sort_stats("tottime").print_stats(TOP)
+    return {"summary.txt": out.getvalue()}
+
+
+def diff_snapshots(before, after) -> str:
+    filters = [
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ]
+    diff = after.filter_traces(filters).compare_to(
+        before.filter_traces(filters), "lineno"
+    )
+    return "\n".join(str(stat) for stat in diff[:TOP])
+
+
+async def allocations(seconds: float, job) -> tuple[dict[str, str], str]:
+    # One frame per trace is all the lineno diff needs, and keeps overhead low.
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start(1)
+    try:
+        before = await asyncio.to_thread(tracemalloc.take_snapshot)
+        files = await job(seconds)
+        after = await asyncio.to_thread(tracemalloc.take_snapshot)
+    finally:
+        if started:
+            tracemalloc.stop()
+
+    # Filtering and diffing a large heap takes seconds, keep it off the loop.
+    return files, await asyncio.to_thread(diff_snapshots, before, after)
+
+
+async def capture(
+    seconds: float, mode: str = "sampling", memory: bool = False
+) -> dict[str, str]:
+    if _lock.locked():
+        raise ValueError("A profile is already running.")
+    seconds = max(1.0, min(float(seconds), MAX_SECONDS))
+    job = profile if mode == "cprofile" else sample
+    async with _lock:
+        if not memory:
+            return await job(seconds)
+        files, diff = await allocations(seconds, job)
+        files["allocations.txt"] = diff
+        return files
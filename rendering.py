@@ -0,0 +1,554 @@
+import asyncio
+import io
+import os
+import textwrap
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import ClassVar
+
+from numerize import numerize as n
+from pilmoji import Pilmoji
+from PIL import Image, ImageDraw, ImageFont
+
+from assets import registry
+from avatars import variant
+from emojis import emoji_source
+from encoding import encode, extension, sniff_extension
+from maps import BASEMAP_PATH, basemap, crop_map, render_flight_map
+from metrics import metrics
+
+LEVEL_COLORS = {
+    0: {0: (9, 57, 97), 1: (38, 129, 180)},
+    1: {0: (253, 133, 45), 1: (254, 179, 45)},
+    2: {0: (119, 0, 18), 1: (0, 166, 40)},
+}
+
+
+@dataclass
+class LevelCardJob:
+    kind: ClassVar[str] = "photo_card"
+
+    theme: int
+    name: str
+    level: int
+    nom: int
+    denom: int
+    avatar_key: str
+    avatar: bytes
+
+
+@dataclass
+class LeaderboardJob:
+    kind: ClassVar[str] = "emoji_card"
+
+    theme: int
+    names: list[str]
+    values: list[str]
+    values_x: int = 800
+    crop: bool = False
+
+
+@dataclass
+class FlightCardJob:
+    kind: ClassVar[str] = "card"
+
+    theme: int
+    flight_number: str
+    origin: str
+    destination: str
+    pilot: str
+    aircraft: str
+    flight_time: str
+    distance: str
+    metar: str
+    time_str: str
+
+
+@dataclass
+class QuoteJob:
+    kind: ClassVar[str] = "photo_card"
+
+    avatar_key: str
+    avatar: bytes
+    text: str
+    author: str
+
+
+@dataclass
+class MemeJob:
+    kind: ClassVar[str] = "meme"
+
+    image: bytes
+    top_text: str | None
+    bottom_text: str | None
+    text_size: int
+    bars: bool = False
+
+
+@dataclass
+class FlagGameJob:
+    kind: ClassVar[str] = "emoji_card"
+
+    text: str
+
+
+@dataclass
+class MapCropJob:
+    kind: ClassVar[str] = "map"
+
+    image: bytes
+
+
+@dataclass
+class FlightMapJob:
+    kind: ClassVar[str] = "map"
+
+    routes: list[tuple[tuple[float, float], tuple[float, float]]]
+    projection: str
+    theme: int
+    auto_zoom: bool
+    labels: list[tuple[tuple[float, float], str]] | None = None
+    marker_line: int = 1
+    label_size: int = 12
+
+
+def render_level_card(job: LevelCardJob) -> Image.Image:
+    x1, y1 = 860, 547
+    x2, y2 = 2740, 710
+    img = registry.template("userlevel", job.theme)
+    colors = LEVEL_COLORS[job.theme]
+    masked = variant(job.avatar_key, job.avatar, "round_612")
+    font = registry.font("inter", 100, basic=True)
+    fontbig = registry.font("inter", 150, basic=True)
+    img.paste(masked, (49, 82), mask=masked)
+    with Pilmoji(img, source=emoji_source) as pilmoji:
+        pilmoji.text((860, 120), str(job.name), fill=(255, 255, 255), font=fontbig)
+        pilmoji.text(
+            (900, 380),
+            f"LVL: {n.numerize(int(job.level))}",
+            fill=(255, 255, 255),
+            font=font,
+            emoji_position_offset=(0, 10),
+        )
+        x3, y3 = x1, y1
+        x4, y4 = x1 + ((x2 - x1) * (int(job.nom) / int(job.denom))), y2
+        pilmoji.text(
+            (2000, 380),
+            f"XP: {n.numerize(int(job.nom))} / {n.numerize(int(job.denom))}",
+            fill=(255, 255, 255),
+            font=font,
+            emoji_position_offset=(0, 10),
+        )
+    bar = Image.new("RGBA", img.size, 1)
+    draw = ImageDraw.ImageDraw(bar)
+    draw.ellipse(
+        (x1 - ((y2 - y1) / 2), y1, x1 + ((y2 - y1) / 2), y2),
+        fill=colors[0],
+    )
+    draw.ellipse(
+        (x2 - ((y2 - y1) / 2), y1, x2 + ((y2 - y1) / 2), y2),
+        fill=colors[0],
+    )
+    draw.rectangle((x1, y1, x2, y2), fill=colors[0])
+    draw.rectangle((x3, y3, x4, y4), fill=colors[1])
+    draw.ellipse(
+        (x1 - ((y2 - y1) / 2), y1, x1 + ((y2 - y1) / 2), y2),
+        fill=colors[1],
+    )
+    draw.ellipse(
+        (x4 - ((y2 - y1) / 2), y1, x4 + ((y2 - y1) / 2), y4),
+        fill=colors[1],
+    )
+    img.paste(bar, mask=bar)
+    return img
+
+
+def render_leaderboard(job: LeaderboardJob) -> Image.Image:
+    img = registry.template("lb", job.theme)
+    font = registry.font("inter", 43, basic=True)
+    with Pilmoji(img, source=emoji_source) as pilmoji:
+        pilmoji.text(
+            (job.values_x, 30),
+            "\n\n".join(job.values[:10]),
+            fill=(255, 255, 255),
+            font=font,
+            emoji_position_offset=(0, 20),
+        )
+        pilmoji.text(
+            (27, 30),
+            "\n\n".join(job.names[:10]),
+            fill=(255, 255, 255),
+            font=font,
+            emoji_position_offset=(0, 20),
+        )
+    if job.crop and len(job.values) < 10:
+        w, h = img.size
+        img = img.crop((0, 0, w, h - 95 * (10 - len(job.values))))
+    return img
+
+
+def render_flight_card(job: FlightCardJob) -> Image.Image:
+    img = registry.template("va_card", job.theme)
+    font = registry.font("inter", 48)
+    route_font = registry.font("roboto_mono", 128)
+    metar_font = registry.font("roboto_mono", 36)
+    with Pilmoji(img, source=emoji_source) as pilmoji:
+        colour = (255, 255, 255)
+        x_padding = 40
+        pilmoji.text(
+            (img.size[0] - (font.getlength(job.time_str) + x_padding), 43),  # type: ignore
+            job.time_str,
+            font=font,
+            fill=colour,
+        )
+        pilmoji.text((x_padding, 43), job.flight_number, font=font, fill=colour)
+        pilmoji.text((x_padding + 10, 135), job.origin, font=route_font, fill=colour)
+        pilmoji.text(
+            (
+                (
+                    img.size[0]
+                    - (route_font.getlength(job.destination) + (x_padding + 10))
+                ),  # type: ignore
+                135,
+            ),
+            job.destination,
+            font=route_font,
+            fill=colour,
+        )
+        pilmoji.text(
+            (170, 415),
+            textwrap.fill(job.pilot, 10, max_lines=1),
+            font=font,
+            fill=colour,
+        )
+        pilmoji.text((720, 415), job.aircraft, font=font, fill=colour)
+        pilmoji.text((170, 357), job.flight_time, font=font, fill=colour)
+        pilmoji.text((720, 357), job.distance, font=font, fill=colour)
+        pilmoji.text(
+            (x_padding + 5, 525 + x_padding // 6),
+            textwrap.fill(job.metar, 42, max_lines=5),
+            font=metar_font,
+            fill=colour,
+        )
+    return img
+
+
+def render_quote(job: QuoteJob) -> Image.Image:
+    avatar = variant(job.avatar_key, job.avatar, "square_1024")
+    qclear = registry.template("quote")
+    qavmask = registry.template("quote_mask")
+    img = Image.new("RGBA", (2048, 1024), 0)
+    img.paste(avatar, qavmask)  # type: ignore
+    img.paste(qclear, mask=qclear)
+    font = registry.font("inter", 100, basic=True)
+    text = f"{textwrap.fill(job.text, 22, max_lines=6)}"
+    with Pilmoji(img, source=emoji_source) as pilmoji:
+        pilmoji.text((950, 100), text, font=font, emoji_position_offset=(0, 20))
+        pilmoji.text(
+            (1000, 824),
+            job.author,
+            font=font,
+            fill=(130, 130, 130),
+            emoji_position_offset=(0, 20),
+        )
+    return img
+
+
+def _meme_text(
+    pilmoji: Pilmoji,
+    font: ImageFont.FreeTypeFont,
+    resolution: tuple[int, int],
+    text: str,
+    y: int,
+    border_offset: int,
+    wrap_width: int = 25,
+    wrap_lines: int = 2,
+) -> None:
+    # Black outline by drawing the text shifted to each corner first.
+    for dx, dy in ((1, 1), (-1, -1), (1, -1), (-1, 1)):
+        pilmoji.text(
+            (
+                round(resolution[0] / 2)
+                + dx * border_offset
+                - round(font.getlength(text.upper()) / 2),
+                y + dy * border_offset,
+            ),
+            textwrap.fill(
+                text.upper(),
+                wrap_width if (dx, dy) == (-1, -1) else 25,
+                max_lines=wrap_lines if (dx, dy) == (-1, -1) else 2,
+            ),
+            font=font,
+            emoji_position_offset=(-dx * border_offset, 20 - dy * border_offset),
+            fill=(0, 0, 0),
+            align="center",
+        )
+    pilmoji.text(
+        (
+            round(resolution[0] / 2) - round(font.getlength(text.upper()) / 2),
+            y,
+        ),
+        textwrap.fill(text.upper(), 25, max_lines=2),
+        font=font,
+        emoji_position_offset=(0, 20),
+        align="center",
+    )
+
+
+def render_meme(job: MemeJob) -> Image.Image:
+    img = Image.open(io.BytesIO(job.image))
+    resolution = img.size
+    text_size = job.text_size
+    font = registry.font("anton", text_size)
+    font_bars = registry.font("lato_bold", text_size)
+    border_offset = round(text_size / 25)
+    if job.top_text != None:
+        with Pilmoji(img, source=emoji_source) as pilmoji:
+            if job.bars:
+                draw = ImageDraw.ImageDraw(img)
+                draw.rectangle(
+                    ((0, 0), (resolution[0], round(resolution[1] / 6))),
+                    fill=(255, 255, 255),
+                )
+                pilmoji.text(
+                    (
+                        round(resolution[0] / 2)
+                        - (round(font_bars.getlength(job.top_text) / 2)),
+                        round(resolution[1] / 47),
+                    ),
+                    textwrap.fill(job.top_text, 25, max_lines=2),
+                    font=font_bars,
+                    fill=(0, 0, 0),
+                    emoji_position_offset=(0, 20),
+                    align="center",
+                )
+            else:
+                _meme_text(
+                    pilmoji,
+                    font,
+                    resolution,
+                    job.top_text,
+                    round(resolution[1] / 40),
+                    border_offset,
+                )
+    if job.bottom_text != None:
+        with Pilmoji(img, source=emoji_source) as pilmoji:
+            if job.bars:
+                draw = ImageDraw.ImageDraw(img)
+                draw.rectangle(
+                    (
+                        (0, round(resolution[1] - resolution[1] / 6)),
+                        (resolution[0], resolution[1]),
+                    ),
+                    fill=(255, 255, 255),
+                )
+                pilmoji.text(
+                    (
+                        round(resolution[0] / 2)
+                        - round(font_bars.getlength(job.bottom_text) / 2),
+                        round(resolution[1] - resolution[1] / 7),
+                    ),
+                    textwrap.fill(job.bottom_text, 25, max_lines=2),
+                    font=font_bars,
+                    fill=(0, 0, 0),
+                    emoji_position_offset=(0, 20),
+                    align="center",
+                )
+            else:
+                _meme_text(
+                    pilmoji,
+                    font,
+                    resolution,
+                    job.bottom_text,
+                    round(resolution[1] - resolution[1] / 5),
+                    border_offset,
+                    wrap_width=30,
+                    wrap_lines=3,
+                )
+    return img
+
+
+def render_flag_game(job: FlagGameJob) -> Image.Image:
+    image = Image.new("RGBA", (2048, 512))
+    font = registry.font("inter", 144)
+    with Pilmoji(image, source=emoji_source) as pilmoji:
+        pilmoji.text(
+            (10, 10),
+            job.text,
+            (255, 255, 255),
+            font,
+            emoji_position_offset=(0, 20),
+        )
+    return image
+
+
+def render_map_crop(job: MapCropJob) -> Image.Image:
+    return crop_map(Image.open(io.BytesIO(job.image)))
+
+
+def render_flight_map_job(job: FlightMapJob) -> Image.Image:
+    return render_flight_map(
+        job.routes,
+        projection=job.projection,
+        theme=job.theme,
+        auto_zoom=job.auto_zoom,
+        labels=job.labels,
+        marker_line=job.marker_line,
+        label_size=job.label_size,
+    )
+
+
+RENDERERS = {
+    LevelCardJob: render_level_card,
+    LeaderboardJob: render_leaderboard,
+    FlightCardJob: render_flight_card,
+    QuoteJob: render_quote,
+    MemeJob: render_meme,
+    FlagGameJob: render_flag_game,
+    MapCropJob: render_map_crop,
+    FlightMapJob: render_flight_map_job,
+}
+
+
+def filename(job_type: type, stem: str, data: bytes | None = None) -> str:
+    # Pass the data when the encoder may have fallen back to another format.
+    ext = sniff_extension(data) if data is not None else None
+    return f"{stem}.{ext or extension(job_type.kind)}"
+
+
+def run_job(job) -> tuple[bytes, float, int]:
+    start = time.perf_counter()
+    img = RENDERERS[type(job)](job)
+    data = encode(img, job.kind)
+    # Savings are measured against the raw RGBA pixels, not another encode.
+    raw = img.width * img.height * 4
+    return data, time.perf_counter() - start, raw
+
+
+def _warmup() -> None:
+    pass
+
+
+def asset_stats() -> dict[str, int]:
+    return registry.stats()
+
+
+@dataclass
+class JobTimings:
+    count: int = 0
+    failed: int = 0
+    total_wall: float = 0.0
+    total_render: float = 0.0
+    max_wall: float = 0.0
+    last_wall: float = 0.0
+    total_bytes: int = 0
+    total_raw: int = 0
+
+    @property
+    def avg_wall(self) -> float:
+        return self.total_wall / self.count if self.count else 0.0
+
+    @property
+    def avg_render(self) -> float:
+        return self.total_render / self.count if self.count else 0.0
+
+    @property
+    def avg_bytes(self) -> int:
+        return self.total_bytes // self.count if self.count else 0
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.total_raw - self.total_bytes
+
+
+class Renderer:
+    def __init__(self, max_workers: int | None = None) -> None:
+        if max_workers is None:
+            max_workers = int(os.getenv("RENDER_WORKERS", min(2, os.cpu_count() or 1)))
+        self.max_workers = max(1, max_workers)
+        self.timings: dict[str, JobTimings] = {}
+        self.pending = 0
+        self.theme: int | None = None
+        self._executor: ProcessPoolExecutor | None = None
+
+    def start(self, warm: bool = False, theme: int | None = None) -> None:
+        if self._executor:
+            return
+        if theme is not None:
+            self.theme = theme
+        if self.theme is not None:
+            # Forked workers inherit the decoded assets.
+            registry.preload(self.theme)
+        if os.path.exists(BASEMAP_PATH):
+            basemap()
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        if warm:
+            # Fork the workers now, before the event loop and its threads exist.
+            self._executor.submit(_warmup).result()
+
+    def set_theme(self, theme: int) -> None:
+        # Workers switch templates on the first job with the new theme.
+        self.theme = theme
+        registry.set_theme(theme)
+
+    def shutdown(self) -> None:
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def record(
+        self,
+        name: str,
+        wall: float,
+        render: float | None,
+        size: int = 0,
+        raw: int = 0,
+    ) -> None:
+        timings = self.timings.setdefault(name, JobTimings())
+        if render is None:
+            timings.failed += 1
+            return
+        timings.count += 1
+        timings.total_wall += wall
+        timings.total_render += render
+        timings.max_wall = max(timings.max_wall, wall)
+        timings.last_wall = wall
+        timings.total_bytes += size
+        timings.total_raw += raw
+        if metrics.enabled:
+            metrics.renders.observe(name, wall)
+
+    async def render(self, job) -> bytes:
+        self.start()
+        loop = asyncio.get_running_loop()
+        name = type(job).__name__
+        start = time.perf_counter()
+        self.pending += 1
+        try:
+            try:
+                data, render_time, raw = await loop.run_in_executor(
+                    self._executor, run_job, job
+                )
+            except BrokenProcessPool:
+                self.shutdown()
+                self.start()
+                data, render_time, raw = await loop.run_in_executor(
+                    self._executor, run_job, job
+                )
+        except Exception:
+            self.record(name, time.perf_counter() - start, None)
+            raise
+        finally:
+            self.pending -= 1
+
+        self.record(
+            name, time.perf_counter() - start, render_time, len(data), raw
+        )
+        return data
+
+    async def asset_stats(self) -> dict[str, int]:
+        self.start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, asset_stats)
@@ -0,0 +1,173 @@
+import re
+import time
+import unicodedata
+from collections import deque
+
+import aiosqlite
+
+from bot import DB
+from metrics import metrics, timed_execute, timed_executemany
+
+DEFAULT_BLACKLIST = ["@everyone", "@here", "porn", "nudes", "crypto", "free nitro"]
+
+RELOAD_INTERVAL = 60.0
+
+ZERO_WIDTH = (
+    "\u00ad\u034f\u061c\u180e\u200b\u200c\u200d\u200e\u200f"
+    "\u2060\u2061\u2062\u2063\u2064\ufeff"
+)
+
+# Cyrillic and Greek letters that render like Latin ones. NFKD already folds
+# fullwidth and mathematical variants.
+HOMOGLYPHS = {
+    "а": "a",
+    "в": "b",
+    "с": "c",
+    "ԁ": "d",
+    "е": "e",
+    "ё": "e",
+    "һ": "h",
+    "і": "i",
+    "ї": "i",
+    "ј": "j",
+    "к": "k",
+    "м": "m",
+    "н": "h",
+    "о": "o",
+    "р": "p",
+    "ԛ": "q",
+    "ѕ": "s",
+    "т": "t",
+    "у": "y",
+    "х": "x",
+    "ԝ": "w",
+    "α": "a",
+    "β": "b",
+    "ε": "e",
+    "η": "n",
+    "ι": "i",
+    "κ": "k",
+    "ν": "v",
+    "ο": "o",
+    "ρ": "p",
+    "τ": "t",
+    "υ": "u",
+    "χ": "x",
+    "ɡ": "g",
+    "ı": "i",
+}
+
+TRANSLATION = str.maketrans({**HOMOGLYPHS, **dict.fromkeys(ZERO_WIDTH)})
+WHITESPACE = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    if text.isascii():
+        return WHITESPACE.sub(" ", text.lower())
+    text = unicodedata.normalize("NFKD", text.casefold()).translate(TRANSLATION)
+    # Drop the accents NFKD split off, so "pörn" is "porn".
+    text = "".join(c for c in text if not unicodedata.combining(c))
+    return WHITESPACE.sub(" ", text)
+
+
+class Automaton:
+    def __init__(self, patterns: list[str]) -> None:
+        self.goto: list[dict[str, int]] = [{}]
+        self.fail: list[int] = [0]
+        self.out: list[str | None] = [None]
+
+        for pattern in patterns:
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                if char not in self.goto[state]:
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append(None)
+                    self.goto[state][char] = len(self.goto) - 1
+                state = self.goto[state][char]
+            self.out[state] = pattern
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, child in self.goto[state].items():
+                queue.append(child)
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[child] = self.goto[fallback].get(char, 0)
+                if self.out[child] is None:
+                    self.out[child] = self.out[self.fail[child]]
+
+    def search(self, text: str) -> str | None:
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state] is not None:
+                return out[state]
+        return None
+
+
+class ScamFilter:
+    def __init__(self, db_path: str = DB["main"]) -> None:
+        self.db_path = db_path
+        self.phrases: list[str] = []
+        self.automaton = Automaton([])
+        self.admins: set[int] | None = None
+        self.checked = 0
+        self.matched = 0
+        self._loaded_at = 0.0
+
+    async def setup(self) -> None:
+        async with aiosqlite.connect(self.db_path) as db:
+            await timed_execute(
+                db,
+                "blacklist.create",
+                "CREATE TABLE IF NOT EXISTS blacklist (id INTEGER PRIMARY KEY, phrase TEXT UNIQUE, enabled INTEGER DEFAULT 1)",
+            )
+            await timed_executemany(db, "blacklist.insert", 
+                "INSERT OR IGNORE INTO blacklist (phrase) VALUES (?)",
+                [(phrase,) for phrase in DEFAULT_BLACKLIST],
+            )
+            await db.commit()
+
+    async def reload(self) -> None:
+        if not self._loaded_at:
+            await self.setup()
+        with metrics.timed(metrics.db, "blacklist.select"):
+            async with aiosqlite.connect(self.db_path) as db:
+                cur = await db.execute("SELECT phrase FROM blacklist WHERE enabled=1")
+                rows = await cur.fetchall()
+        phrases = sorted({normalize(row[0]) for row in rows})
+        self._loaded_at = time.monotonic()
+        if phrases != self.phrases:
+            self.phrases = phrases
+            self.automaton = Automaton(phrases)
+
+    async def maybe_reload(self) -> None:
+        # Edits to the table are picked up without a restart.
+        if time.monotonic() - self._loaded_at > RELOAD_INTERVAL:
+            await self.reload()
+
+    def check(self, text: str) -> str | None:
+        self.checked += 1
+        match = self.automaton.search(normalize(text))
+        if match is not None:
+            self.matched += 1
+        return match
+
+    def set_admins(self, ids) -> None:
+        self.admins = set(ids)
+
+    def update_admin(self, member_id: int, is_admin: bool) -> None:
+        if self.admins is None:
+            return
+        if is_admin:
+            self.admins.add(member_id)
+        else:
+            self.admins.discard(member_id)
@@ -0,0 +1,162 @@
+import time
+from collections import deque
+from dataclasses import dataclass
+
+import discord
+
+from metrics import metrics
+
+# Samples kept per command, and how far back they count.
+WINDOW_SIZE = 256
+WINDOW_SECONDS = 24 * 3600
+
+
+class TimedResponse(discord.InteractionResponse):
+    def __init__(self, parent: discord.Interaction, ctx: "TimedContext") -> None:
+        super().__init__(parent)
+        self.ctx = ctx
+
+    async def defer(self, *args, **kwargs) -> None:
+        await super().defer(*args, **kwargs)
+        self.ctx.stamp("deferred_at")
+
+    async def send_message(self, *args, **kwargs):
+        result = await super().send_message(*args, **kwargs)
+        self.ctx.stamp("responded_at")
+        return result
+
+    async def edit_message(self, *args, **kwargs):
+        result = await super().edit_message(*args, **kwargs)
+        self.ctx.stamp("responded_at")
+        return result
+
+    async def send_modal(self, *args, **kwargs):
+        result = await super().send_modal(*args, **kwargs)
+        self.ctx.stamp("responded_at")
+        return result
+
+
+class TimedFollowup(discord.Webhook):
+    ctx: "TimedContext"
+
+    async def send(self, *args, **kwargs):
+        result = await super().send(*args, **kwargs)
+        self.ctx.stamp("responded_at")
+        return result
+
+
+class TimedContext(discord.ApplicationContext):
+    def __init__(self, bot, interaction: discord.Interaction) -> None:
+        super().__init__(bot, interaction)
+        self.started_at = time.perf_counter()
+        self.deferred_at: float | None = None
+        self.responded_at: float | None = None
+
+        # Cogs and paginators also answer through ctx.interaction directly,
+        # so the timing hooks sit on the interaction's own response objects.
+        interaction._cs_response = TimedResponse(interaction, self)  # type: ignore
+        followup = TimedFollowup.from_state(
+            data={
+                "id": interaction.application_id,
+                "type": 3,
+                "token": interaction.token,
+            },
+            state=interaction._state,
+        )
+        followup.ctx = self  # type: ignore
+        interaction._cs_followup = followup  # type: ignore
+
+    def stamp(self, attr: str) -> None:
+        # Stamped once the request returns, so the HTTP round-trip counts.
+        if getattr(self, attr) is None:
+            setattr(self, attr, time.perf_counter())
+
+    @property
+    def edit(self):
+        # A deferred command's first visible reply is usually this edit.
+        edit = super().edit
+
+        async def timed_edit(*args, **kwargs):
+            result = await edit(*args, **kwargs)
+            self.stamp("responded_at")
+            return result
+
+        return timed_edit
+
+
+@dataclass
+class Sample:
+    at: float
+    wall: float
+    respond: float | None
+    failed: bool
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, round(q * (len(values) - 1)))]
+
+
+@dataclass
+class CommandSummary:
+    name: str
+    count: int
+    errors: int
+    p50: float
+    p95: float
+    p99: float
+    respond_p95: float | None
+
+
+class CommandTimings:
+    def __init__(
+        self, size: int = WINDOW_SIZE, seconds: float = WINDOW_SECONDS
+    ) -> None:
+        self.size = size
+        self.seconds = seconds
+        self.samples: dict[str, deque[Sample]] = {}
+
+    def record(self, ctx: discord.ApplicationContext, failed: bool = False) -> None:
+        if ctx.command is None:
+            return
+        name = ctx.command.qualified_name
+        now = time.perf_counter()
+        started_at = getattr(ctx, "started_at", now)
+        deferred_at = getattr(ctx, "deferred_at", None)
+        responded_at = getattr(ctx, "responded_at", None)
+        wall = now - started_at
+        respond = (
+            responded_at - deferred_at
+            if deferred_at is not None and responded_at is not None
+            else None
+        )
+
+        window = self.samples.get(name)
+        if window is None:
+            window = self.samples[name] = deque(maxlen=self.size)
+        window.append(Sample(time.monotonic(), wall, respond, failed))
+        metrics.command_finished(name, wall, failed)
+
+    def summary(self, name: str) -> CommandSummary | None:
+        cutoff = time.monotonic() - self.seconds
+        samples = [s for s in self.samples.get(name, ()) if s.at >= cutoff]
+        if not samples:
+            return None
+        walls = [s.wall for s in samples if not s.failed]
+        responds = [s.respond for s in samples if s.respond is not None]
+        return CommandSummary(
+            name=name,
+            count=len(samples),
+            errors=sum(s.failed for s in samples),
+            p50=percentile(walls, 0.5),
+            p95=percentile(walls, 0.95),
+            p99=percentile(walls, 0.99),
+            respond_p95=percentile(responds, 0.95) if responds else None,  # type: ignore
+        )
+
+    def slowest(self, limit: int = 10) -> list[CommandSummary]:
+        summaries = [self.summary(name) for name in self.samples]
+        summaries = [s for s in summaries if s is not None]
+        return sorted(summaries, key=lambda s: s.p95, reverse=True)[:limit]